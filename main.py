@@ -1,6 +1,240 @@
-def main():
-    print("Hello from ecomenu-assistant!")
+"""
+Point d'entrée en ligne de commande d'EcoMenu Assistant
+
+Évaluation en lot de listes de courses et de tickets de caisse :
+    python main.py score achats.csv -o achats_evalues.csv --column libelle
+    python main.py score tickets.jsonl -o - --workers 4 > resultats.jsonl
+
+Chaque ligne est associée au produit AGRIBALYSE le plus proche ; on lui
+ajoute son impact carbone, celui de la quantité achetée et la meilleure
+alternative (voir ecomenu_assistant.recommendations.scoring).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO
+
+from tqdm import tqdm
+
+sys.path.append(str(Path(__file__).parent / "src"))
+from ecomenu_assistant.recommendations.scoring import CHAMPS_RESULTAT, score_stream
+
+# Champs essayés, dans l'ordre, quand --column n'est pas précisé
+COLONNES_LIBELLE = ['libelle', 'libellé', 'produit', 'article', 'designation', 'désignation',
+                    'nom', 'description', 'label', 'product', 'item', 'name']
+
+# Grammes par unité de la colonne de quantité
+UNITES = {'g': 1.0, 'kg': 1000.0}
+
+# Processus lancés par défaut au plus : chacun charge sa propre copie des
+# données et des index, au-delà le gain ne compense plus la mémoire
+MAX_WORKERS_DEFAULT = 4
+
+
+def detect_format(path: str, default: str = 'csv') -> str:
+    """Format d'un fichier d'après son extension ('csv' ou 'jsonl')"""
+    suffix = Path(path).suffix.lower()
+    if suffix in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    if suffix in ('.csv', '.tsv', '.txt'):
+        return 'csv'
+    return default
+
+
+def count_lines(path: str) -> Optional[int]:
+    """Nombre de lignes d'un fichier (lecture par blocs), None pour l'entrée standard"""
+    if path == '-':
+        return None
+    with open(path, 'rb') as f:
+        return sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b''))
+
+
+def default_workers(total: Optional[int], chunk_size: int) -> int:
+    """
+    Nombre de processus par défaut : un par cœur, au plus MAX_WORKERS_DEFAULT
+    et au plus un par paquet de l'entrée quand sa taille est connue.
+
+    Args:
+        total: Nombre de lignes de l'entrée (None si inconnu)
+        chunk_size: Nombre de lignes par paquet
+
+    Returns:
+        Nombre de processus (1 : dans le processus courant)
+    """
+    workers = min(os.cpu_count() or 1, MAX_WORKERS_DEFAULT)
+    if total is not None:
+        workers = min(workers, -(-total // max(chunk_size, 1)))
+    return max(workers, 1)
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[Dict]:
+    """
+    Lit les lignes d'entrée au fil de l'eau.
+
+    Args:
+        stream: Fichier ouvert en mode texte
+        fmt: 'csv' (séparateur détecté : virgule, point-virgule ou tabulation)
+            ou 'jsonl' (un objet JSON par ligne, ou une simple chaîne)
+
+    Returns:
+        Itérateur de dicts
+    """
+    if fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            yield record if isinstance(record, dict) else {'libelle': str(record)}
+        return
+
+    sample = stream.read(64 * 1024)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    lines = _chain_text(sample, stream)
+    yield from csv.DictReader(lines, dialect=dialect)
+
+
+def _chain_text(head: str, stream: TextIO) -> Iterator[str]:
+    """Relit le début déjà consommé (détection du séparateur) puis la suite du fichier"""
+    pending = ''
+    for block in (head, *iter(lambda: stream.read(1 << 20), '')):
+        lines = (pending + block).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    if pending:
+        yield pending
+
+
+def guess_column(record: Dict) -> str:
+    """Champ contenant le libellé : premier nom connu, sinon premier champ texte"""
+    lowered = {key.lower().strip(): key for key in record}
+    for name in COLONNES_LIBELLE:
+        if name in lowered:
+            return lowered[name]
+    for key, value in record.items():
+        if isinstance(value, str):
+            return key
+    raise ValueError("Aucun champ texte trouvé : précisez --column")
+
+
+class RecordWriter:
+    """Écrit les lignes évaluées en CSV ou en JSONL"""
+
+    def __init__(self, stream: TextIO, fmt: str, delimiter: str = ','):
+        self.stream = stream
+        self.fmt = fmt
+        self.delimiter = delimiter
+        self._writer = None
+
+    def write(self, records: List[Dict]):
+        if self.fmt == 'jsonl':
+            self.stream.write(''.join(
+                json.dumps(record, ensure_ascii=False) + '\n' for record in records
+            ))
+            return
+        if self._writer is None and records:
+            fields = [key for key in records[0] if key not in CHAMPS_RESULTAT] + CHAMPS_RESULTAT
+            self._writer = csv.DictWriter(self.stream, fieldnames=fields, delimiter=self.delimiter,
+                                          extrasaction='ignore')
+            self._writer.writeheader()
+        if self._writer is not None:
+            self._writer.writerows(records)
+
+
+def score_command(args: argparse.Namespace) -> int:
+    """Commande `score` : évalue un fichier de lignes d'achats"""
+    input_format = args.format or detect_format(args.input)
+    output_format = args.output_format or (
+        input_format if args.output == '-' else detect_format(args.output, input_format)
+    )
+    total = count_lines(args.input)
+    if total is not None and input_format == 'csv':
+        total = max(total - 1, 0)  # ligne d'en-tête
+    workers = args.workers or default_workers(total, args.chunk_size)
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding=args.encoding, newline='')
+    target = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        records = read_records(source, input_format)
+        first = next(records, None)
+        if first is None:
+            print("Fichier d'entrée vide", file=sys.stderr)
+            return 1
+        column = args.column or guess_column(first)
+        if column not in first:
+            print(f"Champ '{column}' absent de l'entrée (champs : {', '.join(first)})", file=sys.stderr)
+            return 1
+
+        def all_records():
+            yield first
+            yield from records
+
+        writer = RecordWriter(target, output_format, delimiter=args.delimiter)
+        processed = matched = 0
+        start = time.perf_counter()
+        with tqdm(total=total, unit=' lignes', file=sys.stderr, disable=args.quiet) as progress:
+            for chunk in score_stream(all_records(), column, args.quantity_column,
+                                      UNITES[args.quantity_unit], workers=workers,
+                                      chunk_size=args.chunk_size, file_path=args.data):
+                writer.write(chunk)
+                processed += len(chunk)
+                matched += sum(record['code_agb'] is not None for record in chunk)
+                progress.update(len(chunk))
+        elapsed = time.perf_counter() - start
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    rate = processed / elapsed if elapsed > 0 else float('inf')
+    share = 100 * matched / processed if processed else 0.0
+    print(f"{processed} lignes évaluées en {elapsed:.1f} s ({rate:.0f} lignes/s), "
+          f"{matched} associées à un produit ({share:.1f} %)", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="EcoMenu Assistant en ligne de commande")
+    commands = parser.add_subparsers(dest='command')
+
+    score = commands.add_parser('score', help="Évaluer une liste de courses ou des tickets de caisse")
+    score.add_argument('input', help="Fichier CSV ou JSONL ('-' : entrée standard)")
+    score.add_argument('-o', '--output', default='-', help="Fichier de sortie ('-' : sortie standard)")
+    score.add_argument('--format', choices=['csv', 'jsonl'], help="Format d'entrée (déduit de l'extension)")
+    score.add_argument('--output-format', choices=['csv', 'jsonl'], help="Format de sortie")
+    score.add_argument('--column', help="Champ du libellé (détecté si absent)")
+    score.add_argument('--quantity-column', help="Champ de la quantité (sinon lue dans le libellé)")
+    score.add_argument('--quantity-unit', choices=list(UNITES), default='g',
+                       help="Unité des quantités numériques")
+    score.add_argument('--workers', type=int,
+                       help="Nombre de processus (1 : sans pool ; par défaut un par cœur, "
+                            f"au plus {MAX_WORKERS_DEFAULT} et au plus un par paquet)")
+    score.add_argument('--chunk-size', type=int, default=2000, help="Lignes par paquet")
+    score.add_argument('--delimiter', default=',', help="Séparateur du CSV de sortie")
+    score.add_argument('--encoding', default='utf-8-sig', help="Encodage du fichier d'entrée")
+    score.add_argument('--data', help="Fichier CSV AGRIBALYSE (chemin par défaut sinon)")
+    score.add_argument('-q', '--quiet', action='store_true', help="Sans barre de progression")
+    score.set_defaults(handler=score_command)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 0
+    return args.handler(args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,528 @@
+"""
+API HTTP des données AGRIBALYSE : recherche, impacts, statistiques et alternatives
+
+Service asynchrone (tornado) sans interface, destiné aux applications
+clientes (application mobile, planification de menus). Il s'appuie sur les
+données partagées du processus (voir data.loader.get_shared_data, mode
+étendu) et sur les structures déjà utilisées par l'application Streamlit :
+index de recherche, agrégats d'analyse et table des alternatives.
+
+Les produits sont identifiés par leur code AGRIBALYSE ('Code AGB').
+Les réponses GET (et HEAD) portent un ETag égal à la version des données :
+un client qui renvoie If-None-Match reçoit un 304 sans corps tant que le
+fichier AGRIBALYSE n'a pas changé. Le 304 n'est envoyé qu'une fois la
+requête validée : un produit inconnu reste un 404.
+
+Lancement :
+    python -m ecomenu_assistant.api.server --port 8000
+"""
+import argparse
+import json
+import math
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import tornado.httpserver
+import tornado.ioloop
+import tornado.web
+
+from ecomenu_assistant.data.analyzer import get_analysis_cube
+from ecomenu_assistant.data.loader import (
+    COLONNES_INDICATEURS,
+    get_data_version,
+    get_shared_data,
+    get_shared_resource,
+)
+from ecomenu_assistant.data.search import get_search_index
+from ecomenu_assistant.recommendations.engine import get_recommendation_engine
+from ecomenu_assistant.utils.metrics import observe, to_prometheus
+
+NAME_COLUMN = 'Nom du Produit en Français'
+GROUP_COLUMN = "Groupe d'aliment"
+SUBGROUP_COLUMN = "Sous-groupe d'aliment"
+IMPACT_COLUMN = 'Changement climatique'
+CODE_COLUMN = 'Code AGB'
+
+# Nombre maximum de produits ou de requêtes par appel groupé
+MAX_BATCH = int(os.getenv('ECOMENU_API_MAX_BATCH', 1000))
+# Durée de validité des réponses GET côté client (secondes)
+CACHE_MAX_AGE = int(os.getenv('ECOMENU_API_MAX_AGE', 300))
+# Réponses GET conservées en mémoire (clé : version des données et URL)
+RESPONSE_CACHE_SIZE = 1024
+# Nombre maximum de résultats d'une recherche
+MAX_SEARCH_LIMIT = 100
+
+
+def to_json(payload) -> str:
+    """JSON compact (sans espaces, accents conservés)"""
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+
+
+def _clean(value):
+    """Valeur sérialisable en JSON (NaN -> null, types NumPy -> Python)"""
+    if value is None or value is pd.NA:
+        return None
+    if isinstance(value, (float, np.floating)):
+        return None if math.isnan(value) else float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def _code(value) -> Optional[int]:
+    """Code saison / avion entier (null si absent)"""
+    value = _clean(value)
+    return None if value is None else int(value)
+
+
+class ProductCatalog:
+    """
+    Fiches produits prêtes à l'envoi.
+
+    Chaque produit est sérialisé une seule fois, en version résumée
+    (impact carbone, score EF, DQR, codes saison et avion) et détaillée
+    (avec les 16 indicateurs) ; une réponse n'est plus qu'une concaténation
+    de fragments JSON, quel que soit le nombre de produits demandés.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        """
+        Args:
+            data: DataFrame AGRIBALYSE chargé en mode étendu
+        """
+        codes = data[CODE_COLUMN].astype(str).tolist()
+        self.data = data
+        self.codes = codes
+        # Premier produit retenu si un code apparaît plusieurs fois
+        self.positions: Dict[str, int] = {}
+        for row_id, code in enumerate(codes):
+            self.positions.setdefault(code, row_id)
+
+        indicators = [col for col in COLONNES_INDICATEURS if col in data.columns]
+        columns = {
+            'nom': data[NAME_COLUMN].tolist(),
+            'groupe': data[GROUP_COLUMN].tolist(),
+            'sous_groupe': data[SUBGROUP_COLUMN].tolist(),
+            'co2': data[IMPACT_COLUMN].tolist(),
+            'score_ef': data['Score unique EF'].tolist() if 'Score unique EF' in data.columns
+            else [None] * len(data),
+            'dqr': data['DQR'].tolist(),
+        }
+        seasons = data['code saison'].tolist()
+        planes = data['code avion'].tolist()
+        values = data[indicators].to_numpy(dtype=np.float64).tolist()
+
+        self.summaries: List[str] = []
+        self.details: List[str] = []
+        for row_id, code in enumerate(codes):
+            record = {'code': code}
+            record.update({key: _clean(column[row_id]) for key, column in columns.items()})
+            record['saison'] = _code(seasons[row_id])
+            record['avion'] = _code(planes[row_id])
+            self.summaries.append(to_json(record))
+            record['indicateurs'] = {
+                name: _clean(value) for name, value in zip(indicators, values[row_id])
+            }
+            self.details.append(to_json(record))
+
+        # Fragments des alternatives, construits à la demande : (iloc, k) -> JSON
+        self._alternatives: Dict[Tuple[int, int], str] = {}
+
+    def lookup(self, codes: Sequence) -> Tuple[List[int], List[str]]:
+        """
+        Positions (iloc) des produits demandés.
+
+        Args:
+            codes: Codes AGB (texte ou nombre)
+
+        Returns:
+            Positions des produits trouvés, dans l'ordre de la demande, et
+            codes inconnus
+        """
+        row_ids, unknown = [], []
+        for code in codes:
+            row_id = self.positions.get(str(code))
+            if row_id is None:
+                unknown.append(str(code))
+            else:
+                row_ids.append(row_id)
+        return row_ids, unknown
+
+    def products_json(self, row_ids: Sequence[int], details: bool = False) -> str:
+        """Liste JSON des fiches des produits"""
+        fragments = self.details if details else self.summaries
+        return '[' + ','.join(fragments[row_id] for row_id in row_ids) + ']'
+
+    def alternatives_json(self, row_ids: Sequence[int], k: int) -> str:
+        """
+        Alternatives bas carbone de chaque produit (voir RecommendationEngine).
+        Le fragment JSON de chaque produit est mémorisé par valeur de k.
+
+        Returns:
+            Liste JSON : {"code", "alternatives": [{"rang", "economie", "produit"}]}
+            par produit demandé
+        """
+        items = []
+        for row_id in row_ids:
+            fragment = self._alternatives.get((row_id, k))
+            if fragment is None:
+                fragment = self._alternatives_fragment(row_id, k)
+                self._alternatives[(row_id, k)] = fragment
+            items.append(fragment)
+        return '[' + ','.join(items) + ']'
+
+    def _alternatives_fragment(self, row_id: int, k: int) -> str:
+        engine = get_recommendation_engine(self.data)
+        impacts = engine.impacts
+        entries = [
+            '{"rang":%d,"economie":%s,"produit":%s}' % (
+                rank, to_json(round(float(impacts[row_id] - impacts[alternative]), 6)),
+                self.summaries[alternative]
+            )
+            for rank, alternative in enumerate(engine.alternatives[row_id, :k].tolist(), start=1)
+            if alternative >= 0
+        ]
+        return '{"code":%s,"alternatives":[%s]}' % (to_json(self.codes[row_id]), ','.join(entries))
+
+
+def get_product_catalog(data: pd.DataFrame) -> ProductCatalog:
+    """
+    Retourne le catalogue des fiches produits, partagé par tout le processus
+    pour les données partagées.
+
+    Args:
+        data: DataFrame AGRIBALYSE chargé en mode étendu
+
+    Returns:
+        Catalogue des fiches sérialisées
+    """
+    return get_shared_resource('api_catalog', ProductCatalog, data)
+
+
+def _records(frame: pd.DataFrame, columns: Dict[str, str]) -> List[dict]:
+    """Lignes d'un DataFrame sous forme de dicts, colonnes renommées"""
+    frame = frame.reset_index()
+    return [
+        {key: _clean(value) for key, value in zip(columns.values(), row)}
+        for row in frame[list(columns)].itertuples(index=False, name=None)
+    ]
+
+
+def _flag(value, name: str, default: bool) -> bool:
+    """Booléen JSON (true/false), erreur 400 pour tout autre type"""
+    if value is None:
+        return default
+    if not isinstance(value, bool):
+        raise tornado.web.HTTPError(400, reason=f"Paramètre '{name}' invalide (booléen attendu): {value}")
+    return value
+
+
+def _bounded(value, name: str, default: int, minimum: int, maximum: int) -> int:
+    """Entier borné (paramètre d'URL ou champ JSON), erreur 400 si invalide"""
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise tornado.web.HTTPError(400, reason=f"Paramètre '{name}' invalide: {value}")
+    return max(minimum, min(value, maximum))
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    """
+    Fonctions communes : données partagées, ETag, cache des réponses GET
+    et erreurs au format JSON.
+    """
+
+    def initialize(self, file_path: Optional[str] = None):
+        self.file_path = file_path
+
+    def set_default_headers(self):
+        self.set_header('Content-Type', 'application/json; charset=UTF-8')
+
+    def prepare(self):
+        self.data = get_shared_data(self.file_path, extended=True)
+        self.version = get_data_version(self.file_path, extended=True)
+        self.set_header('X-Data-Version', self.version)
+        if self.request.method not in ('GET', 'HEAD'):
+            return
+
+        self.set_header('ETag', f'"{self.version}"')
+        self.set_header('Cache-Control', f'public, max-age={CACHE_MAX_AGE}')
+        # Seules les réponses valides sont en cache : 304 ou réponse directe
+        cached = self.application.response_cache.get((self.version, self.request.uri))
+        if cached is not None:
+            self.send_json(cached)
+
+    def head(self, *args):
+        # Même réponse que GET, tornado n'envoie pas le corps
+        return self.get(*args)
+
+    def send_json(self, body: str):
+        """
+        Envoie une réponse JSON déjà sérialisée (mise en cache si GET ou
+        HEAD), ou un 304 sans corps si le client a déjà cette version.
+        """
+        if self.request.method in ('GET', 'HEAD'):
+            cache = self.application.response_cache
+            cache[(self.version, self.request.uri)] = body
+            cache.move_to_end((self.version, self.request.uri))
+            if len(cache) > RESPONSE_CACHE_SIZE:
+                cache.popitem(last=False)
+            if f'"{self.version}"' in self.request.headers.get('If-None-Match', ''):
+                self.set_status(304)
+                self.finish()
+                return
+        self.finish(body)
+
+    def on_finish(self):
+        observe('api.request', self.request.request_time(),
+                route=type(self).__name__, status=self.get_status())
+
+    def compute_etag(self) -> Optional[str]:
+        # ETag fixé dans prepare (version des données) : pas de hachage du corps
+        return None
+
+    def write_error(self, status_code: int, **kwargs):
+        self.set_header('Content-Type', 'application/json; charset=UTF-8')
+        self.clear_header('ETag')
+        self.set_header('Cache-Control', 'no-store')
+        self.finish(to_json({'erreur': self._reason}))
+
+    @property
+    def catalog(self) -> ProductCatalog:
+        return get_product_catalog(self.data)
+
+    def get_int_argument(self, name: str, default: int, minimum: int, maximum: int) -> int:
+        """Paramètre entier de l'URL, borné"""
+        return _bounded(self.get_argument(name, None), name, default, minimum, maximum)
+
+    def get_json_body(self) -> dict:
+        """Corps JSON d'une requête POST"""
+        try:
+            body = json.loads(self.request.body or b'{}')
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="Corps JSON invalide")
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(400, reason="Le corps doit être un objet JSON")
+        return body
+
+    def get_batch(self, body: dict, key: str) -> list:
+        """Liste d'un appel groupé, de taille bornée par MAX_BATCH"""
+        items = body.get(key)
+        if not isinstance(items, list):
+            raise tornado.web.HTTPError(400, reason=f"Champ '{key}' manquant ou invalide (liste attendue)")
+        if len(items) > MAX_BATCH:
+            raise tornado.web.HTTPError(400, reason=f"Au plus {MAX_BATCH} éléments par appel")
+        return items
+
+    def search(self, query: str, limit: int, fuzzy: bool) -> List[int]:
+        index = get_search_index(self.data)
+        if fuzzy:
+            return index.fuzzy_search(query, limit=limit).tolist()
+        return index.search(query, limit=limit).tolist()
+
+
+class InfoHandler(BaseHandler):
+    """GET /v1/info : version et taille des données"""
+
+    def get(self):
+        self.send_json(to_json({
+            'version': self.version,
+            'produits': len(self.data),
+            'indicateurs': [col for col in COLONNES_INDICATEURS if col in self.data.columns],
+        }))
+
+
+class SearchHandler(BaseHandler):
+    """GET /v1/search?q=boeuf&limit=10&fuzzy=1 : recherche par nom"""
+
+    def get(self):
+        query = self.get_argument('q', '')
+        limit = self.get_int_argument('limit', 10, 1, MAX_SEARCH_LIMIT)
+        fuzzy = self.get_argument('fuzzy', '1') != '0'
+        row_ids = self.search(query, limit, fuzzy)
+        self.send_json('{"requete":%s,"produits":%s}' % (
+            to_json(query), self.catalog.products_json(row_ids)
+        ))
+
+
+class SearchBatchHandler(BaseHandler):
+    """POST /v1/search/batch {"requetes": [...], "limit": 10, "fuzzy": true}"""
+
+    def post(self):
+        body = self.get_json_body()
+        queries = self.get_batch(body, 'requetes')
+        if not all(isinstance(query, str) for query in queries):
+            raise tornado.web.HTTPError(400, reason="Champ 'requetes' invalide (textes attendus)")
+        limit = _bounded(body.get('limit'), 'limit', 10, 1, MAX_SEARCH_LIMIT)
+        fuzzy = _flag(body.get('fuzzy'), 'fuzzy', True)
+        catalog = self.catalog
+        results = [
+            '{"requete":%s,"produits":%s}' % (
+                to_json(query), catalog.products_json(self.search(query, limit, fuzzy))
+            )
+            for query in queries
+        ]
+        self.send_json('{"resultats":[' + ','.join(results) + ']}')
+
+
+class ProductHandler(BaseHandler):
+    """GET /v1/products/<code> : fiche détaillée (16 indicateurs)"""
+
+    def get(self, code: str):
+        row_ids, _ = self.catalog.lookup([code])
+        if not row_ids:
+            raise tornado.web.HTTPError(404, reason=f"Produit inconnu: {code}")
+        self.send_json(self.catalog.details[row_ids[0]])
+
+
+class ProductBatchHandler(BaseHandler):
+    """POST /v1/products/batch {"codes": [...], "details": false}"""
+
+    def post(self):
+        body = self.get_json_body()
+        row_ids, unknown = self.catalog.lookup(self.get_batch(body, 'codes'))
+        self.send_json('{"produits":%s,"inconnus":%s}' % (
+            self.catalog.products_json(row_ids, details=_flag(body.get('details'), 'details', False)),
+            to_json(unknown)
+        ))
+
+
+class AlternativesHandler(BaseHandler):
+    """GET /v1/products/<code>/alternatives?k=5 : alternatives bas carbone"""
+
+    def get(self, code: str):
+        engine = get_recommendation_engine(self.data)
+        k = self.get_int_argument('k', engine.k, 1, engine.k)
+        row_ids, _ = self.catalog.lookup([code])
+        if not row_ids:
+            raise tornado.web.HTTPError(404, reason=f"Produit inconnu: {code}")
+        # Une liste d'un élément : on renvoie l'élément
+        self.send_json(self.catalog.alternatives_json(row_ids, k)[1:-1])
+
+
+class AlternativesBatchHandler(BaseHandler):
+    """POST /v1/alternatives/batch {"codes": [...], "k": 3}"""
+
+    def post(self):
+        body = self.get_json_body()
+        engine = get_recommendation_engine(self.data)
+        k = _bounded(body.get('k'), 'k', engine.k, 1, engine.k)
+        row_ids, unknown = self.catalog.lookup(self.get_batch(body, 'codes'))
+        self.send_json('{"resultats":%s,"inconnus":%s}' % (
+            self.catalog.alternatives_json(row_ids, k), to_json(unknown)
+        ))
+
+
+class StatsHandler(BaseHandler):
+    """GET /v1/stats : statistiques globales et quantiles de l'impact carbone"""
+
+    def get(self):
+        cube = get_analysis_cube(self.data)
+        self.send_json(to_json({
+            **{key: _clean(value) for key, value in cube.global_stats.items()},
+            'quantiles': {str(q): _clean(value) for q, value in cube.quantiles.items()},
+        }))
+
+
+class GroupStatsHandler(BaseHandler):
+    """GET /v1/groups : statistiques par groupe d'aliments (voir analyze_by_group)"""
+
+    def get(self):
+        stats = get_analysis_cube(self.data).group_stats
+        self.send_json(to_json({'groupes': _records(stats, {
+            GROUP_COLUMN: 'groupe', 'Nombre': 'nombre', 'Moyenne': 'moyenne',
+            'Min': 'min', 'Max': 'max',
+        })}))
+
+
+class SubgroupStatsHandler(BaseHandler):
+    """GET /v1/subgroups?groupe=... : statistiques par sous-groupe (voir analyze_by_subgroup)"""
+
+    def get(self):
+        stats = get_analysis_cube(self.data).subgroup_stats
+        group = self.get_argument('groupe', None)
+        if group is not None:
+            stats = stats[stats['Groupe'] == group]
+        self.send_json(to_json({'sous_groupes': _records(stats, {
+            'Groupe': 'groupe', 'Sous-groupe': 'sous_groupe', 'Nombre': 'nombre',
+            'Moyenne': 'moyenne', 'Min': 'min', 'Max': 'max',
+        })}))
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    """GET /metrics : mesures au format Prometheus (voir utils.metrics, ECOMENU_METRICS=1)"""
+
+    def get(self):
+        self.set_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.set_header('Cache-Control', 'no-store')
+        self.finish(to_prometheus())
+
+    def head(self):
+        return self.get()
+
+
+def make_app(file_path: Optional[str] = None) -> tornado.web.Application:
+    """
+    Crée l'application tornado.
+
+    Args:
+        file_path: Chemin vers le fichier CSV. Si None, utilise le chemin par défaut.
+
+    Returns:
+        Application prête à être servie
+    """
+    options = {'file_path': file_path}
+    app = tornado.web.Application([
+        (r'/v1/info', InfoHandler, options),
+        (r'/v1/search', SearchHandler, options),
+        (r'/v1/search/batch', SearchBatchHandler, options),
+        (r'/v1/products/batch', ProductBatchHandler, options),
+        (r'/v1/products/([^/]+)', ProductHandler, options),
+        (r'/v1/products/([^/]+)/alternatives', AlternativesHandler, options),
+        (r'/v1/alternatives/batch', AlternativesBatchHandler, options),
+        (r'/v1/stats', StatsHandler, options),
+        (r'/v1/groups', GroupStatsHandler, options),
+        (r'/v1/subgroups', SubgroupStatsHandler, options),
+        (r'/metrics', MetricsHandler),
+    ])
+    app.response_cache = OrderedDict()
+    return app
+
+
+def warm_up(file_path: Optional[str] = None):
+    """Charge les données et construit les index avant la première requête"""
+    data = get_shared_data(file_path, extended=True)
+    get_product_catalog(data)
+    get_search_index(data)
+    get_recommendation_engine(data)
+    get_analysis_cube(data)
+
+
+def run(port: int = 8000, address: str = '127.0.0.1', file_path: Optional[str] = None):
+    """
+    Démarre le serveur (bloquant).
+
+    Args:
+        port: Port d'écoute
+        address: Adresse d'écoute
+        file_path: Chemin vers le fichier CSV. Si None, utilise le chemin par défaut.
+    """
+    warm_up(file_path)
+    server = tornado.httpserver.HTTPServer(make_app(file_path), xheaders=True)
+    server.listen(port, address)
+    print(f"API EcoMenu à l'écoute sur http://{address}:{port}/v1/")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API HTTP des données AGRIBALYSE")
+    parser.add_argument('--port', type=int, default=int(os.getenv('ECOMENU_API_PORT', 8000)))
+    parser.add_argument('--host', default=os.getenv('ECOMENU_API_HOST', '127.0.0.1'))
+    parser.add_argument('--data', default=None, help="Fichier CSV AGRIBALYSE")
+    args = parser.parse_args()
+    run(args.port, args.host, args.data)
@@ -1,10 +1,21 @@
 """
 Module d'analyse statistique des données AGRIBALYSE
 """
+import threading
+
+import numpy as np
 import pandas as pd
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
+
+from ecomenu_assistant.data.binning import compute_histogram
+from ecomenu_assistant.data.loader import get_shared_resource
+from ecomenu_assistant.utils.metrics import timed
 
+IMPACT_COLUMN = 'Changement climatique'
+NAME_COLUMN = 'Nom du Produit en Français'
 
+
+@timed('analysis.by_group', rows=True)
 def analyze_by_group(data: pd.DataFrame) -> pd.DataFrame:
     """
     Analyse les impacts CO2 par groupe d'aliments.
@@ -15,7 +26,7 @@ def analyze_by_group(data: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame avec statistiques par groupe
     """
-    result = data.groupby("Groupe d'aliment")["Changement climatique"].agg([
+    result = data.groupby("Groupe d'aliment", observed=True)["Changement climatique"].agg([
         'count', 'mean', 'min', 'max'
     ]).sort_values('mean', ascending=False)
     
@@ -23,6 +34,7 @@ def analyze_by_group(data: pd.DataFrame) -> pd.DataFrame:
     return result
 
 
+@timed('analysis.by_subgroup', rows=True)
 def analyze_by_subgroup(data: pd.DataFrame) -> pd.DataFrame:
     """
     Analyse les impacts CO2 par groupe et sous-groupe d'aliments.
@@ -36,7 +48,7 @@ def analyze_by_subgroup(data: pd.DataFrame) -> pd.DataFrame:
     result = data.groupby([
         "Groupe d'aliment", 
         "Sous-groupe d'aliment"
-    ])["Changement climatique"].agg([
+    ], observed=True)["Changement climatique"].agg([
         'count', 'mean', 'min', 'max'
     ]).sort_values('mean', ascending=False).reset_index()
     
@@ -44,6 +56,7 @@ def analyze_by_subgroup(data: pd.DataFrame) -> pd.DataFrame:
     return result
 
 
+@timed('analysis.extremes')
 def get_extreme_products(data: pd.DataFrame, n: int = 10) -> Dict[str, pd.DataFrame]:
     """
     Identifie les produits avec les impacts les plus élevés/faibles.
@@ -69,6 +82,7 @@ def get_extreme_products(data: pd.DataFrame, n: int = 10) -> Dict[str, pd.DataFr
     }
 
 
+@timed('analysis.global_stats')
 def get_global_stats(data: pd.DataFrame) -> Dict[str, float]:
     """
     Calcule les statistiques globales des impacts CO2.
@@ -92,12 +106,106 @@ def get_global_stats(data: pd.DataFrame) -> Dict[str, float]:
     }
 
 
+class AnalysisCube:
+    """
+    Agrégats précalculés des impacts CO2 pour la page d'analyse.
+
+    Statistiques globales et quantiles, statistiques par groupe et
+    sous-groupe, comptages de l'histogramme et listes des produits extrêmes
+    sont calculés en une fois à la construction ; les accesseurs ne font
+    ensuite que des lectures en mémoire, quel que soit le nombre de produits.
+    """
+
+    @timed('analysis.cube')
+    def __init__(self, data: pd.DataFrame, bins: int = 50, max_extremes: int = 50,
+                 quantiles: Tuple[float, ...] = (0.1, 0.25, 0.5, 0.75, 0.9)):
+        """
+        Calcule les agrégats.
+
+        Args:
+            data: DataFrame AGRIBALYSE
+            bins: Nombre de classes de l'histogramme
+            max_extremes: Nombre maximum de produits extrêmes conservés
+            quantiles: Quantiles précalculés
+        """
+        impacts = data[IMPACT_COLUMN]
+
+        self.global_stats = get_global_stats(data)
+        self.quantiles = {
+            q: float(value) for q, value in impacts.quantile(list(quantiles)).items()
+        }
+        self.group_stats = analyze_by_group(data)
+        self.subgroup_stats = analyze_by_subgroup(data)
+
+        values = impacts.to_numpy(dtype=np.float64)
+        self._values = values[np.isfinite(values)]
+        self._histograms = {}
+        self._histograms_lock = threading.Lock()
+        self.histogram = self.get_histogram(bins)
+
+        self.max_extremes = max_extremes
+        self._extremes = get_extreme_products(data, n=max_extremes)
+
+    def get_histogram(self, bins=50, strategy: str = 'uniform',
+                      log_scale: bool = False) -> Dict:
+        """
+        Histogramme des impacts, calculé une fois par paramétrage (voir
+        binning.compute_histogram).
+
+        Args:
+            bins: Nombre de classes ou règle NumPy ('auto', 'fd'...)
+            strategy: 'uniform' ou 'quantile'
+            log_scale: Classes en échelle logarithmique
+
+        Returns:
+            Dict avec 'counts', 'edges', 'moyenne', 'log_scale' et 'hors_echelle'
+        """
+        key = (bins, strategy, log_scale)
+        with self._histograms_lock:
+            histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = compute_histogram(self._values, bins, strategy, log_scale)
+            # Un calcul concurrent du même paramétrage garde le premier résultat
+            with self._histograms_lock:
+                histogram = self._histograms.setdefault(key, histogram)
+        return histogram
+
+    def get_extremes(self, n: int = 10) -> Dict[str, pd.DataFrame]:
+        """
+        Produits les plus et les moins émetteurs (même format que get_extreme_products).
+
+        Args:
+            n: Nombre de produits à retourner (au plus max_extremes)
+
+        Returns:
+            Dict avec 'polluants' et 'champions'
+        """
+        if n > self.max_extremes:
+            raise ValueError(f"n doit être inférieur ou égal à {self.max_extremes}")
+        return {key: frame.head(n) for key, frame in self._extremes.items()}
+
+
+def get_analysis_cube(data: Optional[pd.DataFrame] = None) -> AnalysisCube:
+    """
+    Retourne les agrégats de la page d'analyse, calculés une seule fois par
+    version des données partagées (voir get_shared_data).
+
+    Args:
+        data: DataFrame AGRIBALYSE. Si None, utilise les données partagées.
+
+    Returns:
+        Agrégats précalculés
+    """
+    return get_shared_resource('analysis_cube', AnalysisCube, data)
+
+
 # Test des fonctions si exécuté directement
 if __name__ == "__main__":
-    from loader import load_agribalyse_data
-    
+    import time
+    from ecomenu_assistant.data.loader import get_shared_data
+
     print("Chargement des données...")
-    data = load_agribalyse_data()
+    data = get_shared_data()
     
     print("\n=== Statistiques globales ===")
     print(get_global_stats(data))
@@ -108,4 +216,13 @@ if __name__ == "__main__":
     print("\n=== Produits extrêmes ===")
     extremes = get_extreme_products(data, n=5)
     print("Champions:", extremes['champions'])
-    print("Polluants:", extremes['polluants'])
\ No newline at end of file
+    print("Polluants:", extremes['polluants'])
+
+    start = time.perf_counter()
+    get_analysis_cube(data)
+    built = time.perf_counter()
+    cube = get_analysis_cube(data)
+    cube.get_extremes(10)
+    served = time.perf_counter()
+    print(f"\nAgrégats construits en {(built - start) * 1000:.1f} ms, "
+          f"servis en {(served - built) * 1000:.3f} ms")
@@ -0,0 +1,143 @@
+"""
+Préparation côté serveur des données de graphiques : histogrammes
+précalculés et sous-échantillonnage de nuages de points
+"""
+from typing import Dict, Union
+
+import numpy as np
+
+from ecomenu_assistant.utils.metrics import timed
+
+# Stratégies de découpage acceptées en plus d'un nombre de classes
+# ('auto', 'fd', 'sturges'... sont celles de numpy.histogram_bin_edges)
+NUMPY_STRATEGIES = ('auto', 'fd', 'doane', 'scott', 'stone', 'rice', 'sturges', 'sqrt')
+
+
+@timed('charts.binning')
+def compute_histogram(values, bins: Union[int, str] = 50,
+                      strategy: str = 'uniform',
+                      log_scale: bool = False) -> Dict:
+    """
+    Calcule un histogramme avec NumPy : seuls les comptages par classe sont
+    ensuite envoyés au navigateur, quel que soit le nombre de valeurs.
+
+    Args:
+        values: Valeurs à répartir (les NaN sont ignorés)
+        bins: Nombre de classes, ou nom d'une règle NumPy ('auto', 'fd'...)
+        strategy: 'uniform' (classes de même largeur) ou 'quantile'
+            (classes de même effectif, utile pour les distributions à
+            longue traîne)
+        log_scale: Classes calculées sur log10 des valeurs : de largeur
+            constante en échelle logarithmique avec 'uniform', de même
+            effectif avec 'quantile'. Les valeurs négatives ou nulles sont
+            comptées à part.
+
+    Returns:
+        Dict avec 'counts', 'edges', 'moyenne', 'log_scale' et 'hors_echelle'
+        (valeurs négatives ou nulles écartées en échelle logarithmique)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    mean = float(values.mean()) if len(values) else 0.0
+
+    excluded = 0
+    if log_scale:
+        positive = values > 0
+        excluded = int((~positive).sum())
+        values = values[positive]
+
+    if not len(values):
+        return {'counts': np.zeros(0, dtype=np.int64), 'edges': np.zeros(1),
+                'moyenne': mean, 'log_scale': log_scale, 'hors_echelle': excluded}
+
+    sample = np.log10(values) if log_scale else values
+    if strategy == 'quantile':
+        n_bins = bins if isinstance(bins, int) else 50
+        edges = np.unique(np.quantile(sample, np.linspace(0, 1, n_bins + 1)))
+        if len(edges) < 2:
+            edges = np.array([edges[0], edges[0] + 1])
+    elif strategy == 'uniform':
+        if isinstance(bins, str) and bins not in NUMPY_STRATEGIES:
+            raise ValueError(f"Règle inconnue: {bins} (valeurs possibles: {NUMPY_STRATEGIES})")
+        edges = np.histogram_bin_edges(sample, bins=bins)
+    else:
+        raise ValueError(f"Stratégie inconnue: {strategy} ('uniform' ou 'quantile')")
+
+    counts, edges = np.histogram(sample, bins=edges)
+    if log_scale:
+        edges = 10 ** edges
+
+    return {'counts': counts, 'edges': edges, 'moyenne': mean,
+            'log_scale': log_scale, 'hors_echelle': excluded}
+
+
+@timed('charts.downsample', rows=True)
+def downsample(x, y, max_points: int = 2000, method: str = 'lttb') -> np.ndarray:
+    """
+    Sélectionne au plus `max_points` points d'un nuage à afficher.
+
+    Args:
+        x: Abscisses
+        y: Ordonnées
+        max_points: Nombre maximum de points conservés
+        method: 'lttb' (Largest-Triangle-Three-Buckets : conserve la forme
+            de la courbe y(x), pics compris) ou 'stride' (un point sur n,
+            dans l'ordre des abscisses)
+
+    Returns:
+        Positions des points conservés, triées par abscisse croissante
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    order = valid[np.argsort(x[valid], kind='stable')]
+    n = len(order)
+    if method not in ('lttb', 'stride'):
+        raise ValueError(f"Méthode inconnue: {method} ('lttb' ou 'stride')")
+    if n <= max_points:
+        return order
+    if method == 'stride' or max_points < 3:
+        return order[np.linspace(0, n - 1, max_points).round().astype(np.int64)]
+
+    xs, ys = x[order], y[order]
+    # Premier et dernier points conservés, max_points - 2 seaux entre les deux
+    bounds = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        # Point moyen du seau suivant (ou dernier point)
+        next_end = bounds[bucket + 2] if bucket + 2 < len(bounds) else n
+        next_x = xs[end:next_end].mean()
+        next_y = ys[end:next_end].mean()
+        # Point du seau formant le plus grand triangle avec ses voisins
+        areas = np.abs(
+            (xs[previous] - next_x) * (ys[start:end] - ys[previous])
+            - (xs[previous] - xs[start:end]) * (next_y - ys[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return order[selected]
+
+
+# Test des fonctions si exécuté directement
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(mean=1.0, sigma=1.2, size=1_000_000)
+
+    for options in ({}, {'strategy': 'quantile'}, {'log_scale': True}, {'bins': 'fd'}):
+        start = time.perf_counter()
+        histogram = compute_histogram(values, **options)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{options}: {len(histogram['counts'])} classes en {elapsed:.1f} ms")
+
+    x = np.sort(rng.uniform(0, 100, 1_000_000))
+    y = np.sin(x) + rng.normal(0, 0.1, len(x))
+    for method in ('lttb', 'stride'):
+        start = time.perf_counter()
+        kept = downsample(x, y, max_points=2000, method=method)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{method}: {len(kept)} points conservés sur {len(x)} en {elapsed:.1f} ms")
@@ -0,0 +1,436 @@
+"""
+Export en flux des résultats de recherche et des analyses (CSV, Parquet, PDF)
+
+Les lignes sont lues par paquets (vues iloc de quelques milliers de lignes)
+et écrites au fur et à mesure dans un fichier temporaire : exporter tout le
+catalogue étendu ne crée jamais de seconde copie de la table en mémoire.
+Les exports tournent dans un pool de threads (voir start_export), ce qui
+laisse le script Streamlit libre pendant l'écriture.
+
+Utilisation :
+    job = start_export('csv', iter_frames(data, rows=row_ids))
+    job.wait()
+    with job.open() as f:
+        ...
+"""
+import importlib.util
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ecomenu_assistant.utils.metrics import increment, observe
+
+# Lignes par paquet lu et écrit
+EXPORT_CHUNK_ROWS = int(os.getenv('ECOMENU_EXPORT_CHUNK_ROWS', 5000))
+# Exports exécutés en même temps (les suivants attendent leur tour)
+EXPORT_WORKERS = int(os.getenv('ECOMENU_EXPORT_WORKERS', 2))
+
+# Type MIME et extension de chaque format
+FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+    'pdf': ('application/pdf', '.pdf'),
+}
+
+# Mise en page des tableaux du rapport PDF (A4 paysage)
+PDF_PAGE_SIZE = (11.69, 8.27)
+PDF_ROWS_PER_PAGE = 30
+PDF_MAX_TEXT = 60
+
+# Section d'un rapport PDF : titre et tableau, paquets de lignes ou
+# fonction de dessin recevant un matplotlib.axes.Axes
+Section = Tuple[str, Union[pd.DataFrame, Iterable[pd.DataFrame], Callable]]
+
+
+def get_available_formats() -> List[str]:
+    """Formats utilisables : Parquet seulement si pyarrow est installé"""
+    return [fmt for fmt in FORMATS
+            if fmt != 'parquet' or importlib.util.find_spec('pyarrow') is not None]
+
+
+def iter_frames(data: pd.DataFrame, rows=None, columns: Optional[List[str]] = None,
+                chunk_size: int = EXPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Découpe une table (ou une sélection de lignes) en paquets.
+
+    Args:
+        data: DataFrame source
+        rows: Positions (iloc) des lignes à exporter, dans l'ordre voulu.
+            Si None, toutes les lignes.
+        columns: Colonnes à exporter. Si None, toutes.
+        chunk_size: Nombre de lignes par paquet
+
+    Yields:
+        DataFrames d'au plus chunk_size lignes ; un paquet vide (colonnes
+        seules) si aucune ligne n'est sélectionnée
+    """
+    if columns is not None:
+        columns = [col for col in columns if col in data.columns]
+    total = len(data) if rows is None else len(rows)
+    if rows is not None:
+        rows = np.asarray(rows, dtype=np.int64)
+
+    for start in range(0, max(total, 1), chunk_size):
+        stop = min(start + chunk_size, total)
+        frame = data.iloc[start:stop] if rows is None else data.iloc[rows[start:stop]]
+        yield frame if columns is None else frame[columns]
+
+
+def iter_csv(frames: Iterable[pd.DataFrame], sep: str = ',',
+             encoding: str = 'utf-8') -> Iterator[bytes]:
+    """
+    Convertit des paquets de lignes en CSV.
+
+    Args:
+        frames: Paquets de lignes (voir iter_frames)
+        sep: Séparateur (';' pour un tableur configuré en français)
+        encoding: Encodage ('utf-8-sig' ajoute la marque lue par Excel)
+
+    Yields:
+        Blocs d'octets ; l'en-tête est dans le premier
+    """
+    header = True
+    for frame in frames:
+        text = frame.to_csv(sep=sep, index=False, header=header)
+        # La marque d'ordre des octets d'utf-8-sig n'est écrite qu'une fois
+        yield text.encode('utf-8' if encoding == 'utf-8-sig' and not header else encoding)
+        header = False
+
+
+def write_csv(frames: Iterable[pd.DataFrame], target: BinaryIO, **options) -> int:
+    """
+    Écrit des paquets de lignes en CSV.
+
+    Args:
+        frames: Paquets de lignes (voir iter_frames)
+        target: Fichier ouvert en écriture binaire
+        **options: sep et encoding (voir iter_csv)
+
+    Returns:
+        Nombre d'octets écrits
+    """
+    written = 0
+    for block in iter_csv(frames, **options):
+        target.write(block)
+        written += len(block)
+    return written
+
+
+def write_parquet(frames: Iterable[pd.DataFrame], target: BinaryIO,
+                  compression: str = 'zstd') -> int:
+    """
+    Écrit des paquets de lignes en Parquet, un groupe de lignes par paquet.
+
+    Args:
+        frames: Paquets de lignes (voir iter_frames)
+        target: Fichier ouvert en écriture binaire
+        compression: Compression des colonnes ('zstd', 'snappy', 'none'...)
+
+    Returns:
+        Nombre de lignes écrites
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:  # pyarrow est optionnel (voir data.loader)
+        raise ImportError("pyarrow est nécessaire pour l'export Parquet") from e
+
+    writer = None
+    rows = 0
+    try:
+        for frame in frames:
+            if writer is None:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                writer = pq.ParquetWriter(target, table.schema, compression=compression)
+            else:
+                # Même schéma pour tous les paquets (colonnes vides d'un paquet...)
+                table = pa.Table.from_pandas(frame, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+            rows += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _format_cell(value) -> str:
+    if isinstance(value, (float, np.floating)):
+        return '' if np.isnan(value) else f"{value:.2f}"
+    if value is None or value is pd.NA:
+        return ''
+    text = str(value)
+    return text if len(text) <= PDF_MAX_TEXT else text[:PDF_MAX_TEXT - 1] + '…'
+
+
+def _table_pages(content) -> Iterator[pd.DataFrame]:
+    """Pages d'un tableau : PDF_ROWS_PER_PAGE lignes, paquets lus au fil de l'eau"""
+    frames = [content] if isinstance(content, pd.DataFrame) else content
+    pending = None
+    pages = 0
+    for frame in frames:
+        pending = frame if pending is None else pd.concat([pending, frame])
+        while len(pending) >= PDF_ROWS_PER_PAGE:
+            yield pending.iloc[:PDF_ROWS_PER_PAGE]
+            pending = pending.iloc[PDF_ROWS_PER_PAGE:]
+            pages += 1
+    # Dernière page incomplète, ou page vide pour un tableau sans ligne
+    if pending is not None and (len(pending) or not pages):
+        yield pending
+
+
+def write_pdf(sections: Iterable[Section], target: BinaryIO, title: str = "EcoMenu Assistant") -> int:
+    """
+    Écrit un rapport PDF : graphiques et tableaux paginés, page par page.
+
+    Chaque page est dessinée puis libérée avant la suivante ; seuls
+    PDF_ROWS_PER_PAGE lignes sont en mémoire pour les tableaux.
+
+    Args:
+        sections: Couples (titre, contenu). Le contenu est un DataFrame,
+            des paquets de lignes (voir iter_frames) ou une fonction
+            dessinant un graphique sur l'axe reçu.
+        target: Fichier ouvert en écriture binaire
+        title: Titre du document
+
+    Returns:
+        Nombre de pages écrites
+    """
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+
+    pages = 0
+    with PdfPages(target, metadata={'Title': title}) as pdf:
+        for section_title, content in sections:
+            if callable(content):
+                figure = Figure(figsize=PDF_PAGE_SIZE)
+                ax = figure.add_subplot()
+                content(ax)
+                figure.suptitle(section_title, fontsize=14)
+                figure.tight_layout()
+                pdf.savefig(figure)
+                pages += 1
+                continue
+
+            for number, page in enumerate(_table_pages(content), start=1):
+                figure = Figure(figsize=PDF_PAGE_SIZE)
+                ax = figure.add_subplot()
+                ax.axis('off')
+                ax.set_title(section_title if number == 1 else f"{section_title} (suite {number})",
+                             fontsize=14, loc='left')
+                if len(page):
+                    cells = [[_format_cell(value) for value in row]
+                             for row in page.itertuples(index=False)]
+                    table = ax.table(cellText=cells, colLabels=[str(col) for col in page.columns],
+                                     loc='upper center', cellLoc='left')
+                    table.auto_set_font_size(False)
+                    table.set_fontsize(7)
+                    table.auto_set_column_width(list(range(page.columns.size)))
+                else:
+                    ax.text(0.5, 0.5, "Aucune ligne", ha='center', va='center')
+                pdf.savefig(figure)
+                pages += 1
+    return pages
+
+
+def analysis_report_sections(cube) -> Iterator[Section]:
+    """
+    Sections du rapport d'analyse : graphiques et tableaux par groupe et
+    sous-groupe, lus dans les agrégats précalculés.
+
+    Args:
+        cube: Agrégats de la page d'analyse (voir analyzer.get_analysis_cube)
+
+    Yields:
+        Sections pour write_pdf
+    """
+    group_stats = cube.group_stats
+    histogram = cube.histogram
+
+    def draw_groups(ax):
+        means = group_stats['Moyenne'].sort_values()
+        ax.barh([str(name) for name in means.index], means.to_numpy(), color='#2e7d32')
+        ax.set_xlabel("kg CO2 eq / kg de produit")
+        ax.tick_params(axis='y', labelsize=8)
+
+    def draw_distribution(ax):
+        edges = np.asarray(histogram['edges'])
+        ax.bar(edges[:-1], histogram['counts'], width=np.diff(edges), align='edge',
+               color='#66bb6a', edgecolor='white')
+        if histogram.get('log_scale'):
+            ax.set_xscale('log')
+        ax.axvline(histogram['moyenne'], color='#c62828', linestyle='--',
+                   label=f"Moyenne : {histogram['moyenne']:.2f}")
+        ax.set_xlabel("kg CO2 eq / kg de produit")
+        ax.set_ylabel("Nombre de produits")
+        ax.legend()
+
+    yield "Impact carbone moyen par groupe d'aliments", draw_groups
+    yield "Distribution des impacts", draw_distribution
+    yield "Statistiques par groupe", group_stats.reset_index()
+    yield "Statistiques par sous-groupe", iter_frames(cube.subgroup_stats)
+
+
+class ExportJob:
+    """
+    Export exécuté en arrière-plan vers un fichier temporaire.
+
+    `rows` (lignes écrites) est mis à jour pendant l'écriture ; le fichier
+    est supprimé par discard() ou quand l'export n'est plus référencé (fin
+    de la session Streamlit qui le conservait).
+    """
+
+    def __init__(self, fmt: str, file_name: str = "export"):
+        """
+        Args:
+            fmt: Format ('csv', 'parquet' ou 'pdf')
+            file_name: Nom du fichier proposé au téléchargement, sans extension
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Format inconnu : {fmt} (formats : {', '.join(FORMATS)})")
+        self.format = fmt
+        self.mime, suffix = FORMATS[fmt]
+        self.file_name = file_name + suffix
+        descriptor, self.path = tempfile.mkstemp(prefix='ecomenu_export_', suffix=suffix)
+        os.close(descriptor)
+        self.rows = 0
+        self.size = 0
+        self.error: Optional[BaseException] = None
+        self.future: Optional[Future] = None
+        self.cancelled = False
+
+    def count(self, frames: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Fait suivre les paquets en comptant les lignes écrites ; s'arrête si l'export est abandonné"""
+        for frame in frames:
+            if self.cancelled:
+                return
+            yield frame
+            self.rows += len(frame)
+
+    def follow(self, sections: Iterable[Section]) -> Iterator[Section]:
+        """Fait suivre les sections d'un rapport ; s'arrête si l'export est abandonné"""
+        for section in sections:
+            if self.cancelled:
+                return
+            title, content = section
+            yield title, content if callable(content) else self.count(
+                [content] if isinstance(content, pd.DataFrame) else content
+            )
+
+    @property
+    def done(self) -> bool:
+        """Export terminé (avec succès ou en erreur)"""
+        return self.future is not None and self.future.done()
+
+    @property
+    def ok(self) -> bool:
+        """Export terminé avec succès"""
+        return self.done and self.error is None
+
+    def wait(self, timeout: Optional[float] = None) -> 'ExportJob':
+        """Attend la fin de l'export et relève son erreur éventuelle"""
+        self.future.result(timeout)
+        return self
+
+    def open(self) -> BinaryIO:
+        """Ouvre le fichier produit en lecture binaire"""
+        return open(self.path, 'rb')
+
+    def discard(self):
+        """Supprime le fichier produit (l'export en cours s'arrête au paquet suivant)"""
+        self.cancelled = True
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __del__(self):
+        if hasattr(self, 'path'):  # constructeur interrompu : pas de fichier
+            self.discard()
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(EXPORT_WORKERS, thread_name_prefix='ecomenu_export')
+    return _executor
+
+
+def _run(job: ExportJob, content, options: Dict):
+    start = time.perf_counter()
+    try:
+        with open(job.path, 'wb') as target:
+            if job.format == 'csv':
+                write_csv(job.count(content), target, **options)
+            elif job.format == 'parquet':
+                write_parquet(job.count(content), target, **options)
+            else:
+                write_pdf(job.follow(content), target, **options)
+        if job.cancelled:
+            job.discard()
+            return
+        job.size = os.path.getsize(job.path)
+    except BaseException as e:
+        if job.cancelled:  # fichier supprimé pendant l'écriture
+            job.discard()
+            return
+        job.error = e
+        increment('export.erreurs', format=job.format)
+        raise
+    observe('export.write', time.perf_counter() - start, job.rows, format=job.format)
+
+
+def start_export(fmt: str, content, file_name: str = "export", **options) -> ExportJob:
+    """
+    Lance un export dans le pool de threads et rend la main aussitôt.
+
+    Le contenu est lu dans le thread de l'export : passer un générateur
+    (iter_frames, analysis_report_sections...) pour que la sélection des
+    lignes elle-même n'occupe pas l'appelant.
+
+    Args:
+        fmt: Format ('csv', 'parquet' ou 'pdf')
+        content: Paquets de lignes (csv, parquet) ou sections de rapport (pdf)
+        file_name: Nom du fichier proposé au téléchargement, sans extension
+        **options: Options du format (voir write_csv, write_parquet, write_pdf)
+
+    Returns:
+        Export en cours
+    """
+    job = ExportJob(fmt, file_name)
+    job.future = _get_executor().submit(_run, job, content, options)
+    return job
+
+
+# Test des fonctions si exécuté directement
+if __name__ == "__main__":
+    import time
+    from ecomenu_assistant.data.analyzer import get_analysis_cube
+    from ecomenu_assistant.data.loader import get_peak_rss_mb, get_shared_data
+
+    data = get_shared_data(extended=True)
+    print(f"Catalogue étendu : {len(data)} lignes, {data.shape[1]} colonnes")
+
+    jobs = [
+        start_export('csv', iter_frames(data), 'catalogue', sep=';', encoding='utf-8-sig'),
+        start_export('parquet', iter_frames(data), 'catalogue'),
+        start_export('pdf', analysis_report_sections(get_analysis_cube(get_shared_data())), 'analyse'),
+    ]
+    start = time.perf_counter()
+    for job in jobs:
+        job.wait()
+        print(f"{job.file_name}: {job.rows} lignes, {job.size / 1024:.0f} Ko "
+              f"({time.perf_counter() - start:.2f} s)")
+        job.discard()
+    print(f"Mémoire maximale : {get_peak_rss_mb()} Mo")
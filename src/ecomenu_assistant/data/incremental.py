@@ -0,0 +1,572 @@
+"""
+Statistiques incrémentales des impacts CO2 : agrégats fusionnables mis à
+jour par insertions, modifications et suppressions de produits
+"""
+import heapq
+import math
+from collections import Counter
+from typing import Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+GROUP_COLUMN = "Groupe d'aliment"
+SUBGROUP_COLUMN = "Sous-groupe d'aliment"
+IMPACT_COLUMN = 'Changement climatique'
+
+
+class QuantileSketch:
+    """
+    Résumé de distribution à erreur relative bornée (principe de DDSketch).
+
+    Chaque valeur est comptée dans un intervalle logarithmique : le quantile
+    estimé est à moins de `relative_accuracy` (1 % par défaut) de la valeur
+    exacte. Contrairement à t-digest, le résumé est un simple comptage par
+    intervalle : il accepte les suppressions (décrément) et deux résumés se
+    fusionnent exactement en additionnant leurs comptages. Les valeurs
+    négatives et nulles ont leurs propres compteurs.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-9):
+        """
+        Args:
+            relative_accuracy: Erreur relative maximale des quantiles
+            min_value: Valeurs absolues inférieures comptées comme nulles
+        """
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = Counter()
+        self.negative = Counter()
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, value: float) -> int:
+        """Indice de l'intervalle logarithmique contenant |value|"""
+        # Même calcul que add_array pour qu'une valeur retombe dans son intervalle
+        return int(np.ceil(np.log(np.abs(value)) / self._log_gamma))
+
+    def _value(self, key: int) -> float:
+        """Valeur représentative d'un intervalle"""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, weight: int = 1):
+        """
+        Ajoute (ou retire si weight < 0) une valeur.
+
+        Args:
+            value: Valeur à compter
+            weight: Nombre d'occurrences à ajouter
+        """
+        if abs(value) < self.min_value:
+            self.zero_count += weight
+        else:
+            store = self.positive if value > 0 else self.negative
+            key = self._key(value)
+            store[key] += weight
+            if store[key] == 0:
+                del store[key]
+        self.count += weight
+
+    def add_array(self, values: np.ndarray):
+        """
+        Ajoute un tableau de valeurs (version vectorisée de add).
+
+        Args:
+            values: Valeurs à compter, sans NaN
+        """
+        zero = np.abs(values) < self.min_value
+        self.zero_count += int(zero.sum())
+        for store, part in ((self.positive, values[~zero & (values > 0)]),
+                            (self.negative, values[~zero & (values < 0)])):
+            if len(part):
+                keys = np.ceil(np.log(np.abs(part)) / self._log_gamma).astype(np.int64)
+                keys, counts = np.unique(keys, return_counts=True)
+                store.update(dict(zip(keys.tolist(), counts.tolist())))
+        self.count += len(values)
+
+    def remove(self, value: float):
+        """
+        Retire une valeur précédemment ajoutée.
+
+        Args:
+            value: Valeur à retirer
+        """
+        self.add(value, -1)
+
+    def merge(self, other: 'QuantileSketch'):
+        """
+        Ajoute les comptages d'un autre résumé (même précision).
+
+        Args:
+            other: Résumé à fusionner
+        """
+        if other.gamma != self.gamma:
+            raise ValueError("Les résumés doivent avoir la même précision")
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """
+        Estime un quantile.
+
+        Args:
+            q: Ordre du quantile, entre 0 et 1
+
+        Returns:
+            Valeur estimée, ou NaN si le résumé est vide
+        """
+        if self.count <= 0:
+            return float('nan')
+
+        rank = q * (self.count - 1)
+        seen = 0
+        # Des valeurs les plus négatives aux plus positives
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive))
+
+
+class RunningStats:
+    """
+    Agrégats fusionnables d'une série de valeurs : effectif, somme, somme
+    des carrés, minimum, maximum et résumé des quantiles.
+
+    Le minimum et le maximum restent exacts après suppression grâce à deux
+    tas à suppression différée. Sans suppressions (deletable=False), ils
+    sont de simples valeurs et la mémoire utilisée ne dépend plus du
+    nombre de valeurs.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, deletable: bool = True):
+        """
+        Args:
+            relative_accuracy: Erreur relative maximale des quantiles
+            deletable: Autoriser le retrait de valeurs
+        """
+        self.deletable = deletable
+        self.count = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.sketch = QuantileSketch(relative_accuracy)
+        self._min = math.inf
+        self._max = -math.inf
+        self._min_heap = []
+        self._max_heap = []
+        # Valeurs retirées mais encore présentes dans chacun des tas
+        self._removed_min = Counter()
+        self._removed_max = Counter()
+
+    def add(self, value: float):
+        """
+        Ajoute une valeur.
+
+        Args:
+            value: Valeur à ajouter
+        """
+        self.count += 1
+        self.total += value
+        self.total_squares += value * value
+        self.sketch.add(value)
+        if not self.deletable:
+            self._min = min(self._min, value)
+            self._max = max(self._max, value)
+            return
+        # Une copie retirée de la même valeur encore dans un tas redevient valide
+        for heap, removed, item in ((self._min_heap, self._removed_min, value),
+                                    (self._max_heap, self._removed_max, -value)):
+            if removed[value]:
+                removed[value] -= 1
+            else:
+                heapq.heappush(heap, item)
+
+    def add_array(self, values: np.ndarray):
+        """
+        Ajoute un tableau de valeurs (version vectorisée de add).
+
+        Args:
+            values: Valeurs à ajouter, sans NaN
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        if self.deletable:
+            for value in values.tolist():
+                self.add(value)
+            return
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.total_squares += float(np.dot(values, values))
+        self.sketch.add_array(values)
+        self._min = min(self._min, float(values.min()))
+        self._max = max(self._max, float(values.max()))
+
+    def remove(self, value: float):
+        """
+        Retire une valeur précédemment ajoutée.
+
+        Args:
+            value: Valeur à retirer
+        """
+        if not self.deletable:
+            raise ValueError("Agrégat créé sans suppression possible (deletable=False)")
+        self.count -= 1
+        self.total -= value
+        self.total_squares -= value * value
+        self.sketch.remove(value)
+        self._removed_min[value] += 1
+        self._removed_max[value] += 1
+        if self.count == 0:
+            self.total = self.total_squares = 0.0
+            self._min_heap, self._max_heap = [], []
+            self._removed_min.clear()
+            self._removed_max.clear()
+
+    def merge(self, other: 'RunningStats'):
+        """
+        Ajoute les valeurs d'un autre agrégat.
+
+        Args:
+            other: Agrégat à fusionner
+        """
+        self.count += other.count
+        self.total += other.total
+        self.total_squares += other.total_squares
+        self.sketch.merge(other.sketch)
+        if not self.deletable:
+            self._min = min(self._min, other.min)
+            self._max = max(self._max, other.max)
+            return
+        if not other.deletable:
+            raise ValueError("Impossible de fusionner un agrégat sans suppression possible")
+        self._removed_min.update(other._removed_min)
+        self._removed_max.update(other._removed_max)
+        self._min_heap.extend(other._min_heap)
+        self._max_heap.extend(other._max_heap)
+        heapq.heapify(self._min_heap)
+        heapq.heapify(self._max_heap)
+
+    @staticmethod
+    def _top(heap: list, removed: Counter, sign: int) -> float:
+        """Sommet d'un tas après purge des valeurs retirées"""
+        while heap and removed[sign * heap[0]]:
+            removed[sign * heap[0]] -= 1
+            heapq.heappop(heap)
+        return sign * heap[0] if heap else float('nan')
+
+    @property
+    def min(self) -> float:
+        if not self.deletable:
+            return self._min if self.count else float('nan')
+        return self._top(self._min_heap, self._removed_min, 1)
+
+    @property
+    def max(self) -> float:
+        if not self.deletable:
+            return self._max if self.count else float('nan')
+        return self._top(self._max_heap, self._removed_max, -1)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float('nan')
+
+    @property
+    def std(self) -> float:
+        """Écart type corrigé (ddof=1), comme pandas"""
+        if self.count < 2:
+            return float('nan')
+        variance = (self.total_squares - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class IncrementalAnalyzer:
+    """
+    Statistiques des impacts CO2 tenues à jour produit par produit.
+
+    Chaque produit est identifié par une clé (index du DataFrame par
+    défaut). Les insertions, modifications et suppressions mettent à jour
+    les agrégats global, par groupe et par sous-groupe sans relire les
+    données ; les résultats ont le même format que les fonctions de
+    analyzer.py. La médiane et les quartiles proviennent du résumé de
+    quantiles (erreur relative inférieure à 1 %).
+
+    Avec keep_rows=False, les produits ne sont pas conservés : seuls les
+    ajouts sont possibles, mais la mémoire ne dépend plus que du nombre de
+    groupes (traitement en flux de gros fichiers, voir from_chunks).
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, keep_rows: bool = True):
+        """
+        Args:
+            relative_accuracy: Erreur relative maximale des quantiles
+            keep_rows: Conserver les produits pour permettre modifications
+                et suppressions
+        """
+        self.relative_accuracy = relative_accuracy
+        self.keep_rows = keep_rows
+        self.rows: Dict[Hashable, Tuple[str, str, float]] = {}
+        self.global_stats = RunningStats(relative_accuracy, deletable=keep_rows)
+        self.groups: Dict[str, RunningStats] = {}
+        self.subgroups: Dict[Tuple[str, str], RunningStats] = {}
+
+    @classmethod
+    def from_dataframe(cls, data: pd.DataFrame, key_column: Optional[str] = None,
+                       relative_accuracy: float = 0.01) -> 'IncrementalAnalyzer':
+        """
+        Construit l'analyseur à partir d'un DataFrame AGRIBALYSE.
+
+        Args:
+            data: DataFrame AGRIBALYSE
+            key_column: Colonne identifiant les produits (index du DataFrame si None)
+            relative_accuracy: Erreur relative maximale des quantiles
+
+        Returns:
+            Analyseur initialisé
+        """
+        analyzer = cls(relative_accuracy)
+        analyzer.upsert_dataframe(data, key_column)
+        return analyzer
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterator[pd.DataFrame], keep_rows: bool = False,
+                    key_column: Optional[str] = None,
+                    relative_accuracy: float = 0.01) -> 'IncrementalAnalyzer':
+        """
+        Construit l'analyseur à partir d'une suite de DataFrames, consommés
+        un par un (voir loader.iter_agribalyse_chunks).
+
+        Args:
+            chunks: Morceaux de données AGRIBALYSE
+            keep_rows: Conserver les produits (modifications et suppressions
+                possibles, mais mémoire proportionnelle au nombre de produits)
+            key_column: Colonne identifiant les produits (index si None)
+            relative_accuracy: Erreur relative maximale des quantiles
+
+        Returns:
+            Analyseur initialisé
+        """
+        analyzer = cls(relative_accuracy, keep_rows=keep_rows)
+        for chunk in chunks:
+            if keep_rows:
+                analyzer.upsert_dataframe(chunk, key_column)
+            else:
+                analyzer.add_dataframe(chunk)
+        return analyzer
+
+    def _stats(self, table: dict, key) -> RunningStats:
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = RunningStats(self.relative_accuracy, deletable=self.keep_rows)
+        return stats
+
+    def _add(self, group: str, subgroup: str, impact: float):
+        self.global_stats.add(impact)
+        self._stats(self.groups, group).add(impact)
+        self._stats(self.subgroups, (group, subgroup)).add(impact)
+
+    def _remove(self, group: str, subgroup: str, impact: float):
+        self.global_stats.remove(impact)
+        for table, key in ((self.groups, group), (self.subgroups, (group, subgroup))):
+            table[key].remove(impact)
+            if table[key].count == 0:
+                del table[key]
+
+    def upsert(self, key: Hashable, group: str, subgroup: str, impact: float):
+        """
+        Ajoute un produit, ou le remplace s'il existe déjà.
+
+        Les produits sans impact ou sans groupe sont ignorés (comme dans les
+        agrégations pandas).
+
+        Args:
+            key: Identifiant du produit
+            group: Groupe d'aliment
+            subgroup: Sous-groupe d'aliment
+            impact: Changement climatique (kg CO2 eq/kg)
+        """
+        if self.keep_rows:
+            self.delete(key)
+        if pd.isna(impact) or pd.isna(group) or pd.isna(subgroup):
+            return
+        impact = float(impact)
+        if self.keep_rows:
+            self.rows[key] = (group, subgroup, impact)
+        self._add(group, subgroup, impact)
+
+    def delete(self, key: Hashable) -> bool:
+        """
+        Supprime un produit.
+
+        Args:
+            key: Identifiant du produit
+
+        Returns:
+            True si le produit existait
+        """
+        if not self.keep_rows:
+            raise ValueError("Analyseur créé sans conserver les produits (keep_rows=False)")
+        row = self.rows.pop(key, None)
+        if row is None:
+            return False
+        self._remove(*row)
+        return True
+
+    def upsert_dataframe(self, data: pd.DataFrame, key_column: Optional[str] = None):
+        """
+        Ajoute ou remplace tous les produits d'un DataFrame.
+
+        Args:
+            data: DataFrame avec les colonnes groupe, sous-groupe et impact
+            key_column: Colonne identifiant les produits (index du DataFrame si None)
+        """
+        keys = data.index if key_column is None else data[key_column]
+        for key, group, subgroup, impact in zip(
+            keys, data[GROUP_COLUMN], data[SUBGROUP_COLUMN], data[IMPACT_COLUMN]
+        ):
+            self.upsert(key, group, subgroup, impact)
+
+    def add_dataframe(self, data: pd.DataFrame):
+        """
+        Ajoute tous les produits d'un DataFrame en une passe vectorisée par
+        groupe (analyseur sans conservation des produits uniquement).
+
+        Args:
+            data: DataFrame avec les colonnes groupe, sous-groupe et impact
+        """
+        if self.keep_rows:
+            raise ValueError("add_dataframe est réservé à keep_rows=False, utiliser upsert_dataframe")
+
+        frame = data[[GROUP_COLUMN, SUBGROUP_COLUMN, IMPACT_COLUMN]].dropna()
+        values = frame[IMPACT_COLUMN].to_numpy(dtype=np.float64)
+        self.global_stats.add_array(values)
+        groups = frame.groupby([GROUP_COLUMN, SUBGROUP_COLUMN], sort=False, observed=True)
+        for (group, subgroup), positions in groups.indices.items():
+            self._stats(self.groups, group).add_array(values[positions])
+            self._stats(self.subgroups, (group, subgroup)).add_array(values[positions])
+
+    def delete_many(self, keys: Iterable[Hashable]) -> int:
+        """
+        Supprime plusieurs produits.
+
+        Args:
+            keys: Identifiants des produits
+
+        Returns:
+            Nombre de produits supprimés
+        """
+        return sum(self.delete(key) for key in keys)
+
+    def merge(self, other: 'IncrementalAnalyzer'):
+        """
+        Fusionne un autre analyseur portant sur des produits distincts
+        (traitement par morceaux, par exemple).
+
+        Args:
+            other: Analyseur à fusionner
+        """
+        overlap = self.rows.keys() & other.rows.keys()
+        if overlap:
+            raise ValueError(f"{len(overlap)} produit(s) présents dans les deux analyseurs")
+        self.rows.update(other.rows)
+        self.global_stats.merge(other.global_stats)
+        for table, other_table in ((self.groups, other.groups), (self.subgroups, other.subgroups)):
+            for key, stats in other_table.items():
+                self._stats(table, key).merge(stats)
+
+    @staticmethod
+    def _table(table: dict) -> pd.DataFrame:
+        """Statistiques par clé : Nombre, Moyenne, Min, Max"""
+        return pd.DataFrame(
+            [(s.count, s.mean, s.min, s.max) for s in table.values()],
+            columns=['Nombre', 'Moyenne', 'Min', 'Max'],
+        )
+
+    def analyze_by_group(self) -> pd.DataFrame:
+        """
+        Statistiques par groupe (même format que analyzer.analyze_by_group).
+
+        Returns:
+            DataFrame avec statistiques par groupe
+        """
+        result = self._table(self.groups)
+        result.index = pd.Index(list(self.groups), name=GROUP_COLUMN)
+        return result.sort_values('Moyenne', ascending=False)
+
+    def analyze_by_subgroup(self) -> pd.DataFrame:
+        """
+        Statistiques par groupe et sous-groupe (même format que
+        analyzer.analyze_by_subgroup).
+
+        Returns:
+            DataFrame avec statistiques par groupe et sous-groupe
+        """
+        result = self._table(self.subgroups)
+        keys = list(self.subgroups)
+        result.insert(0, 'Groupe', [group for group, _ in keys])
+        result.insert(1, 'Sous-groupe', [subgroup for _, subgroup in keys])
+        return result.sort_values('Moyenne', ascending=False).reset_index(drop=True)
+
+    def get_global_stats(self) -> Dict[str, float]:
+        """
+        Statistiques globales (même format que analyzer.get_global_stats).
+
+        Returns:
+            Dict avec les statistiques clés
+        """
+        stats = self.global_stats
+        sketch = stats.sketch
+        return {
+            'moyenne': round(stats.mean, 2),
+            'mediane': round(sketch.quantile(0.5), 2),
+            'ecart_type': round(stats.std, 2),
+            'min': round(stats.min, 2),
+            'max': round(stats.max, 2),
+            'q25': round(sketch.quantile(0.25), 2),
+            'q75': round(sketch.quantile(0.75), 2)
+        }
+
+
+# Test des fonctions si exécuté directement
+if __name__ == "__main__":
+    import time
+    from ecomenu_assistant.data.analyzer import analyze_by_group, get_global_stats
+    from ecomenu_assistant.data.loader import get_shared_data
+
+    data = get_shared_data()
+
+    start = time.perf_counter()
+    analyzer = IncrementalAnalyzer.from_dataframe(data)
+    print(f"Construction : {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print("Exact :      ", get_global_stats(data))
+    print("Incrémental :", analyzer.get_global_stats())
+
+    # Mise à jour : 100 produits modifiés, 100 supprimés, 1 ajouté
+    start = time.perf_counter()
+    for key in data.index[:100]:
+        group, subgroup, impact = analyzer.rows[key]
+        analyzer.upsert(key, group, subgroup, impact * 1.1)
+    analyzer.delete_many(data.index[100:200])
+    group, subgroup = data[GROUP_COLUMN].iloc[0], data[SUBGROUP_COLUMN].iloc[0]
+    analyzer.upsert('perso-1', group, subgroup, 12.0)
+    print(f"201 mises à jour : {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    updated = data.drop(data.index[100:200]).copy()
+    updated.loc[data.index[:100], IMPACT_COLUMN] *= 1.1
+    exact = analyze_by_group(updated)
+    incremental = analyzer.analyze_by_group().loc[exact.index]
+    extra = incremental.index == group
+    print("Écart max par groupe (hors groupe modifié) :",
+          float(np.abs(exact[~extra].to_numpy() - incremental[~extra].to_numpy()).max()))
@@ -1,28 +1,270 @@
 """
 Chargeur de données AGRIBALYSE
 """
+import hashlib
+import os
+import sys
+import threading
+import numpy as np
 import pandas as pd
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
 
-def load_agribalyse_data(file_path: Optional[str] = None) -> pd.DataFrame:
+from ecomenu_assistant.utils.metrics import register_collector, timed, timer
+
+try:
+    import resource
+except ImportError:  # module indisponible sous Windows
+    resource = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow est optionnel : repli sur le CSV
+    pa = None
+    feather = None
+
+# Colonnes conservées par défaut
+COLONNES_IMPORTANTES = [
+    'Nom du Produit en Français',
+    'Groupe d\'aliment',
+    'Sous-groupe d\'aliment',
+    'Changement climatique',
+    'DQR',
+    'code saison',
+    'code avion'
+]
+
+# Indicateurs environnementaux EF 3.1 (mode étendu)
+COLONNES_INDICATEURS = [
+    'Changement climatique',
+    'Appauvrissement de la couche d\'ozone',
+    'Rayonnements ionisants',
+    'Formation photochimique d\'ozone',
+    'Particules fines',
+    'Effets toxicologiques sur la santé humaine\u00a0: substances non-cancérogènes',
+    'Effets toxicologiques sur la santé humaine\u00a0: substances cancérogènes',
+    'Acidification terrestre et eaux douces',
+    'Eutrophisation eaux douces',
+    'Eutrophisation marine',
+    'Eutrophisation terrestre',
+    'Écotoxicité pour écosystèmes aquatiques d\'eau douce',
+    'Utilisation du sol',
+    'Épuisement des ressources eau',
+    'Épuisement des ressources énergétiques',
+    'Épuisement des ressources minéraux',
+]
+
+# Colonnes ajoutées en mode étendu
+COLONNES_ETENDUES = ['Code AGB', 'Score unique EF'] + [
+    col for col in COLONNES_INDICATEURS if col not in COLONNES_IMPORTANTES
+]
+
+
+def get_columns(extended: bool = False) -> list:
+    """
+    Retourne la liste des colonnes conservées par le chargeur.
+
+    Args:
+        extended: Inclure le code AGB, le score unique EF et les 16 indicateurs
+
+    Returns:
+        Liste ordonnée des noms de colonnes
+    """
+    if extended:
+        return COLONNES_IMPORTANTES + COLONNES_ETENDUES
+    return list(COLONNES_IMPORTANTES)
+
+
+def get_default_data_path() -> Path:
+    """
+    Retourne le chemin par défaut du fichier AGRIBALYSE.
+
+    Returns:
+        Chemin vers data/raw/Agribalyse_Synthese.csv
+    """
+    project_root = Path(__file__).parent.parent.parent.parent
+    return project_root / "data" / "raw" / "Agribalyse_Synthese.csv"
+
+
+def get_snapshot_path(file_path: Optional[str] = None) -> Path:
+    """
+    Retourne le chemin du snapshot binaire associé à un fichier CSV.
+
+    Le snapshot est rangé dans data/processed/, à côté de data/raw/.
+
+    Args:
+        file_path: Chemin vers le fichier CSV. Si None, utilise le chemin par défaut.
+
+    Returns:
+        Chemin vers le fichier Feather du snapshot
+    """
+    csv_path = Path(file_path) if file_path is not None else get_default_data_path()
+    return csv_path.parent.parent / "processed" / f"{csv_path.stem}.feather"
+
+
+def build_agribalyse_snapshot(file_path: Optional[str] = None,
+                              snapshot_path: Optional[str] = None) -> Path:
+    """
+    Écrit la table nettoyée et typée dans un snapshot Feather non compressé.
+
+    Le format Arrow non compressé peut être mappé en mémoire au chargement,
+    ce qui évite le parsing du CSV au démarrage d'un nouveau worker.
+
+    Args:
+        file_path: Chemin vers le fichier CSV. Si None, utilise le chemin par défaut.
+        snapshot_path: Chemin de sortie. Si None, utilise get_snapshot_path().
+
+    Returns:
+        Chemin du snapshot écrit
+    """
+    if feather is None:
+        raise ImportError("pyarrow est nécessaire pour écrire un snapshot")
+
+    if snapshot_path is None:
+        snapshot_path = get_snapshot_path(file_path)
+    snapshot_path = Path(snapshot_path)
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Le snapshot contient toutes les colonnes du mode étendu ; le mode
+    # par défaut n'en lit qu'une partie
+    df = load_agribalyse_data(file_path, use_snapshot=False, extended=True)
+    table = pa.Table.from_pandas(df, preserve_index=True)
+
+    # Écriture atomique : un worker ne doit jamais lire un fichier partiel
+    tmp_path = snapshot_path.with_suffix('.tmp')
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, snapshot_path)
+
+    print(f"Snapshot écrit: {snapshot_path} ({len(df)} lignes)")
+    return snapshot_path
+
+
+def _read_snapshot(file_path: Path, columns: list) -> Optional[pd.DataFrame]:
+    """
+    Lit le snapshot s'il existe et qu'il est plus récent que le CSV.
+
+    Args:
+        file_path: Chemin vers le fichier CSV d'origine
+        columns: Colonnes à extraire du snapshot
+
+    Returns:
+        DataFrame du snapshot, ou None s'il faut repasser par le CSV
+    """
+    if feather is None:
+        return None
+
+    snapshot_path = get_snapshot_path(str(file_path))
+    try:
+        if os.stat(snapshot_path).st_mtime_ns < os.stat(file_path).st_mtime_ns:
+            return None
+        table = feather.read_table(snapshot_path, memory_map=True)
+    except (OSError, pa.ArrowException):
+        return None
+
+    # Snapshot écrit avec un autre jeu de colonnes : repasser par le CSV
+    if not set(columns).issubset(table.column_names):
+        return None
+
+    metadata = table.schema.pandas_metadata or {}
+    index_columns = [
+        col for col in metadata.get('index_columns', []) if isinstance(col, str)
+    ]
+    return table.select(columns + index_columns).to_pandas()
+
+
+def compact_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convertit les données au schéma compact.
+
+    - groupes et sous-groupes : catégories (codes entiers + libellés uniques)
+    - code saison et code avion : entiers sur 8 bits
+    - impacts, DQR et indicateurs : float32
+    - noms et code AGB : chaînes Arrow (un seul tampon contigu, sans objet
+      Python par ligne), ou catégories si pyarrow n'est pas installé
+
+    Les groupby sur des colonnes catégorielles doivent utiliser
+    observed=True pour ignorer les catégories absentes.
+
+    Args:
+        df: DataFrame au format de load_agribalyse_data
+
+    Returns:
+        Nouveau DataFrame au schéma compact
+    """
+    dtypes = {}
+    for col in df.columns:
+        if col in ('Groupe d\'aliment', 'Sous-groupe d\'aliment'):
+            dtypes[col] = 'category'
+        elif col in ('Nom du Produit en Français', 'Code AGB'):
+            dtypes[col] = 'string[pyarrow]' if pa is not None else 'category'
+        elif col in ('code saison', 'code avion'):
+            dtypes[col] = 'Int8' if df[col].isna().any() else 'int8'
+        elif pd.api.types.is_float_dtype(df[col]):
+            dtypes[col] = 'float32'
+    return df.astype(dtypes)
+
+
+# Colonnes texte : toutes les autres colonnes conservées sont numériques
+COLONNES_TEXTE = [
+    'Nom du Produit en Français',
+    'Groupe d\'aliment',
+    'Sous-groupe d\'aliment',
+    'Code AGB',
+]
+
+
+def get_csv_dtypes(columns) -> Dict[str, str]:
+    """
+    Types de lecture du CSV, communs au chargement complet et par morceaux.
+
+    Les codes saison et avion restent en float64 : ils sont vides sur les
+    lignes sans produit du fichier brut, écartées après la lecture.
+
+    Args:
+        columns: Colonnes conservées
+
+    Returns:
+        Colonne -> type ('string' pour le texte, 'float64' sinon)
+    """
+    return {col: 'string' if col in COLONNES_TEXTE else 'float64' for col in columns}
+
+
+@timed('data.load', rows=True)
+def load_agribalyse_data(file_path: Optional[str] = None,
+                         use_snapshot: bool = True,
+                         extended: bool = False,
+                         compact: bool = False) -> pd.DataFrame:
     """
     Charge et nettoie les données AGRIBALYSE
     
+    Si un snapshot binaire plus récent que le CSV existe (voir
+    build_agribalyse_snapshot), il est mappé en mémoire à la place du CSV.
+    
     Args:
         file_path: Chemin vers le fichier CSV. Si None, utilise le chemin par défaut.
+        use_snapshot: Utiliser le snapshot binaire s'il est à jour
+        extended: Conserver aussi le code AGB, le score unique EF et les
+            16 indicateurs environnementaux (voir COLONNES_INDICATEURS)
+        compact: Convertir au schéma compact (voir compact_dataframe)
     
     Returns:
         DataFrame pandas avec les données nettoyées
     """
     if file_path is None:
         # Chemin par défaut vers le fichier
-        project_root = Path(__file__).parent.parent.parent.parent
-        file_path = project_root / "data" / "raw" / "Agribalyse_Synthese.csv"
+        file_path = get_default_data_path()
+    
+    if use_snapshot:
+        df_snapshot = _read_snapshot(Path(file_path), get_columns(extended))
+        if df_snapshot is not None:
+            print(f"Données chargées depuis le snapshot: {len(df_snapshot)} lignes")
+            return compact_dataframe(df_snapshot) if compact else df_snapshot
     
-    # Charger le CSV
+    # Charger le CSV (mêmes types que iter_agribalyse_chunks)
     print(f"Chargement des données depuis: {file_path}")
-    df = pd.read_csv(file_path)
+    df = pd.read_csv(file_path, dtype=get_csv_dtypes(get_columns(extended)))
     
     # Afficher les infos de base
     print(f"Données chargées: {len(df)} lignes, {len(df.columns)} colonnes")
@@ -32,15 +274,7 @@ def load_agribalyse_data(file_path: Optional[str] = None) -> pd.DataFrame:
     print(f"Après nettoyage: {len(df_clean)} lignes utiles")
     
     # Sélectionner les colonnes importantes
-    colonnes_importantes = [
-        'Nom du Produit en Français',
-        'Groupe d\'aliment',
-        'Sous-groupe d\'aliment', 
-        'Changement climatique',
-        'DQR',
-        'code saison',
-        'code avion'
-    ]
+    colonnes_importantes = get_columns(extended)
     
     # Vérifier que les colonnes existent
     colonnes_existantes = [col for col in colonnes_importantes if col in df_clean.columns]
@@ -52,15 +286,404 @@ def load_agribalyse_data(file_path: Optional[str] = None) -> pd.DataFrame:
     df_final = df_clean[colonnes_existantes].copy()
     
     print(f"Colonnes sélectionnées: {len(colonnes_existantes)}")
-
-    # Conversion des colonnes texte en type string
-    text_columns = ['Nom du Produit en Français', 'Groupe d\'aliment', 'Sous-groupe d\'aliment']
-    existing_text_columns = [col for col in text_columns if col in df_final.columns]
-    df_final[existing_text_columns] = df_final[existing_text_columns].astype('string')
+    
+    if compact:
+        df_final = compact_dataframe(df_final)
     
     return df_final
 
+
+def iter_agribalyse_chunks(file_path: Optional[str] = None,
+                           chunksize: int = 100_000,
+                           extended: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    Lit les données AGRIBALYSE par morceaux, pour les fichiers trop gros
+    pour être chargés en une fois.
+
+    Seules les colonnes conservées sont lues (usecols), avec les mêmes types
+    que load_agribalyse_data (voir get_csv_dtypes), et le nettoyage de load_agribalyse_data est appliqué à
+    chaque morceau : la mémoire utilisée dépend de `chunksize`, pas de la
+    taille du fichier. L'index des lignes est continu d'un morceau à l'autre.
+
+    Args:
+        file_path: Chemin vers le fichier CSV. Si None, utilise le chemin par défaut.
+        chunksize: Nombre de lignes lues par morceau
+        extended: Conserver aussi le code AGB, le score unique EF et les
+            16 indicateurs environnementaux
+
+    Yields:
+        DataFrames nettoyés, au même format que load_agribalyse_data
+    """
+    if file_path is None:
+        file_path = get_default_data_path()
+
+    header = pd.read_csv(file_path, nrows=0).columns
+    colonnes = [col for col in get_columns(extended) if col in header]
+    colonnes_manquantes = [col for col in get_columns(extended) if col not in header]
+    if colonnes_manquantes:
+        print(f"Attention: colonnes manquantes: {colonnes_manquantes}")
+
+    reader = pd.read_csv(file_path, usecols=colonnes, dtype=get_csv_dtypes(colonnes),
+                         chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            chunk = chunk.dropna(subset=['Nom du Produit en Français'])
+            if len(chunk):
+                yield chunk[colonnes]
+
+
+def get_peak_rss_mb() -> Optional[float]:
+    """
+    Retourne le pic de mémoire résidente (RSS) du processus.
+
+    C'est le pic depuis le démarrage du processus (ru_maxrss), qui ne
+    redescend jamais : il ne mesure une opération seule que si elle est
+    exécutée dans un processus neuf (démonstrations `--stream` de ce module
+    et de data.export), pas après d'autres traitements.
+
+    Returns:
+        Pic de mémoire en Mo, ou None si la mesure est indisponible
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilo-octets sous Linux, octets sous macOS
+    if sys.platform == 'darwin':
+        return peak / 1024 ** 2
+    return peak / 1024
+
+
+# Cache partagé par tout le processus : une seule copie des données pour
+# toutes les sessions Streamlit, rechargée uniquement si le fichier change.
+_shared_lock = threading.Lock()
+_shared_entries: Dict[str, dict] = {}
+_shared_stats = {
+    'chargements': 0,
+    'chargements_evites': 0,
+    'invalidations': 0,
+}
+
+
+LECTURE_SEULE = "Données partagées en lecture seule : faire un .copy() avant de les modifier"
+
+# Méthodes qui modifient le DataFrame avec inplace=True
+METHODES_INPLACE = (
+    'drop', 'rename', 'rename_axis', 'set_index', 'reset_index', 'sort_values',
+    'sort_index', 'fillna', 'ffill', 'bfill', 'replace', 'dropna', 'drop_duplicates',
+    'where', 'mask', 'clip', 'interpolate', 'query', 'eval', 'set_axis',
+)
+
+
+class _ReadOnlyIndexer:
+    """Accesseur loc/iloc/at/iat en lecture seule"""
+
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __setitem__(self, key, value):
+        raise ValueError(LECTURE_SEULE)
+
+    def __call__(self, *args, **kwargs):
+        return _ReadOnlyIndexer(self._indexer(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._indexer, name)
+
+
+class SharedFrame(pd.DataFrame):
+    """
+    DataFrame partagé par toutes les sessions, en lecture seule.
+
+    Ajouter, remplacer ou supprimer une colonne, écrire via loc/iloc/at/iat
+    ou appeler une méthode avec inplace=True lève une ValueError ; les
+    tableaux NumPy des colonnes ne sont pas modifiables non plus. Les
+    résultats des opérations (filtres, copies, tris...) sont des DataFrame
+    ordinaires, modifiables.
+    """
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    def _refuse(self, *args, **kwargs):
+        raise ValueError(LECTURE_SEULE)
+
+    __setitem__ = __delitem__ = insert = pop = update = _refuse
+
+    def __setattr__(self, name, value):
+        if name in ('columns', 'index') and self.__dict__.get('_frozen'):
+            raise ValueError(LECTURE_SEULE)
+        super().__setattr__(name, value)
+
+    @property
+    def loc(self):
+        return _ReadOnlyIndexer(super().loc)
+
+    @property
+    def iloc(self):
+        return _ReadOnlyIndexer(super().iloc)
+
+    @property
+    def at(self):
+        return _ReadOnlyIndexer(super().at)
+
+    @property
+    def iat(self):
+        return _ReadOnlyIndexer(super().iat)
+
+
+def _refuse_inplace(name: str):
+    method = getattr(pd.DataFrame, name)
+
+    def guarded(self, *args, inplace: bool = False, **kwargs):
+        if inplace:
+            raise ValueError(LECTURE_SEULE)
+        return method(self, *args, **kwargs)
+
+    guarded.__name__ = name
+    guarded.__doc__ = method.__doc__
+    return guarded
+
+
+for _name in METHODES_INPLACE:
+    setattr(SharedFrame, _name, _refuse_inplace(_name))
+
+
+def _read_only(df: pd.DataFrame) -> SharedFrame:
+    """
+    Copie en lecture seule des données (voir SharedFrame) : chaque colonne
+    repose sur son propre tableau NumPy, marqué non modifiable.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy(copy=True)
+        values.flags.writeable = False
+        if isinstance(df[col].dtype, np.dtype):
+            columns[col] = values
+        else:
+            # Types pandas (texte, catégories...) reconstruits sans copie
+            columns[col] = pd.array(values, dtype=df[col].dtype, copy=False)
+    frame = SharedFrame(columns, index=df.index, copy=False)
+    frame.__dict__['_frozen'] = True
+    return frame
+
+
+def _file_signature(path: Path) -> tuple:
+    """Signature rapide (mtime, taille) utilisée pour détecter les modifications"""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _file_hash(path: Path) -> str:
+    """Empreinte SHA-1 du contenu du fichier (version des données)"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _use_compact(compact: Optional[bool]) -> bool:
+    """Schéma compact demandé, ou activé par ECOMENU_COMPACT_DATA=1 si non précisé"""
+    if compact is None:
+        return os.getenv('ECOMENU_COMPACT_DATA', '0') == '1'
+    return compact
+
+
+@lru_cache(maxsize=64)
+def _entry_key(file_path: Optional[str], extended: bool, compact: bool) -> Tuple[Path, str]:
+    """Chemin et clé de cache d'un mode de chargement (résolution du chemin mémorisée)"""
+    path = Path(file_path) if file_path is not None else get_default_data_path()
+    key = f"{path.resolve()}|{'etendu' if extended else 'standard'}|{'compact' if compact else 'complet'}"
+    return path, key
+
+
+def _get_shared_entry(file_path: Optional[str] = None,
+                      extended: bool = False,
+                      compact: Optional[bool] = None) -> dict:
+    """
+    Retourne l'entrée du cache partagé pour un fichier, en la (re)chargeant si besoin.
+
+    Chaque mode de chargement (par défaut ou étendu, compact ou non) a sa
+    propre entrée.
+
+    Le fichier est rechargé quand sa signature (mtime, taille) change ET que
+    son contenu (SHA-1) est différent : un simple `touch` ne force pas de
+    rechargement.
+    """
+    compact = _use_compact(compact)
+    path, key = _entry_key(file_path, extended, compact)
+    signature = _file_signature(path)
+
+    entry = _shared_entries.get(key)
+    if entry is not None and entry['signature'] == signature:
+        with _shared_lock:
+            _shared_stats['chargements_evites'] += 1
+        return entry
+
+    with _shared_lock:
+        # Un autre thread a pu charger les données pendant l'attente du verrou
+        entry = _shared_entries.get(key)
+        if entry is not None and entry['signature'] == signature:
+            _shared_stats['chargements_evites'] += 1
+            return entry
+
+        version = _file_hash(path)
+        if entry is not None and entry['version'] == version:
+            # Fichier touché mais contenu identique
+            entry['signature'] = signature
+            _shared_stats['chargements_evites'] += 1
+            return entry
+
+        if entry is not None:
+            _shared_stats['invalidations'] += 1
+
+        entry = {
+            'signature': signature,
+            'version': version,
+            'data': _read_only(load_agribalyse_data(str(path), extended=extended, compact=compact)),
+            'resources': {},
+            # Réentrant : une structure peut dépendre d'une autre (appels imbriqués)
+            'lock': threading.RLock(),
+        }
+        _shared_entries[key] = entry
+        _shared_stats['chargements'] += 1
+        return entry
+
+
+def get_shared_data(file_path: Optional[str] = None,
+                    extended: bool = False,
+                    compact: Optional[bool] = None) -> pd.DataFrame:
+    """
+    Retourne les données AGRIBALYSE partagées par tout le processus.
+
+    Toutes les sessions reçoivent le même DataFrame, en lecture seule (voir
+    SharedFrame) : toute modification, valeurs ou colonnes, lève une
+    ValueError ; faire un `.copy()` avant de modifier les données.
+
+    Args:
+        file_path: Chemin vers le fichier CSV. Si None, utilise le chemin par défaut.
+        extended: Charger aussi les indicateurs environnementaux (voir load_agribalyse_data)
+        compact: Utiliser le schéma compact (voir compact_dataframe). Si None,
+            activé par la variable d'environnement ECOMENU_COMPACT_DATA=1.
+
+    Returns:
+        DataFrame pandas partagé avec les données nettoyées
+    """
+    return _get_shared_entry(file_path, extended, compact)['data']
+
+
+def get_data_version(file_path: Optional[str] = None,
+                     extended: bool = False,
+                     compact: Optional[bool] = None) -> str:
+    """
+    Retourne la version (empreinte du contenu) des données partagées.
+
+    Args:
+        file_path: Chemin vers le fichier CSV. Si None, utilise le chemin par défaut.
+        extended: Mode de chargement (voir get_shared_data)
+        compact: Schéma compact (voir get_shared_data)
+
+    Returns:
+        Identifiant court de la version des données
+    """
+    return _get_shared_entry(file_path, extended, compact)['version']
+
+
+def get_shared_resource(name: str,
+                        builder: Callable[[pd.DataFrame], Any],
+                        data: Optional[pd.DataFrame] = None) -> Any:
+    """
+    Retourne une structure dérivée des données partagées (index, tables...).
+
+    La structure est construite une seule fois par version des données et
+    partagée par toutes les sessions. Si `data` n'est pas le DataFrame
+    partagé (sous-ensemble filtré, données de test...), elle est construite
+    à la volée sans être mise en cache.
+
+    Args:
+        name: Nom unique de la structure
+        builder: Fonction construisant la structure à partir du DataFrame
+        data: DataFrame concerné. Si None, utilise les données partagées par défaut.
+
+    Returns:
+        La structure construite par builder
+    """
+    if data is None:
+        entry = _get_shared_entry()
+    else:
+        entry = next(
+            (e for e in list(_shared_entries.values()) if e['data'] is data),
+            None
+        )
+        if entry is None:
+            return builder(data)
+
+    resources = entry['resources']
+    if name not in resources:
+        with entry['lock']:
+            if name not in resources:
+                with timer('data.shared_resource', ressource=name):
+                    resources[name] = builder(entry['data'])
+    return resources[name]
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """
+    Retourne les compteurs du cache partagé.
+
+    Returns:
+        Dict avec 'chargements', 'chargements_evites' et 'invalidations'
+    """
+    with _shared_lock:
+        return dict(_shared_stats)
+
+
+register_collector('data.shared_cache', get_cache_stats)
+
+
+def clear_shared_cache():
+    """Vide le cache partagé (les prochains appels rechargeront les données)"""
+    with _shared_lock:
+        _shared_entries.clear()
+
+
 if __name__ == "__main__":
+    if "--build-snapshot" in sys.argv:
+        build_agribalyse_snapshot()
+        sys.exit(0)
+
+    if "--compact" in sys.argv:
+        # Mémoire et durée des agrégations avec et sans schéma compact
+        import time
+        from ecomenu_assistant.data.analyzer import analyze_by_group, analyze_by_subgroup
+
+        for compact in (False, True):
+            data = load_agribalyse_data(extended=True, compact=compact)
+            memory = data.memory_usage(deep=True).sum() / 1024 ** 2
+            start = time.perf_counter()
+            for _ in range(100):
+                analyze_by_group(data)
+                analyze_by_subgroup(data)
+            elapsed = (time.perf_counter() - start) * 10
+            print(f"{'compact' if compact else 'standard'}: {memory:.2f} Mo, "
+                  f"agrégations par groupe et sous-groupe en {elapsed:.2f} ms")
+        sys.exit(0)
+
+    if "--stream" in sys.argv:
+        # Statistiques calculées morceau par morceau, sans charger le fichier
+        from ecomenu_assistant.data.incremental import IncrementalAnalyzer
+
+        file_path = next((arg for arg in sys.argv[1:] if not arg.startswith('--')), None)
+        analyzer = IncrementalAnalyzer.from_chunks(iter_agribalyse_chunks(file_path))
+        print(analyzer.get_global_stats())
+        print(analyzer.analyze_by_group())
+        print(f"Pic de mémoire: {get_peak_rss_mb():.0f} Mo")
+        sys.exit(0)
+
     try:
         data = load_agribalyse_data()
         print("\nAperçu des données:")
@@ -0,0 +1,505 @@
+"""
+Recherche de produits AGRIBALYSE par nom (index inversé de n-grammes)
+"""
+import math
+import re
+import unicodedata
+import numpy as np
+import pandas as pd
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Optional, Sequence
+
+from ecomenu_assistant.data.loader import get_shared_resource
+from ecomenu_assistant.utils.metrics import timed
+
+NAME_COLUMN = 'Nom du Produit en Français'
+
+# Ligatures non décomposées par la normalisation Unicode
+_LIGATURES = str.maketrans({
+    'œ': 'oe',
+    'æ': 'ae',
+    'ß': 'ss',
+})
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalise un texte pour la recherche : minuscules, sans accents,
+    ligatures développées et espaces compactés.
+
+    Args:
+        text: Texte à normaliser
+
+    Returns:
+        Texte normalisé (ex: "Bœuf haché" -> "boeuf hache")
+    """
+    text = text.casefold().translate(_LIGATURES)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.split())
+
+
+def _ngrams(text: str, n: int) -> set:
+    """Ensemble des n-grammes d'un texte normalisé"""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+def tokens(text: str) -> list:
+    """Mots d'un texte normalisé"""
+    return _TOKEN_PATTERN.findall(text)
+
+
+def accented_tokens(text: str) -> list:
+    """Mots d'un texte en minuscules, accents conservés ("Pâté" -> "pâté")"""
+    return _WORD_PATTERN.findall(text.casefold().translate(_LIGATURES))
+
+
+def singularize(token: str) -> str:
+    """Forme singulière approchée d'un mot normalisé ("tomates" -> "tomate")"""
+    if len(token) > 3 and token[-1] in 'sx' and token[-2] not in 'sx':
+        return token[:-1]
+    return token
+
+
+def _max_typos(word: str) -> int:
+    """Nombre de fautes tolérées selon la longueur du mot"""
+    if len(word) < 4:
+        return 0
+    if len(word) < 7:
+        return 1
+    return 2
+
+
+def _deletes(word: str, distance: int) -> set:
+    """Variantes d'un mot obtenues en supprimant jusqu'à `distance` caractères"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Distance de Damerau-Levenshtein (transpositions adjacentes) bornée.
+
+    Args:
+        a: Premier mot
+        b: Second mot
+        max_distance: Distance au-delà de laquelle le calcul s'arrête
+
+    Returns:
+        Distance d'édition, ou max_distance + 1 si elle dépasse la borne
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + cost,
+            )
+            if (previous2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+# Longueur des clés de l'index des débuts de mots
+_WORD_KEY_LENGTH = 24
+
+
+class ProductSearchIndex:
+    """
+    Index de recherche sur les noms de produits.
+
+    Deux structures complémentaires :
+    - une liste triée des suffixes commençant à chaque début de mot, qui
+      trouve par dichotomie les noms commençant par la requête ou dont un
+      mot commence par la requête (les résultats les plus pertinents) ;
+    - un index inversé de bigrammes/trigrammes pour les autres sous-chaînes.
+
+    Pour la recherche approchée (fuzzy_search), un vocabulaire des mots des
+    noms et un index de suppressions (façon SymSpell) retrouvent les mots à
+    quelques fautes de frappe près sans parcourir tout le vocabulaire.
+    """
+
+    def __init__(self, names: Sequence[str]):
+        """
+        Construit l'index.
+
+        Args:
+            names: Noms des produits, dans l'ordre des lignes du DataFrame
+        """
+        self.names = [normalize_text(str(name)) for name in names]
+        self._lengths = np.array([len(name) for name in self.names], dtype=np.int32)
+
+        postings = defaultdict(list)
+        word_keys = []
+        for row_id, name in enumerate(self.names):
+            for n in (2, 3):
+                for gram in _ngrams(name, n):
+                    postings[gram].append(row_id)
+            for position, char in enumerate(name):
+                if char.isalnum() and (position == 0 or not name[position - 1].isalnum()):
+                    word_keys.append(
+                        (name[position:position + _WORD_KEY_LENGTH], row_id, position)
+                    )
+
+        # Listes triées et compactes pour des intersections rapides
+        self._postings = {
+            gram: np.array(row_ids, dtype=np.int32)
+            for gram, row_ids in postings.items()
+        }
+
+        word_keys.sort()
+        self._word_keys = [key for key, _, _ in word_keys]
+        self._word_rows = np.array([row for _, row, _ in word_keys], dtype=np.int32)
+        self._word_positions = np.array([pos for _, _, pos in word_keys], dtype=np.int32)
+
+        self._build_vocabulary()
+
+    def _build_vocabulary(self):
+        """Construit le vocabulaire des mots et l'index de suppressions"""
+        token_rows = defaultdict(set)
+        for row_id, name in enumerate(self.names):
+            for token in tokens(name):
+                token_rows[token].add(row_id)
+
+        self.vocabulary = sorted(token_rows)
+        self._token_rows = [
+            np.array(sorted(token_rows[token]), dtype=np.int32)
+            for token in self.vocabulary
+        ]
+        # Poids IDF : les mots rares ("bourguignon") comptent plus que "de"
+        n_rows = max(len(self.names), 1)
+        self._token_idf = np.array([
+            math.log(1 + n_rows / len(rows)) for rows in self._token_rows
+        ])
+
+        deletes = defaultdict(list)
+        for token_id, token in enumerate(self.vocabulary):
+            for variant in _deletes(token, _max_typos(token)):
+                deletes[variant].append(token_id)
+        self._deletes = dict(deletes)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _word_matches(self, query: str):
+        """
+        Lignes dont un mot commence par la requête.
+
+        Returns:
+            Tuple (positions iloc, position du mot dans le nom), une entrée par ligne
+        """
+        key = query[:_WORD_KEY_LENGTH]
+        lo = bisect_left(self._word_keys, key)
+        hi = bisect_left(self._word_keys, key + '\uffff', lo)
+        rows = self._word_rows[lo:hi]
+        positions = self._word_positions[lo:hi]
+
+        if len(query) > _WORD_KEY_LENGTH and len(rows):
+            # Clés tronquées : vérifier la fin de la requête
+            keep = np.array([
+                self.names[row].startswith(query, pos)
+                for row, pos in zip(rows.tolist(), positions.tolist())
+            ], dtype=bool)
+            rows, positions = rows[keep], positions[keep]
+
+        # Garder la première occurrence de chaque ligne
+        order = np.lexsort((positions, rows))
+        rows, positions = rows[order], positions[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+        return rows[first], positions[first]
+
+    def _candidates(self, query: str) -> np.ndarray:
+        """Lignes contenant tous les n-grammes de la requête"""
+        if len(query) < 2:
+            # Requête trop courte pour l'index : parcours complet
+            return np.arange(len(self.names), dtype=np.int32)
+
+        lists = []
+        for gram in _ngrams(query, min(len(query), 3)):
+            row_ids = self._postings.get(gram)
+            if row_ids is None:
+                return np.empty(0, dtype=np.int32)
+            lists.append(row_ids)
+
+        # Intersection en commençant par les listes les plus courtes
+        lists.sort(key=len)
+        candidates = lists[0]
+        for row_ids in lists[1:]:
+            candidates = np.intersect1d(candidates, row_ids, assume_unique=True)
+            if len(candidates) == 0:
+                break
+        return candidates
+
+    @timed('search.exact', rows=True)
+    def search(self, query: str, limit: Optional[int] = None) -> np.ndarray:
+        """
+        Recherche les produits dont le nom contient la requête
+        (insensible à la casse et aux accents).
+
+        Les résultats sont classés par pertinence : nom commençant par la
+        requête, puis requête en début de mot, puis autre position ; à
+        pertinence égale, la requête la plus à gauche puis le nom le plus court.
+
+        Args:
+            query: Texte recherché
+            limit: Nombre maximum de résultats (tous si None)
+
+        Returns:
+            Positions (iloc) des lignes trouvées, les plus pertinentes d'abord
+        """
+        query = normalize_text(query)
+        if not query:
+            return np.empty(0, dtype=np.int32)
+
+        # 1. Débuts de mots (dichotomie) : classement entièrement vectorisé
+        rows, positions = self._word_matches(query)
+        order = np.lexsort((self._lengths[rows], positions, positions != 0))
+        ranked = rows[order]
+        if limit is not None and len(ranked) >= limit:
+            return ranked[:limit]
+
+        # 2. Autres sous-chaînes (index de n-grammes + vérification)
+        found = set(ranked.tolist())
+        scored = []
+        for row_id in self._candidates(query).tolist():
+            if row_id in found:
+                continue
+            position = self.names[row_id].find(query)
+            if position >= 0:
+                scored.append((position, len(self.names[row_id]), row_id))
+        scored.sort()
+
+        others = np.array([item[-1] for item in scored], dtype=np.int32)
+        ranked = np.concatenate([ranked, others])
+        if limit is not None:
+            ranked = ranked[:limit]
+        return ranked
+
+    def _token_id(self, token: str) -> Optional[int]:
+        """Indice d'un mot dans le vocabulaire (None s'il est absent)"""
+        position = bisect_left(self.vocabulary, token)
+        if position < len(self.vocabulary) and self.vocabulary[position] == token:
+            return position
+        return None
+
+    def word_rows(self, token: str) -> np.ndarray:
+        """
+        Lignes dont le nom contient un mot entier, au singulier ou au pluriel.
+
+        Args:
+            token: Mot normalisé ("tomates", "oeuf"...)
+
+        Returns:
+            Positions (iloc) triées des lignes
+        """
+        singular = singularize(token)
+        token_ids = {self._token_id(word) for word in (token, singular, singular + 's', singular + 'x')}
+        rows = [self._token_rows[token_id] for token_id in token_ids if token_id is not None]
+        if not rows:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(rows))
+
+    def match_token(self, token: str, prefix: bool = False) -> dict:
+        """
+        Trouve les mots du vocabulaire proches d'un mot de la requête.
+
+        Les fautes de frappe ne sont recherchées que si le mot (ou, pour le
+        dernier mot, un mot qui le prolonge) est absent du vocabulaire.
+
+        Args:
+            token: Mot normalisé de la requête
+            prefix: Accepter aussi les mots commençant par `token`
+                (dernier mot en cours de frappe)
+
+        Returns:
+            Dict {indice du mot dans le vocabulaire: similarité entre 0 et 1}
+        """
+        matches = {}
+
+        if prefix:
+            lo = bisect_left(self.vocabulary, token)
+            hi = bisect_left(self.vocabulary, token + '\uffff', lo)
+            for token_id in range(lo, hi):
+                # Plus le mot est complété, moins la correspondance est sûre
+                completion = len(self.vocabulary[token_id]) - len(token)
+                matches[token_id] = 1.0 if completion == 0 else 0.9 - 0.01 * min(completion, 10)
+
+        # Un mot connu tel quel n'est pas corrigé ("boeuf" ne cherche pas "oeuf")
+        token_id = self._token_id(token)
+        if token_id is not None:
+            matches[token_id] = 1.0
+        if matches:
+            return matches
+
+        max_typos = _max_typos(token)
+        candidates = set()
+        for variant in _deletes(token, max_typos):
+            candidates.update(self._deletes.get(variant, ()))
+
+        for token_id in candidates:
+            if token_id in matches:
+                continue
+            distance = edit_distance(token, self.vocabulary[token_id], max_typos)
+            if distance <= max_typos:
+                matches[token_id] = 1.0 - distance / (len(token) + 1)
+        return matches
+
+    @timed('search.fuzzy', rows=True)
+    def fuzzy_search(self, query: str, limit: Optional[int] = 10) -> np.ndarray:
+        """
+        Recherche approchée classée par pertinence, tolérante aux accents,
+        ligatures ("boeuf" trouve "Bœuf") et fautes de frappe.
+
+        Classement :
+        1. noms contenant la requête telle quelle (voir search) ;
+        2. noms contenant tous les mots de la requête, éventuellement à
+           quelques fautes près, classés par score (similarité x IDF) ;
+        3. si rien n'est trouvé, noms contenant une partie des mots.
+
+        Args:
+            query: Texte recherché
+            limit: Nombre maximum de résultats (tous si None)
+
+        Returns:
+            Positions (iloc) des lignes trouvées, les plus pertinentes d'abord
+        """
+        normalized = normalize_text(query)
+        exact = self.search(normalized, limit=limit)
+        if limit is not None and len(exact) >= limit:
+            return exact
+
+        words = tokens(normalized)
+        if not words:
+            return exact[:limit] if limit is not None else exact
+
+        n_rows = len(self.names)
+        totals = np.zeros(n_rows)
+        matched = np.zeros(n_rows, dtype=np.int32)
+        for position, token in enumerate(words):
+            is_last = position == len(words) - 1
+            matches = self.match_token(token, prefix=is_last)
+            if not matches:
+                continue
+
+            # Poids du mot de la requête : IDF de sa meilleure correspondance,
+            # pour qu'une faute ne favorise pas un mot rare mais plus éloigné
+            closest = max(matches, key=lambda token_id: (matches[token_id], -self._token_idf[token_id]))
+            weight = self._token_idf[closest]
+
+            best = np.zeros(n_rows)
+            for token_id, similarity in matches.items():
+                rows = self._token_rows[token_id]
+                best[rows] = np.maximum(best[rows], similarity * weight)
+            totals += best
+            matched += best > 0
+
+        # Tous les mots trouvés, sinon repli sur les correspondances partielles
+        candidates = np.flatnonzero(matched == len(words))
+        if len(candidates) == 0 and len(exact) == 0:
+            candidates = np.flatnonzero(matched > 0)
+
+        candidates = np.setdiff1d(candidates, exact, assume_unique=True)
+        order = np.lexsort((
+            self._lengths[candidates],
+            -totals[candidates],
+            -matched[candidates],
+        ))
+        ranked = np.concatenate([exact, candidates[order].astype(np.int32)])
+        if limit is not None:
+            ranked = ranked[:limit]
+        return ranked
+
+
+@timed('search.build_index')
+def build_search_index(data: pd.DataFrame) -> ProductSearchIndex:
+    """
+    Construit l'index de recherche d'un DataFrame AGRIBALYSE.
+
+    Args:
+        data: DataFrame AGRIBALYSE
+
+    Returns:
+        Index de recherche sur les noms de produits
+    """
+    return ProductSearchIndex(data[NAME_COLUMN].fillna('').tolist())
+
+
+def get_search_index(data: Optional[pd.DataFrame] = None) -> ProductSearchIndex:
+    """
+    Retourne l'index de recherche, partagé entre les sessions pour les
+    données partagées (voir get_shared_data).
+
+    Args:
+        data: DataFrame AGRIBALYSE. Si None, utilise les données partagées.
+
+    Returns:
+        Index de recherche
+    """
+    return get_shared_resource('search_index', build_search_index, data)
+
+
+def search_products(data: pd.DataFrame, query: str,
+                    limit: Optional[int] = None,
+                    fuzzy: bool = False) -> pd.DataFrame:
+    """
+    Recherche des produits par nom et retourne les lignes correspondantes.
+
+    Args:
+        data: DataFrame AGRIBALYSE
+        query: Texte recherché
+        limit: Nombre maximum de résultats (tous si None)
+        fuzzy: Tolérer les fautes de frappe et les mots dans le désordre
+
+    Returns:
+        DataFrame des produits trouvés, les plus pertinents d'abord
+    """
+    index = get_search_index(data)
+    if fuzzy:
+        row_ids = index.fuzzy_search(query, limit=limit)
+    else:
+        row_ids = index.search(query, limit=limit)
+    return data.iloc[row_ids]
+
+
+# Test des fonctions si exécuté directement
+if __name__ == "__main__":
+    import time
+    from ecomenu_assistant.data.loader import get_shared_data
+
+    data = get_shared_data()
+    index = get_search_index(data)
+
+    for query in ["boeuf", "Pomme", "fromage de chèvre", "xyz"]:
+        start = time.perf_counter()
+        row_ids = index.search(query, limit=5)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n'{query}' ({elapsed:.3f} ms)")
+        print(data.iloc[row_ids][NAME_COLUMN].tolist())
+
+    for query in ["beuf bourguigon", "chevre fromage", "tomat"]:
+        start = time.perf_counter()
+        row_ids = index.fuzzy_search(query, limit=5)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n~'{query}' ({elapsed:.3f} ms)")
+        print(data.iloc[row_ids][NAME_COLUMN].tolist())
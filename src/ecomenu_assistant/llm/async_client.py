@@ -0,0 +1,275 @@
+"""
+Client OpenAI asynchrone partagé : pool de connexions, limite de
+concurrence, délais d'expiration et reprises avec backoff exponentiel
+"""
+import asyncio
+import os
+import queue
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Iterator, Optional
+
+import httpx
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+
+from ecomenu_assistant.utils.metrics import register_collector
+
+# Erreurs pour lesquelles une nouvelle tentative a un sens
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+# Fin de flux dans la file de streaming
+_END_OF_STREAM = object()
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """
+    Lit le délai d'attente demandé par l'API dans les en-têtes d'une réponse.
+
+    Sont reconnus `retry-after-ms`, `retry-after` (secondes ou date HTTP) et
+    les en-têtes OpenAI `x-ratelimit-reset-requests` / `x-ratelimit-reset-tokens`
+    (durées du type "1s", "6m0s" ou "20ms").
+
+    Args:
+        headers: En-têtes HTTP de la réponse
+
+    Returns:
+        Délai en secondes, ou None si aucun en-tête n'est exploitable
+    """
+    if headers is None:
+        return None
+
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get('retry-after')
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    delays = []
+    for name in ('x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens'):
+        value = headers.get(name)
+        if value:
+            parts = _DURATION_PATTERN.findall(value)
+            if parts:
+                delays.append(sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts))
+    return max(delays) if delays else None
+
+
+class AsyncLLMPool:
+    """
+    Client OpenAI asynchrone partagé par toutes les sessions du processus.
+
+    Une boucle asyncio tourne dans un thread dédié ; les scripts Streamlit
+    (synchrones) y soumettent leurs requêtes via complete() et stream().
+    Toutes les requêtes partagent un même pool de connexions HTTP et un
+    sémaphore qui borne le nombre d'appels simultanés à l'API. Les erreurs
+    transitoires (429, 5xx, réseau, délai dépassé) sont reprises avec un
+    backoff exponentiel qui respecte les en-têtes de limitation de débit.
+    """
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None,
+                 max_concurrency: int = 8, timeout: float = 30.0,
+                 max_retries: int = 4, base_delay: float = 0.5,
+                 max_delay: float = 20.0, max_connections: int = 20):
+        """
+        Args:
+            api_key: Clé d'API OpenAI
+            base_url: URL de l'API (serveur local de test par exemple)
+            max_concurrency: Nombre maximum de requêtes simultanées
+            timeout: Délai maximum d'une requête, en secondes
+            max_retries: Nombre de nouvelles tentatives après une erreur transitoire
+            base_delay: Délai du premier backoff, en secondes
+            max_delay: Délai maximum entre deux tentatives, en secondes
+            max_connections: Taille du pool de connexions HTTP
+        """
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="llm-pool", daemon=True
+        )
+        self._thread.start()
+
+        async def setup():
+            self._semaphore = asyncio.Semaphore(max_concurrency)
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+                timeout=httpx.Timeout(timeout),
+            )
+            # Les reprises sont gérées ici, pas par le SDK
+            self._client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=timeout,
+                max_retries=0,
+                http_client=http_client,
+            )
+
+        asyncio.run_coroutine_threadsafe(setup(), self._loop).result()
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Délai avant la tentative suivante : en-têtes de l'API, sinon backoff exponentiel"""
+        if isinstance(error, APIStatusError):
+            delay = parse_retry_after(error.response.headers)
+            if delay is not None:
+                return min(delay, self.max_delay)
+        # Backoff exponentiel avec gigue pour étaler les reprises
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def _create(self, **kwargs):
+        """Appel chat.completions.create avec reprises sur erreurs transitoires"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._client.chat.completions.create(**kwargs)
+            except RETRYABLE_ERRORS as error:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self._retry_delay(error, attempt))
+
+    async def acomplete(self, **kwargs):
+        """
+        Requête de complétion (coroutine, à exécuter dans la boucle du pool).
+
+        Args:
+            **kwargs: Paramètres de chat.completions.create (model, messages...)
+
+        Returns:
+            Réponse ChatCompletion de l'API
+        """
+        async with self._semaphore:
+            return await self._create(**kwargs)
+
+    def complete(self, **kwargs):
+        """
+        Requête de complétion depuis un thread synchrone.
+
+        Args:
+            **kwargs: Paramètres de chat.completions.create (model, messages...)
+
+        Returns:
+            Réponse ChatCompletion de l'API
+        """
+        future = asyncio.run_coroutine_threadsafe(self.acomplete(**kwargs), self._loop)
+        return future.result()
+
+    def stream(self, **kwargs) -> Iterator[str]:
+        """
+        Requête en streaming depuis un thread synchrone.
+
+        Les reprises ne concernent que l'ouverture du flux : une fois le
+        premier fragment reçu, une erreur est propagée à l'appelant.
+
+        Args:
+            **kwargs: Paramètres de chat.completions.create (model, messages...)
+
+        Yields:
+            Fragments de texte de la réponse
+        """
+        chunks = queue.Queue()
+
+        async def produce():
+            try:
+                async with self._semaphore:
+                    response = await self._create(stream=True, **kwargs)
+                    async for chunk in response:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            chunks.put(chunk.choices[0].delta.content)
+            except Exception as error:
+                chunks.put(error)
+            finally:
+                chunks.put(_END_OF_STREAM)
+
+        future = asyncio.run_coroutine_threadsafe(produce(), self._loop)
+        try:
+            while True:
+                item = chunks.get()
+                if item is _END_OF_STREAM:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Flux abandonné par l'appelant : libérer la connexion
+            future.cancel()
+
+    def close(self):
+        """Ferme les connexions et arrête la boucle du pool"""
+        asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_pool() -> AsyncLLMPool:
+    """
+    Retourne le client asynchrone partagé par toutes les sessions.
+
+    Configuration par variables d'environnement :
+    - OPENAI_API_KEY (obligatoire) et OPENAI_BASE_URL
+    - ECOMENU_LLM_MAX_CONCURRENCY : requêtes simultanées (8 par défaut)
+    - ECOMENU_LLM_TIMEOUT : délai maximum d'une requête en secondes (30 par défaut)
+    - ECOMENU_LLM_MAX_RETRIES : nouvelles tentatives (4 par défaut)
+
+    Returns:
+        Client partagé
+    """
+    global _shared_pool
+
+    if _shared_pool is None:
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                api_key = os.getenv('OPENAI_API_KEY')
+                if not api_key:
+                    raise ValueError("OPENAI_API_KEY non trouvée dans les variables d'environnement")
+                _shared_pool = AsyncLLMPool(
+                    api_key=api_key,
+                    base_url=os.getenv('OPENAI_BASE_URL') or None,
+                    max_concurrency=int(os.getenv('ECOMENU_LLM_MAX_CONCURRENCY', 8)),
+                    timeout=float(os.getenv('ECOMENU_LLM_TIMEOUT', 30)),
+                    max_retries=int(os.getenv('ECOMENU_LLM_MAX_RETRIES', 4)),
+                )
+    return _shared_pool
+
+
+def _shared_pool_stats() -> dict:
+    """Reprises du client partagé, s'il a été créé (voir utils.metrics)"""
+    return {'reprises': _shared_pool.retries} if _shared_pool is not None else {}
+
+
+register_collector('llm.pool', _shared_pool_stats)
@@ -0,0 +1,230 @@
+"""
+Cache des réponses du LLM
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from ecomenu_assistant.utils.metrics import register_collector
+
+
+def normalize_prompt(text: str) -> str:
+    """
+    Normalise un texte de prompt pour la clé de cache (casse et espaces).
+
+    Args:
+        text: Texte à normaliser
+
+    Returns:
+        Texte normalisé
+    """
+    return ' '.join(text.casefold().split())
+
+
+def make_cache_key(model: str, messages: List[Dict], product_context: str = "") -> str:
+    """
+    Calcule la clé de cache d'une requête de chat.
+
+    La clé dépend du modèle, du prompt système, du contexte produit et de
+    toute la conversation (historique + dernier message), normalisés.
+
+    Args:
+        model: Nom du modèle
+        messages: Messages envoyés à l'API (système en premier)
+        product_context: Contexte produit injecté dans le prompt système
+
+    Returns:
+        Empreinte SHA-256 de la requête
+    """
+    payload = {
+        'model': model,
+        'context': normalize_prompt(product_context),
+        'messages': [
+            [message['role'], normalize_prompt(message['content'])]
+            for message in messages
+        ],
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Cache LRU en mémoire des réponses, avec durée de vie (TTL)"""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 24 * 3600):
+        """
+        Args:
+            max_entries: Nombre maximum de réponses conservées
+            ttl: Durée de vie d'une réponse en secondes
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Retourne la réponse en cache pour une clé.
+
+        Args:
+            key: Clé calculée par make_cache_key
+
+        Returns:
+            Réponse en cache, ou None si absente ou expirée
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[1] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+
+        value = self._load(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, value[0], value[1])
+        return value[0]
+
+    def set(self, key: str, value: str):
+        """
+        Enregistre une réponse.
+
+        Args:
+            key: Clé calculée par make_cache_key
+            value: Réponse de l'assistant
+        """
+        created = time.time()
+        with self._lock:
+            self._store(key, value, created)
+        self._save(key, value, created)
+
+    def _store(self, key: str, value: str, created: float):
+        """Ajoute une entrée en mémoire en évinçant la moins récemment utilisée"""
+        self._entries[key] = (value, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[tuple]:
+        """Lecture dans le stockage persistant (aucun pour le cache mémoire)"""
+        return None
+
+    def _save(self, key: str, value: str, created: float):
+        """Écriture dans le stockage persistant (aucun pour le cache mémoire)"""
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retourne les compteurs du cache.
+
+        Returns:
+            Dict avec 'hits', 'misses' et 'entrees'
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entrees': len(self._entries),
+        }
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Cache LRU en mémoire, persisté dans un fichier SQLite local"""
+
+    def __init__(self, path: str, max_entries: int = 512, ttl: float = 24 * 3600):
+        """
+        Args:
+            path: Chemin du fichier SQLite
+            max_entries: Nombre maximum de réponses conservées en mémoire
+            ttl: Durée de vie d'une réponse en secondes
+        """
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self.path = path
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db_lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - ttl,)
+            )
+
+    def _load(self, key: str) -> Optional[tuple]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, created FROM responses WHERE key = ? AND created >= ?",
+                (key, time.time() - self.ttl)
+            ).fetchone()
+        return row
+
+    def _save(self, key: str, value: str, created: float):
+        with self._db_lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)",
+                (key, value, created)
+            )
+
+    def clear(self):
+        super().clear()
+        with self._db_lock, self._db:
+            self._db.execute("DELETE FROM responses")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """
+    Retourne le cache de réponses partagé par toutes les sessions.
+
+    Configuration par variables d'environnement :
+    - ECOMENU_LLM_CACHE : "0" pour désactiver le cache
+    - ECOMENU_LLM_CACHE_PATH : fichier SQLite pour persister les réponses
+    - ECOMENU_LLM_CACHE_TTL : durée de vie en secondes (24 h par défaut)
+    - ECOMENU_LLM_CACHE_SIZE : nombre de réponses en mémoire (512 par défaut)
+
+    Returns:
+        Cache partagé, ou None si le cache est désactivé
+    """
+    global _default_cache
+
+    if os.getenv('ECOMENU_LLM_CACHE', '1') == '0':
+        return None
+
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                ttl = float(os.getenv('ECOMENU_LLM_CACHE_TTL', 24 * 3600))
+                max_entries = int(os.getenv('ECOMENU_LLM_CACHE_SIZE', 512))
+                path = os.getenv('ECOMENU_LLM_CACHE_PATH')
+                if path:
+                    _default_cache = SQLiteResponseCache(path, max_entries=max_entries, ttl=ttl)
+                else:
+                    _default_cache = ResponseCache(max_entries=max_entries, ttl=ttl)
+    return _default_cache
+
+
+def _default_cache_stats() -> Dict[str, int]:
+    """Compteurs du cache partagé, s'il a été créé (voir utils.metrics)"""
+    return _default_cache.stats() if _default_cache is not None else {}
+
+
+register_collector('llm.cache', _default_cache_stats)
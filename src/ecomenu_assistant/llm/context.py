@@ -0,0 +1,240 @@
+"""
+Construction du contexte produit envoyé au LLM (recherche des produits
+mentionnés dans un message)
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ecomenu_assistant.data.loader import get_shared_resource
+from ecomenu_assistant.data.search import accented_tokens, normalize_text, singularize
+from ecomenu_assistant.recommendations.engine import get_recommendation_engine
+from ecomenu_assistant.utils.metrics import timed
+
+NAME_COLUMN = 'Nom du Produit en Français'
+IMPACT_COLUMN = 'Changement climatique'
+
+# Longueur maximale (en mots) d'une mention de produit
+MAX_PHRASE_WORDS = 4
+
+# Mots qui ne désignent pas un produit à eux seuls (sans accents)
+STOPWORDS = {
+    'a', 'au', 'aux', 'avec', 'ce', 'ces', 'cette', 'dans', 'de', 'des', 'du',
+    'en', 'et', 'la', 'le', 'les', 'ma', 'mes', 'mon', 'ou', 'par', 'pas',
+    'plus', 'pour', 'sans', 'sur', 'un', 'une', 'type', 'base', 'facon',
+    'maison', 'entier', 'entiere', 'moyen', 'moyenne', 'standard',
+}
+
+# Mots signalant le produit brut
+PRODUIT_CRU = {'cru', 'crue'}
+
+
+def _folded(words) -> tuple:
+    """Mots sans accents"""
+    return tuple(normalize_text(word) for word in words)
+
+
+class ProductMentionIndex:
+    """
+    Index des désignations de produits pour repérer les produits cités
+    dans un message.
+
+    Le nom d'un produit est découpé aux virgules ("Bœuf, steak haché 5% MG,
+    cru"). Chaque préfixe de 1 à MAX_PHRASE_WORDS mots du premier segment,
+    et de 2 mots ou plus des suivants, au singulier, pointe vers les
+    produits concernés : "pomme de terre" retrouve "Pomme de terre
+    nouvelle, crue" et "steak haché" les steaks hachés de bœuf.
+
+    Les accents sont conservés ("pâtes" ne retrouve pas "Pâté") ; un
+    message écrit sans accents retrouve la désignation accentuée la plus
+    fréquente. Les produits d'une désignation sont classés par pertinence :
+    désignation au début du nom, le moins de mots en plus, produit cru,
+    puis nom le plus court ; à la recherche, ceux qui l'écrivent comme le
+    message (singulier ou pluriel) passent devant.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        """
+        Construit l'index.
+
+        Args:
+            data: DataFrame AGRIBALYSE
+        """
+        names = data[NAME_COLUMN].fillna('').tolist()
+        self.total_products = len(names)
+
+        # désignation -> {produit: (clé de classement, forme écrite dans le nom)}
+        phrases = defaultdict(dict)
+        for row_id, name in enumerate(names):
+            name = str(name)
+            raw = bool(PRODUIT_CRU & set(accented_tokens(name)))
+            for level, segment in enumerate(name.split(',')):
+                tokens = accented_tokens(segment)
+                words = [singularize(token) for token in tokens]
+                folded = _folded(words)
+                if not words or folded[0] in STOPWORDS:
+                    continue
+                for n in range(1 if level == 0 else 2, min(len(words), MAX_PHRASE_WORDS) + 1):
+                    extra = sum(1 for word in folded[n:] if word not in STOPWORDS and not word.isdigit())
+                    rank = (min(level, 1), extra, not raw, len(name))
+                    entry = phrases[tuple(words[:n])]
+                    if row_id not in entry or rank < entry[row_id][0]:
+                        entry[row_id] = (rank, ' '.join(_folded(tokens[:n])))
+
+        self.phrases = {}
+        self._forms = {}
+        variants = {}
+        for phrase, entry in phrases.items():
+            ranked = sorted(entry, key=lambda row_id: (entry[row_id][0], row_id))
+            self.phrases[phrase] = np.array(ranked, dtype=np.int32)
+            self._forms[phrase] = np.array([entry[row_id][1] for row_id in ranked], dtype=object)
+            folded = _folded(phrase)
+            if folded not in variants or len(entry) > len(phrases[variants[folded]]):
+                variants[folded] = phrase
+        # Désignation sans accents -> variante accentuée la plus fréquente
+        self._variants = variants
+
+    def _lookup(self, words: tuple, folded: tuple) -> Optional[tuple]:
+        """Désignation indexée de mots du message (au singulier), None si aucune"""
+        if words in self.phrases:
+            return words
+        if folded == words:  # écrit sans accents
+            return self._variants.get(folded)
+        return None
+
+    def _ranked(self, phrase: tuple, form: str) -> np.ndarray:
+        """Produits d'une désignation, ceux écrits comme dans le message d'abord"""
+        row_ids = self.phrases[phrase]
+        same_form = self._forms[phrase] == form
+        if same_form.all() or not same_form.any():
+            return row_ids
+        return np.concatenate([row_ids[same_form], row_ids[~same_form]])
+
+    def find_mentions(self, message: str) -> List[tuple]:
+        """
+        Repère les produits cités dans un message (plus longue désignation d'abord).
+
+        Args:
+            message: Message de l'utilisateur
+
+        Returns:
+            Liste de tuples (désignation trouvée, positions iloc des produits
+            par pertinence)
+        """
+        tokens = accented_tokens(message)
+        forms = _folded(tokens)
+        words = tuple(singularize(token) for token in tokens)
+        folded = tuple(singularize(form) for form in forms)
+        mentions = []
+        seen = set()
+        i = 0
+        while i < len(words):
+            for n in range(min(MAX_PHRASE_WORDS, len(words) - i), 0, -1):
+                if n == 1 and folded[i] in STOPWORDS:
+                    continue
+                phrase = self._lookup(words[i:i + n], folded[i:i + n])
+                if phrase is not None:
+                    if phrase not in seen:
+                        seen.add(phrase)
+                        mentions.append((' '.join(phrase), self._ranked(phrase, ' '.join(forms[i:i + n]))))
+                    i += n
+                    break
+            else:
+                i += 1
+        return mentions
+
+
+def get_mention_index(data: Optional[pd.DataFrame] = None) -> ProductMentionIndex:
+    """
+    Retourne l'index des désignations, partagé entre les sessions pour les
+    données partagées (voir get_shared_data).
+
+    Args:
+        data: DataFrame AGRIBALYSE. Si None, utilise les données partagées.
+
+    Returns:
+        Index des désignations de produits
+    """
+    return get_shared_resource('mention_index', ProductMentionIndex, data)
+
+
+@timed('llm.context')
+def build_product_context(message: str, data: pd.DataFrame,
+                          max_chars: int = 1500,
+                          products_per_mention: int = 3) -> str:
+    """
+    Construit le contexte produit d'un message pour le prompt système.
+
+    Tous les produits cités sont repérés ; leurs impacts et leurs meilleures
+    alternatives sont récupérés en un seul appel vectorisé, puis présentés
+    de façon compacte sans dépasser `max_chars` caractères.
+
+    Args:
+        message: Message de l'utilisateur
+        data: DataFrame AGRIBALYSE
+        max_chars: Taille maximale du contexte
+        products_per_mention: Nombre de produits détaillés par désignation
+
+    Returns:
+        Contexte formaté, ou chaîne vide si aucun produit n'est cité
+    """
+    mentions = get_mention_index(data).find_mentions(message)
+    if not mentions:
+        return ""
+
+    impacts = data[IMPACT_COLUMN].to_numpy(dtype=np.float64)
+    names = data[NAME_COLUMN].to_numpy()
+
+    # Produits détaillés de toutes les désignations, en un seul lot
+    selected = np.concatenate([row_ids[:products_per_mention] for _, row_ids in mentions])
+    alternatives = get_recommendation_engine(data).get_alternatives(selected, k=1)
+    best: Dict[int, tuple] = {
+        source: (name, impact)
+        for source, name, impact in zip(
+            alternatives['source'], alternatives['Alternative'], alternatives['Impact alternative']
+        )
+    }
+
+    lines = ["Produits mentionnés (kg CO2 eq. par kg, AGRIBALYSE) :"]
+    size = len(lines[0])
+    for phrase, row_ids in mentions:
+        mention_impacts = impacts[row_ids]
+        block = [
+            f"« {phrase} » : {len(row_ids)} produit(s), "
+            f"{mention_impacts.min():.2f} à {mention_impacts.max():.2f} kg CO2 "
+            f"(moyenne {mention_impacts.mean():.2f})"
+        ]
+        for row_id in row_ids[:products_per_mention].tolist():
+            line = f"- {names[row_id]} : {impacts[row_id]:.2f} kg CO2"
+            if row_id in best:
+                alt_name, alt_impact = best[row_id]
+                line += f" → alternative : {alt_name} ({alt_impact:.2f})"
+            block.append(line)
+
+        block_size = sum(len(line) + 1 for line in block)
+        if size + block_size > max_chars:
+            break
+        lines.extend(block)
+        size += block_size
+
+    if len(lines) == 1:
+        return ""
+    return '\n'.join(lines)
+
+
+# Test des fonctions si exécuté directement
+if __name__ == "__main__":
+    import time
+    from ecomenu_assistant.data.loader import get_shared_data
+
+    data = get_shared_data()
+    get_mention_index(data)
+    get_recommendation_engine(data)
+
+    message = "Par quoi remplacer le bœuf haché et les tomates dans mes lasagnes ?"
+    start = time.perf_counter()
+    context = build_product_context(message, data)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Contexte construit en {elapsed:.2f} ms :\n{context}")
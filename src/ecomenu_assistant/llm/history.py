@@ -0,0 +1,201 @@
+"""
+Gestion de l'historique de conversation sous budget de tokens
+"""
+import math
+from typing import Callable, Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken est optionnel : estimation approchée
+    tiktoken = None
+
+# Tokens ajoutés par l'API autour de chaque message (rôle, séparateurs)
+MESSAGE_OVERHEAD = 4
+
+SUMMARY_PREFIX = "Résumé des échanges précédents :\n"
+
+_encodings = {}
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """
+    Compte localement les tokens d'un texte.
+
+    Utilise tiktoken s'il est installé, sinon une estimation prudente
+    (un token pour 3,5 caractères environ en français).
+
+    Args:
+        text: Texte à mesurer
+        model: Modèle dont on utilise le tokenizer
+
+    Returns:
+        Nombre de tokens
+    """
+    if tiktoken is not None:
+        encoding = _encodings.get(model)
+        if encoding is None:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+            _encodings[model] = encoding
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 3.5)
+
+
+def summarize_turns(summary: str, turns: List[Dict]) -> str:
+    """
+    Résumé local (sans appel API) : une ligne courte par échange.
+
+    Args:
+        summary: Résumé existant
+        turns: Messages à intégrer au résumé
+
+    Returns:
+        Nouveau résumé
+    """
+    lines = [summary] if summary else []
+    for message in turns:
+        content = ' '.join(message['content'].split())
+        if message['role'] == 'user':
+            lines.append(f"- Question : {_shorten(content, 160)}")
+        else:
+            lines.append(f"  Réponse : {_shorten(_first_sentence(content), 200)}")
+    return '\n'.join(lines)
+
+
+def _first_sentence(text: str) -> str:
+    """Première phrase d'un texte"""
+    for separator in ('. ', '! ', '? ', '\n'):
+        position = text.find(separator)
+        if 0 < position < len(text) - 1:
+            text = text[:position + 1]
+    return text
+
+
+def _shorten(text: str, width: int) -> str:
+    """Tronque un texte à `width` caractères"""
+    return text if len(text) <= width else text[:width - 1].rstrip() + "…"
+
+
+class ConversationHistory:
+    """
+    Historique de conversation borné en tokens.
+
+    Les échanges récents sont conservés tels quels dans une fenêtre
+    glissante ; quand le budget est dépassé, les plus anciens sont retirés
+    de la fenêtre et intégrés à un résumé, lui-même borné. Le coût de
+    chaque requête reste ainsi constant quelle que soit la longueur de la
+    conversation.
+    """
+
+    def __init__(self, max_tokens: int = 1500, summary_max_tokens: int = 300,
+                 model: str = "gpt-3.5-turbo",
+                 summarizer: Optional[Callable[[str, List[Dict]], str]] = None):
+        """
+        Args:
+            max_tokens: Budget total (fenêtre récente + résumé)
+            summary_max_tokens: Budget maximum du résumé
+            model: Modèle utilisé pour compter les tokens
+            summarizer: Fonction (résumé, messages retirés) -> nouveau résumé.
+                Par défaut, résumé local sans appel API (summarize_turns).
+        """
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.model = model
+        self.summarizer = summarizer or summarize_turns
+        self.reset()
+
+    def reset(self):
+        """Vide l'historique et le résumé"""
+        self.turns = []
+        self._turn_tokens = []
+        self.summary = ""
+        self.summary_tokens = 0
+        self.summarized_turns = 0
+
+    @property
+    def window_tokens(self) -> int:
+        """Tokens de la fenêtre d'échanges récents"""
+        return sum(self._turn_tokens)
+
+    @property
+    def total_tokens(self) -> int:
+        """Tokens envoyés pour l'historique (résumé compris)"""
+        return self.window_tokens + self.summary_tokens
+
+    def add_exchange(self, user_message: str, assistant_message: str):
+        """
+        Ajoute un échange question/réponse puis compacte l'historique.
+
+        Args:
+            user_message: Message de l'utilisateur
+            assistant_message: Réponse de l'assistant
+        """
+        for role, content in (("user", user_message), ("assistant", assistant_message)):
+            self.turns.append({"role": role, "content": content})
+            self._turn_tokens.append(count_tokens(content, self.model) + MESSAGE_OVERHEAD)
+        self.compact()
+
+    def compact(self):
+        """Déplace les échanges les plus anciens dans le résumé tant que le budget est dépassé"""
+        # La fenêtre récente laisse toujours la place du résumé dans le budget
+        window_budget = self.max_tokens - self.summary_max_tokens
+
+        removed = []
+        # Le dernier échange est toujours conservé en entier
+        while self.window_tokens > window_budget and len(self.turns) > 2:
+            removed.extend(self.turns[:2])
+            del self.turns[:2]
+            del self._turn_tokens[:2]
+
+        if not removed:
+            return
+
+        self.summarized_turns += len(removed) // 2
+        summary = self.summarizer(self.summary, removed)
+
+        # Résumé borné : on oublie ses lignes les plus anciennes
+        lines = summary.split('\n')
+        while len(lines) > 1 and self._summary_size(lines) > self.summary_max_tokens:
+            lines.pop(0)
+            # Ne pas commencer par la suite d'un échange déjà oublié
+            while len(lines) > 1 and lines[0].startswith(' '):
+                lines.pop(0)
+        self.summary = '\n'.join(lines)
+        self.summary_tokens = self._summary_size(lines)
+
+    def _summary_size(self, lines: List[str]) -> int:
+        """Tokens du message de résumé construit à partir de ses lignes"""
+        return count_tokens(SUMMARY_PREFIX + '\n'.join(lines), self.model) + MESSAGE_OVERHEAD
+
+    def as_messages(self) -> List[Dict]:
+        """
+        Messages à envoyer à l'API : résumé éventuel puis échanges récents.
+
+        Returns:
+            Liste de messages au format OpenAI
+        """
+        messages = []
+        if self.summary:
+            messages.append({
+                "role": "system",
+                "content": SUMMARY_PREFIX + self.summary
+            })
+        messages.extend(self.turns)
+        return messages
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retourne l'état de l'historique.
+
+        Returns:
+            Dict avec 'tokens_historique', 'tokens_resume', 'echanges_conserves'
+            et 'echanges_resumes'
+        """
+        return {
+            'tokens_historique': self.total_tokens,
+            'tokens_resume': self.summary_tokens,
+            'echanges_conserves': len(self.turns) // 2,
+            'echanges_resumes': self.summarized_turns,
+        }
@@ -2,27 +2,70 @@
 Client OpenAI pour recommandations intelligentes
 """
 import os
-from openai import OpenAI
-from typing import List, Dict
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
 import pandas as pd
-from dotenv import load_dotenv
 
-# Charger les variables d'environnement
-load_dotenv()
+from ecomenu_assistant.data.search import get_search_index
+from ecomenu_assistant.llm.cache import ResponseCache, get_default_cache, make_cache_key
+from ecomenu_assistant.llm.history import MESSAGE_OVERHEAD, ConversationHistory, count_tokens
+from ecomenu_assistant.recommendations.engine import get_recommendation_engine
+from ecomenu_assistant.utils.metrics import increment, is_enabled, observe, timed, timer
+
+if TYPE_CHECKING:
+    from ecomenu_assistant.llm.async_client import AsyncLLMPool
+
+_env_loaded = False
+
+
+def load_environment():
+    """Charge le fichier .env (une fois), au premier assistant créé"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
 
 
 class EcoMenuAssistant:
     """Assistant conversationnel pour recommandations alimentaires écologiques"""
     
-    def __init__(self):
-        """Initialise le client OpenAI"""
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY non trouvée dans les variables d'environnement")
+    def __init__(self, cache: Optional[ResponseCache] = None,
+                 pool: Optional['AsyncLLMPool'] = None):
+        """
+        Initialise le client OpenAI
         
-        self.client = OpenAI(api_key=api_key)
+        Args:
+            cache: Cache des réponses. Si None, utilise le cache partagé
+                par toutes les sessions (voir get_default_cache).
+            pool: Client asynchrone. Si None, utilise le client partagé
+                par toutes les sessions (voir get_shared_pool), créé à
+                la première requête.
+        """
+        load_environment()
+        self._pool = pool
         self.model = "gpt-3.5-turbo"
-        self.conversation_history = []
+        self.cache = cache if cache is not None else get_default_cache()
+        
+        # Historique borné en tokens : coût et latence constants par requête
+        self.history = ConversationHistory(
+            max_tokens=int(os.getenv('ECOMENU_HISTORY_MAX_TOKENS', 1500)),
+            model=self.model
+        )
+        self.last_request_stats = {}
+    
+    @property
+    def client(self) -> 'AsyncLLMPool':
+        """Client asynchrone ; le SDK OpenAI n'est importé qu'au premier appel"""
+        if self._pool is None:
+            from ecomenu_assistant.llm.async_client import get_shared_pool
+            self._pool = get_shared_pool()
+        return self._pool
+    
+    @property
+    def conversation_history(self) -> List[Dict]:
+        """Messages d'historique envoyés à l'API (résumé puis échanges récents)"""
+        return self.history.as_messages()
     
     def create_system_prompt(self, data_context: str = "") -> str:
         """
@@ -53,6 +96,7 @@ Règles :
 - Donne des chiffres précis quand c'est pertinent
 - Propose toujours des alternatives concrètes"""
     
+    @timed('llm.product_info')
     def get_product_info(self, product_name: str, data: pd.DataFrame) -> str:
         """
         Récupère les informations d'un produit pour alimenter le contexte.
@@ -64,18 +108,25 @@ Règles :
         Returns:
             Informations formatées sur le produit
         """
-        results = data[
-            data['Nom du Produit en Français'].str.contains(
-                product_name, case=False, na=False
-            )
-        ].head(5)
+        row_ids = get_search_index(data).fuzzy_search(product_name, limit=5)
         
-        if len(results) == 0:
+        if len(row_ids) == 0:
             return f"Aucun produit trouvé pour '{product_name}'"
         
+        # Meilleure alternative de chaque produit, en un seul appel
+        alternatives = get_recommendation_engine(data).get_alternatives(row_ids, k=1)
+        best = dict(zip(alternatives['source'], alternatives['Alternative']))
+        best_impacts = dict(zip(alternatives['source'], alternatives['Impact alternative']))
+        
+        names = data['Nom du Produit en Français'].to_numpy()
+        impacts = data['Changement climatique'].to_numpy()
+        
         info = f"Produits trouvés pour '{product_name}':\n"
-        for _, row in results.iterrows():
-            info += f"- {row['Nom du Produit en Français']}: {row['Changement climatique']:.2f} kg CO2\n"
+        for row_id in row_ids.tolist():
+            info += f"- {names[row_id]}: {impacts[row_id]:.2f} kg CO2"
+            if row_id in best:
+                info += f" (alternative : {best[row_id]}, {best_impacts[row_id]:.2f} kg CO2)"
+            info += "\n"
         
         return info
     
@@ -90,6 +141,97 @@ Règles :
         Returns:
             Réponse de l'assistant
         """
+        messages = self._build_messages(user_message, product_context)
+        
+        # Réponse déjà connue pour la même conversation
+        cache_key = make_cache_key(self.model, messages, product_context)
+        cached = self.cache.get(cache_key) if self.cache is not None else None
+        if cached is not None:
+            self._save_exchange(user_message, cached)
+            return cached
+        
+        # Appel API OpenAI (pool partagé, avec reprises)
+        with timer('llm.request', modele=self.model, mode='complet'):
+            response = self.client.complete(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=500
+            )
+        
+        assistant_message = response.choices[0].message.content or ""
+        self._record_usage(assistant_message, getattr(response, 'usage', None))
+        
+        # Une réponse vide n'est ni mise en cache ni gardée dans l'historique
+        if assistant_message:
+            if self.cache is not None:
+                self.cache.set(cache_key, assistant_message)
+            self._save_exchange(user_message, assistant_message)
+        
+        return assistant_message
+    
+    def chat_stream(self, user_message: str, product_context: str = "") -> Iterator[str]:
+        """
+        Variante de chat qui renvoie la réponse morceau par morceau, au fur
+        et à mesure de sa génération.
+        
+        L'historique n'est mis à jour qu'une fois le flux entièrement lu :
+        un flux interrompu ne laisse pas de réponse partielle dans la
+        conversation.
+        
+        Args:
+            user_message: Message de l'utilisateur
+            product_context: Contexte additionnel sur les produits
+            
+        Yields:
+            Fragments de texte de la réponse de l'assistant
+        """
+        messages = self._build_messages(user_message, product_context)
+        
+        # Une réponse en cache est renvoyée d'un seul bloc
+        cache_key = make_cache_key(self.model, messages, product_context)
+        cached = self.cache.get(cache_key) if self.cache is not None else None
+        if cached is not None:
+            yield cached
+            self._save_exchange(user_message, cached)
+            return
+        
+        start = time.perf_counter()
+        stream = self.client.stream(
+            model=self.model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=500
+        )
+        
+        parts = []
+        for delta in stream:
+            if not parts:
+                observe('llm.first_token', time.perf_counter() - start, modele=self.model)
+            parts.append(delta)
+            yield delta
+        observe('llm.request', time.perf_counter() - start, modele=self.model, mode='flux')
+        
+        assistant_message = "".join(parts)
+        self._record_usage(assistant_message)
+        # Une réponse vide n'est ni mise en cache ni gardée dans l'historique
+        if not assistant_message:
+            return
+        if self.cache is not None:
+            self.cache.set(cache_key, assistant_message)
+        self._save_exchange(user_message, assistant_message)
+    
+    def _build_messages(self, user_message: str, product_context: str = "") -> List[Dict]:
+        """
+        Construit la liste des messages envoyés à l'API.
+        
+        Args:
+            user_message: Message de l'utilisateur
+            product_context: Contexte additionnel sur les produits
+            
+        Returns:
+            Messages système, historique et message utilisateur
+        """
         # Ajouter le contexte produit si fourni
         if product_context:
             system_prompt = self.create_system_prompt(product_context)
@@ -101,25 +243,38 @@ Règles :
         messages.extend(self.conversation_history)
         messages.append({"role": "user", "content": user_message})
         
-        # Appel API OpenAI
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        assistant_message = response.choices[0].message.content
-        
-        # Sauvegarder l'historique
-        self.conversation_history.append({"role": "user", "content": user_message})
-        self.conversation_history.append({"role": "assistant", "content": assistant_message})
-        
-        return assistant_message
+        # Statistiques de la requête
+        self.last_request_stats = {
+            'tokens_envoyes': sum(
+                count_tokens(message["content"], self.model) + MESSAGE_OVERHEAD
+                for message in messages
+            ),
+            **self.history.stats(),
+        }
+        return messages
+    
+    def _record_usage(self, assistant_message: str, usage=None):
+        """
+        Comptabilise les tokens d'une requête (utils.metrics) : ceux
+        facturés par l'API si elle les renvoie, sinon une estimation.
+        """
+        if not is_enabled():
+            return
+        if usage is not None and getattr(usage, 'prompt_tokens', None) is not None:
+            sent, received = usage.prompt_tokens, usage.completion_tokens
+        else:
+            sent = self.last_request_stats.get('tokens_envoyes', 0)
+            received = count_tokens(assistant_message or "", self.model)
+        increment('llm.tokens', sent, sens='envoyes', modele=self.model)
+        increment('llm.tokens', received, sens='recus', modele=self.model)
+    
+    def _save_exchange(self, user_message: str, assistant_message: str):
+        """Ajoute un échange question/réponse à l'historique"""
+        self.history.add_exchange(user_message, assistant_message)
     
     def reset_conversation(self):
         """Réinitialise l'historique de conversation"""
-        self.conversation_history = []
+        self.history.reset()
 
 
 # Test si exécuté directement
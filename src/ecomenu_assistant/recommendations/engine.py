@@ -0,0 +1,174 @@
+"""
+Moteur de recommandation d'alternatives bas carbone
+"""
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence
+
+from ecomenu_assistant.data.loader import get_shared_resource
+
+NAME_COLUMN = 'Nom du Produit en Français'
+GROUP_COLUMN = "Groupe d'aliment"
+SUBGROUP_COLUMN = "Sous-groupe d'aliment"
+IMPACT_COLUMN = 'Changement climatique'
+
+
+class RecommendationEngine:
+    """
+    Table précalculée des meilleures alternatives de chaque produit.
+
+    Pour chaque produit, les k produits du même sous-groupe ayant le plus
+    faible impact carbone (strictement inférieur au sien) sont calculés au
+    chargement ; si le sous-groupe n'en compte pas assez, la liste est
+    complétée avec ceux du même groupe. Les résultats sont stockés dans un
+    tableau NumPy (n_produits x k) : une recommandation est une simple
+    lecture de ligne.
+
+    Les produits sont désignés par leur position (iloc) dans le DataFrame,
+    comme pour la recherche (voir data.search).
+    """
+
+    def __init__(self, data: pd.DataFrame, k: int = 5):
+        """
+        Précalcule la table des alternatives.
+
+        Args:
+            data: DataFrame AGRIBALYSE
+            k: Nombre d'alternatives conservées par produit
+        """
+        self.data = data
+        self.k = k
+        self.impacts = data[IMPACT_COLUMN].to_numpy(dtype=np.float64)
+        self.group_codes, _ = pd.factorize(data[GROUP_COLUMN])
+        self.subgroup_codes, _ = pd.factorize(
+            data[GROUP_COLUMN].astype(str) + '|' + data[SUBGROUP_COLUMN].astype(str)
+        )
+
+        # -1 signale l'absence d'alternative
+        self.alternatives = np.full((len(data), k), -1, dtype=np.int32)
+        self._fill_subgroups()
+        self._fill_groups()
+
+    def _sorted_categories(self, codes: np.ndarray) -> list:
+        """Produits de chaque catégorie, triés par impact croissant"""
+        order = np.lexsort((self.impacts, codes))
+        order = order[codes[order] >= 0]
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        return np.split(order, boundaries)
+
+    def _fill_subgroups(self):
+        """Meilleures alternatives dans le même sous-groupe (vectorisé)"""
+        k = self.k
+        for members in self._sorted_categories(self.subgroup_codes):
+            best = members[:k]
+            # Les meilleurs étant triés, les alternatives valides d'un
+            # produit (impact strictement inférieur) forment un préfixe
+            lower = self.impacts[best][None, :] < self.impacts[members][:, None]
+            counts = lower.sum(axis=1)
+
+            table = np.full((len(members), k), -1, dtype=np.int32)
+            table[:, :len(best)] = best
+            table[np.arange(k)[None, :] >= counts[:, None]] = -1
+            self.alternatives[members] = table
+
+    def _fill_groups(self):
+        """Complète avec le même groupe les produits à qui il manque des alternatives"""
+        k = self.k
+        for members in self._sorted_categories(self.group_codes):
+            # k alternatives déjà connues au plus, plus le produit lui-même
+            best = members[:2 * k + 1].tolist()
+            targets = members[(self.alternatives[members] < 0).any(axis=1)]
+
+            for row in targets.tolist():
+                current = self.alternatives[row]
+                filled = int((current >= 0).sum())
+                known = set(current[:filled].tolist())
+                for candidate in best:
+                    if filled == k or self.impacts[candidate] >= self.impacts[row]:
+                        break
+                    if candidate not in known:
+                        current[filled] = candidate
+                        filled += 1
+
+    def best_alternatives(self, row_ids: Sequence[int]) -> np.ndarray:
+        """
+        Meilleure alternative de chaque produit demandé.
+
+        Args:
+            row_ids: Positions (iloc) des produits
+
+        Returns:
+            Positions des meilleures alternatives (-1 si aucune)
+        """
+        return self.alternatives[np.asarray(row_ids, dtype=np.int64), 0]
+
+    def get_alternatives(self, row_ids: Sequence[int],
+                         k: Optional[int] = None) -> pd.DataFrame:
+        """
+        Alternatives de plusieurs produits en un seul appel.
+
+        Args:
+            row_ids: Positions (iloc) des produits
+            k: Nombre d'alternatives par produit (au plus celui de la table)
+
+        Returns:
+            DataFrame avec une ligne par couple (produit, alternative) :
+            'source', 'rang', 'alternative', 'Produit', 'Alternative',
+            'Impact produit', 'Impact alternative', 'Économie', 'Même sous-groupe'
+        """
+        k = self.k if k is None else min(k, self.k)
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+
+        table = self.alternatives[row_ids, :k]
+        sources = np.repeat(row_ids, k)
+        ranks = np.tile(np.arange(1, k + 1), len(row_ids))
+        alternatives = table.ravel()
+
+        found = alternatives >= 0
+        sources, ranks, alternatives = sources[found], ranks[found], alternatives[found]
+
+        names = self.data[NAME_COLUMN].to_numpy()
+        source_impacts = self.impacts[sources]
+        alternative_impacts = self.impacts[alternatives]
+
+        return pd.DataFrame({
+            'source': sources,
+            'rang': ranks,
+            'alternative': alternatives,
+            'Produit': names[sources],
+            'Alternative': names[alternatives],
+            'Impact produit': source_impacts,
+            'Impact alternative': alternative_impacts,
+            'Économie': source_impacts - alternative_impacts,
+            'Même sous-groupe': self.subgroup_codes[sources] == self.subgroup_codes[alternatives],
+        })
+
+
+def get_recommendation_engine(data: Optional[pd.DataFrame] = None) -> RecommendationEngine:
+    """
+    Retourne le moteur de recommandation, partagé entre les sessions pour
+    les données partagées (voir get_shared_data).
+
+    Args:
+        data: DataFrame AGRIBALYSE. Si None, utilise les données partagées.
+
+    Returns:
+        Moteur de recommandation
+    """
+    return get_shared_resource('recommendation_engine', RecommendationEngine, data)
+
+
+# Test des fonctions si exécuté directement
+if __name__ == "__main__":
+    import time
+    from ecomenu_assistant.data.loader import get_shared_data
+    from ecomenu_assistant.data.search import get_search_index
+
+    data = get_shared_data()
+
+    start = time.perf_counter()
+    engine = get_recommendation_engine(data)
+    print(f"Table construite en {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    row_ids = get_search_index(data).search("boeuf", limit=3)
+    print(engine.get_alternatives(row_ids, k=3)[['Produit', 'Alternative', 'Économie']])
@@ -0,0 +1,392 @@
+"""
+Optimisation de menus hebdomadaires bas carbone
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ecomenu_assistant.data.loader import get_shared_resource
+from ecomenu_assistant.data.search import normalize_text, tokens
+
+NAME_COLUMN = 'Nom du Produit en Français'
+SUBGROUP_COLUMN = "Sous-groupe d'aliment"
+IMPACT_COLUMN = 'Changement climatique'
+
+JOURS = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+REPAS = ['Déjeuner', 'Dîner']
+
+# Mots (normalisés) d'un nom de produit indiquant qu'il est prêt à manger
+MOTS_CUISSON = frozenset({
+    'cuit', 'cuite', 'cuits', 'cuites', 'bouilli', 'bouillie', 'appertise', 'appertisee',
+    'egoutte', 'egouttee', 'egouttes', 'rehydratee', 'cuisine', 'cuisinee', 'poele',
+    'poelee', 'roti', 'rotie', 'four', 'vapeur', 'puree', 'reconstituee',
+})
+PRODUIT_CRU = frozenset({'cru', 'crue', 'crus', 'crues'})
+
+# Composantes d'un repas : sous-groupes autorisés, portion en grammes et
+# produits écartés car ils ne se servent pas tels quels (mots normalisés) :
+# - interdits : toujours écartés (ingrédients, restauration rapide...) ;
+# - a_cuire : écartés sauf si le nom indique une cuisson (MOTS_CUISSON) ;
+# - crus_a_cuire : premier mot des produits écartés quand ils sont crus.
+# `minimum` : portions par semaine d'un sous-groupe quand il est autorisé
+# (poisson deux fois par semaine, repères du PNNS).
+COMPOSANTES = {
+    'Protéines': {
+        'sous_groupes': ['viandes cuites', 'poissons cuits', 'mollusques et crustacés cuits',
+                         'œufs', 'légumineuses', 'substituts de viande'],
+        'portion': 120,
+        'a_cuire': {'cru', 'crue', 'sec', 'seche', 'surgele', 'surgelee', 'germee',
+                    'texturee', 'graine', 'farine', 'poudre'},
+        'minimum': {'poissons cuits': 2},
+    },
+    'Féculent': {
+        'sous_groupes': ['pâtes, riz et céréales', 'pommes de terre et autres tubercules',
+                         'pains et viennoiseries'],
+        'portion': 150,
+        'a_cuire': {'cru', 'crue', 'sec', 'seche', 'seches', 'surgelee', 'surgelees',
+                    'farine', 'flocon', 'flocons'},
+    },
+    'Légume': {
+        'sous_groupes': ['légumes'],
+        'portion': 200,
+        'a_cuire': {'surgele', 'surgelee', 'sec', 'seche', 'deshydrate', 'deshydratee'},
+        'crus_a_cuire': {'ail', 'echalote', 'oignon', 'aubergine', 'salsifis', 'panais',
+                         'rutabaga', 'crosne', 'courge', 'potiron', 'citrouille',
+                         'potimarron', 'haricot', 'poireau', 'bette', 'oseille',
+                         'artichaut', 'asperge', 'topinambour', 'pomme'},
+    },
+    'Produit laitier': {
+        'sous_groupes': ['fromages', 'produits laitiers frais et assimilés'],
+        'portion': 100,
+        'interdits': {'fast', 'patissiere', 'poudre'},
+    },
+    'Fruit': {
+        'sous_groupes': ['fruits'],
+        'portion': 150,
+        'interdits': {'zeste', 'immature', 'citron', 'lime', 'rhubarbe', 'coing'},
+        'a_cuire': {'sec', 'seche', 'deshydrate', 'deshydratee'},
+    },
+}
+
+# Sous-groupes exclus des menus végétariens
+SOUS_GROUPES_CARNES = ['viandes cuites', 'poissons cuits', 'mollusques et crustacés cuits']
+
+# code saison : 0 = hors saison, 1 = de saison, 2 = non concerné
+CODE_HORS_SAISON = 0
+# code avion : 1 = produit importé par avion
+CODE_AVION = 1
+
+
+class MenuOptimizer:
+    """
+    Construit des menus hebdomadaires minimisant l'impact carbone.
+
+    Chaque repas comporte une portion de chaque composante (protéines,
+    féculent, légume, produit laitier, fruit), choisie parmi les produits
+    prêts à manger des sous-groupes correspondants (pas de légumineuses
+    sèches ni de céréales crues, voir COMPOSANTES). Contraintes :
+    - saison : pas de produit hors saison (code saison ; AGRIBALYSE ne le
+      renseigne que pour quelques produits, le filtre écarte donc peu) ;
+    - transport : pas de produit importé par avion (code avion) ;
+    - régime : hors menu végétarien, les portions minimales de COMPOSANTES
+      (poisson deux fois par semaine) ;
+    - couverture : sur la semaine, chaque composante puise dans au moins
+      `min_subgroups` sous-groupes différents (œufs, légumineuses, poisson...) ;
+    - variété : un produit au plus `max_repeats` fois par semaine, jamais
+      deux jours de suite ni deux fois le même jour.
+
+    Les composantes n'ont aucun produit en commun : chacune est optimisée
+    séparément. Une solution gloutonne (produits les moins émetteurs
+    d'abord) est réparée pour couvrir les sous-groupes manquants au moindre
+    surcoût, puis améliorée par recherche locale (remplacements qui
+    réduisent l'impact sans violer de contrainte).
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        """
+        Prépare les produits candidats de chaque composante.
+
+        Args:
+            data: DataFrame AGRIBALYSE (format de load_agribalyse_data)
+        """
+        self.data = data
+        self.names = data[NAME_COLUMN].to_numpy()
+        self.subgroups = data[SUBGROUP_COLUMN].astype(str).to_numpy()
+        self.impacts = data[IMPACT_COLUMN].to_numpy(dtype=np.float64)
+        self.out_of_season = data['code saison'].to_numpy() == CODE_HORS_SAISON
+        self.air_freighted = data['code avion'].to_numpy() == CODE_AVION
+
+        usable = np.isfinite(self.impacts)
+        self.candidates: Dict[str, np.ndarray] = {}
+        for composante, config in COMPOSANTES.items():
+            row_ids = np.flatnonzero(usable & np.isin(self.subgroups, config['sous_groupes']))
+            row_ids = row_ids[[self._ready_to_eat(row_id, config) for row_id in row_ids.tolist()]]
+            # Du moins émetteur au plus émetteur
+            self.candidates[composante] = row_ids[np.argsort(self.impacts[row_ids], kind='stable')]
+
+    def _ready_to_eat(self, row_id: int, config: dict) -> bool:
+        """Produit servi tel quel dans une composante (voir COMPOSANTES)"""
+        words = tokens(normalize_text(str(self.names[row_id])))
+        if not words:
+            return False
+        found = set(words)
+        if found & config.get('interdits', set()):
+            return False
+        if found & MOTS_CUISSON:
+            return True
+        if found & config.get('a_cuire', set()):
+            return False
+        return not (words[0] in config.get('crus_a_cuire', set()) and found & PRODUIT_CRU)
+
+    def _allowed(self, row_ids: np.ndarray, seasonal: bool, no_air: bool,
+                 vegetarian: bool, excluded: set) -> np.ndarray:
+        """Filtre les candidats selon les contraintes de saison, transport et régime"""
+        keep = np.ones(len(row_ids), dtype=bool)
+        if seasonal:
+            keep &= ~self.out_of_season[row_ids]
+        if no_air:
+            keep &= ~self.air_freighted[row_ids]
+        if vegetarian:
+            keep &= ~np.isin(self.subgroups[row_ids], SOUS_GROUPES_CARNES)
+        if excluded:
+            keep &= ~np.isin(row_ids, list(excluded))
+        return row_ids[keep]
+
+    def _select(self, candidates: np.ndarray, n_slots: int, max_repeats: int,
+                min_subgroups: int, minimum: Optional[Dict[str, int]] = None) -> Counter:
+        """
+        Choisit les n_slots produits (avec répétitions) d'une composante.
+
+        Args:
+            candidates: Produits autorisés, du moins au plus émetteur
+            n_slots: Nombre de portions à servir dans la semaine
+            max_repeats: Répétitions maximales d'un produit
+            min_subgroups: Nombre minimum de sous-groupes distincts
+            minimum: Nombre minimum de portions par sous-groupe
+
+        Returns:
+            Nombre de portions de chaque produit choisi (positions iloc)
+        """
+        if len(candidates) * max_repeats < n_slots:
+            raise ValueError("Pas assez de produits autorisés pour remplir le menu")
+
+        # Portions minimales des sous-groupes imposés, si des produits les permettent
+        floors = Counter()
+        for subgroup, portions in (minimum or {}).items():
+            available = int((self.subgroups[candidates] == subgroup).sum()) * max_repeats
+            floors[subgroup] = min(portions, available, n_slots)
+
+        # 1. Glouton : les produits les moins émetteurs, max_repeats fois
+        # chacun, en commençant par les portions imposées
+        counts = Counter()
+        for subgroup, portions in floors.items():
+            for row_id in candidates[self.subgroups[candidates] == subgroup].tolist():
+                take = min(max_repeats, portions - sum(counts[r] for r in counts
+                                                       if self.subgroups[r] == subgroup))
+                if take <= 0:
+                    break
+                counts[row_id] = take
+        for row_id in candidates.tolist():
+            take = min(max_repeats - counts[row_id], n_slots - sum(counts.values()))
+            if take > 0:
+                counts[row_id] += take
+
+        # Nombre de portions d'un sous-groupe en dessous duquel on ne descend pas
+        def floor(subgroup: str) -> int:
+            return max(1, floors[subgroup])
+
+        # 2. Réparation : ajouter les sous-groupes manquants au moindre surcoût
+        available_subgroups = set(self.subgroups[candidates].tolist())
+        target = min(min_subgroups, len(available_subgroups), n_slots)
+        while len({self.subgroups[r] for r in counts}) < target:
+            covered = Counter(self.subgroups[r] for r in counts.elements())
+            # Portion retirée : la plus émettrice parmi les sous-groupes servis plusieurs fois
+            removable = [r for r in counts if covered[self.subgroups[r]] > floor(self.subgroups[r])]
+            worst = max(removable, key=lambda r: self.impacts[r])
+            # Portion ajoutée : le produit le moins émetteur d'un sous-groupe non couvert
+            best = next(r for r in candidates.tolist() if self.subgroups[r] not in covered)
+            counts[worst] -= 1
+            if counts[worst] == 0:
+                del counts[worst]
+            counts[best] += 1
+
+        # 3. Recherche locale : remplacer une portion par une moins émettrice
+        improved = True
+        while improved:
+            improved = False
+            covered = Counter(self.subgroups[r] for r in counts.elements())
+            for worst in sorted(counts, key=lambda r: -self.impacts[r]):
+                keeps_coverage = covered[self.subgroups[worst]] > floor(self.subgroups[worst])
+                for row_id in candidates.tolist():
+                    if self.impacts[row_id] >= self.impacts[worst]:
+                        break
+                    if counts[row_id] >= max_repeats:
+                        continue
+                    if not keeps_coverage and self.subgroups[row_id] != self.subgroups[worst]:
+                        continue
+                    counts[worst] -= 1
+                    if counts[worst] == 0:
+                        del counts[worst]
+                    counts[row_id] += 1
+                    improved = True
+                    break
+                if improved:
+                    break
+
+        return counts
+
+    def _schedule(self, counts: Counter, days: int) -> List[int]:
+        """
+        Répartit les portions sur les repas : un produit n'est servi ni deux
+        fois le même jour, ni deux jours de suite.
+
+        Args:
+            counts: Nombre de portions de chaque produit (voir _select)
+            days: Nombre de jours
+
+        Returns:
+            Produit de chaque repas, jour par jour (déjeuner puis dîner)
+        """
+        remaining = Counter(counts)
+        last_day: Dict[int, int] = {}
+        plan: List[int] = []
+
+        def place(slot: int) -> bool:
+            if slot == days * len(REPAS):
+                return True
+            day = slot // len(REPAS)
+            # Produits les plus servis d'abord, les moins émetteurs à égalité
+            for row_id in sorted(remaining, key=lambda r: (-remaining[r], self.impacts[r], r)):
+                previous = last_day.get(row_id)
+                if remaining[row_id] == 0 or (previous is not None and day - previous <= 1):
+                    continue
+                remaining[row_id] -= 1
+                last_day[row_id] = day
+                plan.append(row_id)
+                if place(slot + 1):
+                    return True
+                plan.pop()
+                remaining[row_id] += 1
+                if previous is None:
+                    del last_day[row_id]
+                else:
+                    last_day[row_id] = previous
+            return False
+
+        if not place(0):
+            raise ValueError("Impossible de répartir les produits sans les servir deux jours de suite")
+        return plan
+
+    def plan(self, days: int = 7, seasonal: bool = True, no_air: bool = True,
+             vegetarian: bool = False, max_repeats: int = 2, min_subgroups: int = 3,
+             exclude: Optional[Iterable[int]] = None,
+             composantes: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Construit un menu (déjeuner et dîner) pour plusieurs jours.
+
+        Args:
+            days: Nombre de jours (7 au maximum)
+            seasonal: Exclure les produits hors saison
+            no_air: Exclure les produits importés par avion
+            vegetarian: Exclure viandes, poissons et fruits de mer
+            max_repeats: Nombre maximum de fois où un produit est servi (au
+                plus days // 2 fois)
+            min_subgroups: Nombre minimum de sous-groupes distincts par composante
+            exclude: Positions (iloc) de produits à ne pas proposer
+            composantes: Composantes de chaque repas (toutes par défaut)
+
+        Returns:
+            DataFrame avec une ligne par portion : 'Jour', 'Repas',
+            'Composante', 'produit' (iloc), 'Produit', 'Sous-groupe',
+            'Quantité (g)' et 'Impact (kg CO2 eq)'
+        """
+        if not 1 <= days <= len(JOURS):
+            raise ValueError(f"days doit être compris entre 1 et {len(JOURS)}")
+        # Jamais deux jours de suite : au plus un jour sur deux, sans compter
+        # le dernier jour d'une durée impaire (sinon tous les produits les plus
+        # répétés tombent les mêmes jours, faute de place)
+        max_repeats = min(max_repeats, max(1, days // 2))
+        excluded = set(exclude or [])
+        composantes = list(composantes or COMPOSANTES)
+
+        meals = [(day, repas) for day in range(days) for repas in REPAS]
+
+        rows = []
+        for composante in composantes:
+            config = COMPOSANTES[composante]
+            candidates = self._allowed(
+                self.candidates[composante], seasonal, no_air, vegetarian, excluded
+            )
+            # Portions minimales ramenées au nombre de jours
+            minimum = {subgroup: round(portions * days / len(JOURS))
+                       for subgroup, portions in config.get('minimum', {}).items()}
+            counts = self._select(candidates, len(meals), max_repeats, min_subgroups, minimum)
+            chosen = self._schedule(counts, days)
+            portion = config['portion']
+            for (day, repas), row_id in zip(meals, chosen):
+                rows.append((day, REPAS.index(repas), JOURS[day], repas, composante,
+                             row_id, portion))
+
+        menu = pd.DataFrame(rows, columns=['jour', 'repas', 'Jour', 'Repas', 'Composante',
+                                           'produit', 'Quantité (g)'])
+        menu['Produit'] = self.names[menu['produit']]
+        menu['Sous-groupe'] = self.subgroups[menu['produit']]
+        menu['Impact (kg CO2 eq)'] = self.impacts[menu['produit']] * menu['Quantité (g)'] / 1000
+        menu = menu.sort_values(['jour', 'repas'], kind='stable').drop(columns=['jour', 'repas'])
+        return menu[['Jour', 'Repas', 'Composante', 'produit', 'Produit', 'Sous-groupe',
+                     'Quantité (g)', 'Impact (kg CO2 eq)']].reset_index(drop=True)
+
+
+def summarize_menu(menu: pd.DataFrame) -> Dict[str, float]:
+    """
+    Résume l'impact d'un menu construit par MenuOptimizer.plan.
+
+    Args:
+        menu: Menu à résumer
+
+    Returns:
+        Dict avec 'total', 'par_jour', 'par_repas' (kg CO2 eq) et
+        'produits_distincts'
+    """
+    total = float(menu['Impact (kg CO2 eq)'].sum())
+    n_days = menu['Jour'].nunique()
+    n_meals = len(menu[['Jour', 'Repas']].drop_duplicates())
+    return {
+        'total': round(total, 3),
+        'par_jour': round(total / n_days, 3) if n_days else 0.0,
+        'par_repas': round(total / n_meals, 3) if n_meals else 0.0,
+        'produits_distincts': int(menu['produit'].nunique()),
+    }
+
+
+def get_menu_optimizer(data: Optional[pd.DataFrame] = None) -> MenuOptimizer:
+    """
+    Retourne l'optimiseur de menus, partagé entre les sessions pour les
+    données partagées (voir get_shared_data).
+
+    Args:
+        data: DataFrame AGRIBALYSE. Si None, utilise les données partagées.
+
+    Returns:
+        Optimiseur de menus
+    """
+    return get_shared_resource('menu_optimizer', MenuOptimizer, data)
+
+
+# Test des fonctions si exécuté directement
+if __name__ == "__main__":
+    import time
+    from ecomenu_assistant.data.loader import get_shared_data
+
+    data = get_shared_data()
+    optimizer = get_menu_optimizer(data)
+
+    start = time.perf_counter()
+    menu = optimizer.plan()
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(menu[menu['Jour'] == 'Lundi'][['Repas', 'Composante', 'Produit', 'Impact (kg CO2 eq)']])
+    print(f"Menu de la semaine calculé en {elapsed:.1f} ms : {summarize_menu(menu)}")
+    print("Menu végétarien :", summarize_menu(optimizer.plan(vegetarian=True)))
@@ -0,0 +1,350 @@
+"""
+Calculateur d'impact environnemental de recettes et de menus
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ecomenu_assistant.data.loader import (
+    COLONNES_INDICATEURS,
+    get_shared_data,
+    get_shared_resource,
+)
+from ecomenu_assistant.data.search import (
+    accented_tokens,
+    get_search_index,
+    normalize_text,
+    singularize,
+    tokens,
+)
+
+NAME_COLUMN = 'Nom du Produit en Français'
+IMPACT_COLUMN = 'Changement climatique'
+
+# Ingrédients mémorisés par calculateur (les plus anciens sont oubliés)
+RESOLVED_CACHE_SIZE = int(os.getenv('ECOMENU_RECIPE_CACHE_SIZE', 20_000))
+
+# Produit retenu pour les ingrédients usuels trop vagues pour être départagés
+# par le classement ("farine" : de blé plutôt que de riz). Textes normalisés.
+INGREDIENTS_USUELS = {
+    'farine': 'farine de ble tendre',
+    'lait': 'lait demi ecreme',
+    'beurre': 'beurre doux',
+    'pates': 'pates seches standard',
+    'riz': 'riz blanc',
+    'sucre': 'sucre blanc',
+    'sel': 'sel blanc alimentaire',
+    'sel fin': 'sel blanc alimentaire',
+    'huile': 'huile d olive',
+    'creme': 'creme de lait',
+    'creme fraiche': 'creme de lait',
+    'jambon': 'jambon cuit choix',
+    'jambon blanc': 'jambon cuit choix',
+    'pain': 'pain baguette courante',
+    'baguette': 'pain baguette courante',
+    'yaourt': 'yaourt nature',
+    'fromage blanc': 'fromage blanc nature',
+}
+
+# Mots de liaison : "Beurre de cacao", "Sel au céleri" sont d'autres produits
+CONNECTEURS = frozenset({
+    'a', 'au', 'aux', 'de', 'd', 'du', 'des', 'en', 'et', 'ou',
+    'la', 'le', 'les', 'l', 'sur', 'avec', 'sans', 'pour', 'par',
+})
+# Précisions qui ne font pas un autre produit ("Beurre à 82% MG")
+QUALIFICATIFS = frozenset({'mg'})
+PRODUIT_CRU = frozenset({'cru', 'crue'})
+
+
+def _singular_words(text: str) -> List[str]:
+    """Mots au singulier d'un texte normalisé"""
+    return [singularize(token) for token in tokens(text)]
+
+
+def _accented_words(text: str) -> List[str]:
+    """Mots au singulier d'un texte en minuscules, accents conservés"""
+    return [singularize(word) for word in accented_tokens(text)]
+
+
+# Une recette : liste de couples (ingrédient, quantité en grammes)
+Recipe = Sequence[Tuple[str, float]]
+
+
+class RecipeCalculator:
+    """
+    Calcule les impacts de recettes à partir de leurs ingrédients.
+
+    Chaque ingrédient est associé au produit AGRIBALYSE le plus proche
+    (voir resolve) ; le résultat est mémorisé, si bien qu'un ingrédient
+    présent dans plusieurs recettes n'est recherché qu'une fois.
+    Les impacts (par kg) de tous les ingrédients d'un lot de recettes sont
+    ensuite pondérés par les quantités et sommés par recette en une seule
+    opération vectorisée.
+    """
+
+    def __init__(self, data: pd.DataFrame, columns: Optional[Sequence[str]] = None):
+        """
+        Args:
+            data: DataFrame AGRIBALYSE (mode étendu pour avoir les 16 indicateurs)
+            columns: Indicateurs à calculer. Par défaut, tous les indicateurs
+                EF présents dans les données.
+        """
+        if columns is None:
+            columns = [col for col in COLONNES_INDICATEURS if col in data.columns]
+        self.data = data
+        self.columns = list(columns)
+        self.impacts = np.nan_to_num(data[self.columns].to_numpy(dtype=np.float64))
+        self.names = data[NAME_COLUMN].to_numpy()
+        self._search_index = get_search_index(data)
+        self._resolved: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, ingredient: str) -> int:
+        """
+        Associe un ingrédient au produit AGRIBALYSE le plus proche.
+
+        Les mots de l'ingrédient doivent être des mots entiers du nom du
+        produit ("lait" ne trouve pas "Laitue"). Parmi les produits trouvés,
+        on préfère :
+        1. ceux dont le nom (avant la première virgule) commence par
+           l'ingrédient, sinon par son premier mot ;
+        2. les mêmes accents, si l'ingrédient en porte ("pâtes" / "pâté") ;
+        3. le produit lui-même plutôt qu'un composé ("Beurre de cacao") ou
+           un plat ("Poulet basquaise") : le moins de mots en plus ;
+        4. le produit cru, puis le nom le plus court.
+        Les ingrédients usuels trop vagues suivent INGREDIENTS_USUELS. Sans
+        résultat, on cherche les plus longues suites de mots de l'ingrédient
+        (libellés de tickets : "sel fin iodé"), puis on corrige les fautes
+        de frappe.
+
+        Args:
+            ingredient: Nom de l'ingrédient ("boeuf haché", "tomates"...)
+
+        Returns:
+            Position (iloc) du produit, ou -1 si aucun produit ne correspond
+        """
+        # Accents conservés : "pâte" et "pâté" sont des ingrédients différents
+        key = ' '.join(ingredient.casefold().split())
+        with self._lock:
+            row_id = self._resolved.get(key)
+            if row_id is not None:
+                self._resolved.move_to_end(key)
+                return row_id
+
+        row_id = self._match(ingredient)
+        with self._lock:
+            self._resolved[key] = row_id
+            if len(self._resolved) > RESOLVED_CACHE_SIZE:
+                self._resolved.popitem(last=False)
+        return row_id
+
+    def _match(self, ingredient: str) -> int:
+        """Voir resolve"""
+        words = tokens(normalize_text(ingredient))
+        accented = _accented_words(ingredient)
+        if len(accented) != len(words) or accented == [singularize(t) for t in words]:
+            accented = None  # pas d'accent à respecter
+
+        row_id = self._match_words(words, accented)
+        if row_id >= 0:
+            return row_id
+
+        # Fautes de frappe : chaque mot inconnu remplacé par son plus proche
+        # voisin connu (le plus fréquent à similarité égale)
+        index = self._search_index
+        corrected = []
+        for token in words:
+            matches = index.match_token(token)
+            if matches:
+                token_id = max(matches, key=lambda token_id: (
+                    matches[token_id], len(index.word_rows(index.vocabulary[token_id]))
+                ))
+                token = index.vocabulary[token_id]
+            corrected.append(token)
+        return self._match_words(corrected, None) if corrected != words else -1
+
+    def _match_words(self, tokens: List[str], accented: Optional[List[str]]) -> int:
+        """Plus longue suite de mots associée à un produit (la plus à gauche d'abord)"""
+        for length in range(len(tokens), 0, -1):
+            for start in range(len(tokens) - length + 1):
+                stop = start + length
+                row_id = self._best_product(tokens[start:stop],
+                                            accented[start:stop] if accented else None)
+                if row_id >= 0:
+                    return row_id
+        return -1
+
+    def _best_product(self, tokens: List[str], accented: Optional[List[str]]) -> int:
+        """Meilleur produit contenant tous les mots (voir resolve), -1 si aucun"""
+        words = [singularize(token) for token in tokens]
+        usual = (INGREDIENTS_USUELS.get(' '.join(tokens))
+                 or INGREDIENTS_USUELS.get(' '.join(words)))
+        if usual is not None:
+            words, accented = _singular_words(usual), None
+
+        index = self._search_index
+        candidates = None
+        for word in sorted(set(words), key=lambda w: len(index.word_rows(w))):
+            rows = index.word_rows(word)
+            candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+            if len(candidates) == 0:
+                return -1
+
+        best_key, best_row = None, -1
+        for row_id in candidates.tolist():
+            key = self._rank(row_id, words, accented)
+            if best_key is None or key < best_key:
+                best_key, best_row = key, row_id
+        return best_row
+
+    def _rank(self, row_id: int, words: List[str], accented: Optional[List[str]]) -> tuple:
+        """Clé de classement d'un produit candidat (la plus petite l'emporte)"""
+        name = self._search_index.names[row_id]
+        head = _singular_words(name.split(',', 1)[0])
+        if head[:len(words)] == words:
+            level, rest = 0, head[len(words):]
+        elif head[:1] == words[:1]:
+            level, rest = 1, [word for word in head[1:] if word not in words]
+        else:
+            level, rest = 2, [word for word in head if word not in words]
+
+        compound = any(
+            word in CONNECTEURS and following.isalpha() and following not in CONNECTEURS
+            for word, following in zip(rest, rest[1:])
+        )
+        extra = sum(word.isalpha() and word not in CONNECTEURS and word not in QUALIFICATIFS
+                    for word in rest)
+        raw = not PRODUIT_CRU.isdisjoint(_singular_words(name))
+        accents = 0
+        if accented is not None:
+            accents = len(set(accented) - set(_accented_words(str(self.names[row_id]))))
+        return level, accents, compound, extra, not raw, len(name), row_id
+
+    def resolve_ingredients(self, ingredients: Sequence[str]) -> pd.DataFrame:
+        """
+        Montre le produit retenu pour chaque ingrédient.
+
+        Args:
+            ingredients: Noms des ingrédients
+
+        Returns:
+            DataFrame avec 'Ingrédient', 'Produit' et 'Changement climatique'
+            (produit vide si l'ingrédient n'a pas été trouvé)
+        """
+        row_ids = np.array([self.resolve(name) for name in ingredients], dtype=np.int64)
+        found = row_ids >= 0
+        products = np.where(found, self.names[np.maximum(row_ids, 0)], None)
+        impacts = self.data[IMPACT_COLUMN].to_numpy(dtype=np.float64)[np.maximum(row_ids, 0)]
+        return pd.DataFrame({
+            'Ingrédient': list(ingredients),
+            'Produit': products,
+            IMPACT_COLUMN: np.where(found, impacts, np.nan),
+        })
+
+    def evaluate(self, recipes: Mapping[str, Recipe]) -> pd.DataFrame:
+        """
+        Calcule les impacts d'un lot de recettes.
+
+        Args:
+            recipes: Dict {nom de la recette: [(ingrédient, quantité en g), ...]}
+
+        Returns:
+            DataFrame indexé par recette avec 'Poids (g)', 'Ingrédients',
+            'Non trouvés', l'impact total de chaque indicateur et
+            'Impact CO2 par kg'
+        """
+        names = list(recipes)
+        recipe_ids: List[int] = []
+        row_ids: List[int] = []
+        quantities: List[float] = []
+        for recipe_id, name in enumerate(names):
+            for ingredient, quantity in recipes[name]:
+                recipe_ids.append(recipe_id)
+                row_ids.append(self.resolve(ingredient))
+                quantities.append(quantity)
+
+        recipe_ids = np.array(recipe_ids, dtype=np.int64)
+        row_ids = np.array(row_ids, dtype=np.int64)
+        kilograms = np.array(quantities, dtype=np.float64) / 1000
+        found = row_ids >= 0
+        n_recipes = len(names)
+
+        # Somme par recette des impacts pondérés par les quantités
+        weighted = self.impacts[row_ids[found]] * kilograms[found, None]
+        totals = np.column_stack([
+            np.bincount(recipe_ids[found], weights=weighted[:, col], minlength=n_recipes)
+            for col in range(len(self.columns))
+        ]) if len(self.columns) else np.zeros((n_recipes, 0))
+
+        weights = np.bincount(recipe_ids, weights=kilograms * 1000, minlength=n_recipes)
+        result = pd.DataFrame(totals, index=pd.Index(names, name='Recette'), columns=self.columns)
+        result.insert(0, 'Poids (g)', weights)
+        result.insert(1, 'Ingrédients', np.bincount(recipe_ids, minlength=n_recipes))
+        result.insert(2, 'Non trouvés', np.bincount(recipe_ids[~found], minlength=n_recipes))
+        if IMPACT_COLUMN in self.columns:
+            found_weights = np.bincount(
+                recipe_ids[found], weights=kilograms[found], minlength=n_recipes
+            )
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result['Impact CO2 par kg'] = np.where(
+                    found_weights > 0, result[IMPACT_COLUMN] / found_weights, np.nan
+                )
+        return result
+
+    def evaluate_menu(self, menu: Mapping[str, Recipe]) -> pd.Series:
+        """
+        Impact total d'un menu (somme de ses recettes).
+
+        Args:
+            menu: Dict {nom du plat: [(ingrédient, quantité en g), ...]}
+
+        Returns:
+            Series des totaux du menu
+        """
+        return self.evaluate(menu).drop(columns='Impact CO2 par kg', errors='ignore').sum()
+
+
+def get_recipe_calculator(data: Optional[pd.DataFrame] = None) -> RecipeCalculator:
+    """
+    Retourne le calculateur de recettes, partagé entre les sessions.
+
+    Args:
+        data: DataFrame AGRIBALYSE. Si None, utilise les données partagées
+            chargées en mode étendu (16 indicateurs).
+
+    Returns:
+        Calculateur de recettes
+    """
+    if data is None:
+        data = get_shared_data(extended=True)
+    return get_shared_resource('recipe_calculator', RecipeCalculator, data)
+
+
+# Test des fonctions si exécuté directement
+if __name__ == "__main__":
+    import random
+    import time
+
+    calculator = get_recipe_calculator()
+
+    recipes = {
+        "Lasagnes": [("boeuf haché", 300), ("pâtes", 250), ("tomate", 400), ("emmental", 100)],
+        "Chili sin carne": [("haricots rouges", 300), ("riz", 200), ("tomate", 300), ("oignon", 100)],
+    }
+    print(calculator.resolve_ingredients(["boeuf haché", "pâtes", "emmental", "haricots rouges"]))
+    print(calculator.evaluate(recipes)[['Poids (g)', IMPACT_COLUMN, 'Impact CO2 par kg']])
+
+    # Lot de recettes aléatoires (traitement par lots du planificateur de menus)
+    ingredients = ["boeuf", "poulet", "riz", "pâtes", "tomate", "carotte", "lentilles",
+                   "lait", "beurre", "oeuf", "pomme de terre", "saumon", "courgette"]
+    batch = {
+        f"recette {i}": [(random.choice(ingredients), random.randint(50, 400)) for _ in range(8)]
+        for i in range(5000)
+    }
+    start = time.perf_counter()
+    calculator.evaluate(batch)
+    print(f"{len(batch)} recettes en {(time.perf_counter() - start) * 1000:.1f} ms")
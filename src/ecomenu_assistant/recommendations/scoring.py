@@ -0,0 +1,269 @@
+"""
+Évaluation en lot de lignes de listes de courses et de tickets de caisse
+"""
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ecomenu_assistant.data.loader import get_shared_data
+from ecomenu_assistant.data.search import normalize_text, singularize, tokens
+from ecomenu_assistant.recommendations.engine import get_recommendation_engine
+from ecomenu_assistant.recommendations.recipes import RecipeCalculator, get_recipe_calculator
+
+NAME_COLUMN = 'Nom du Produit en Français'
+CODE_COLUMN = 'Code AGB'
+
+# Quantité écrite dans le libellé ("Steak haché 5% 2x125g", "Lait 1,5 L")
+QUANTITY_PATTERN = re.compile(
+    r'(?:(\d+)\s*[x×]\s*)?(\d+(?:[.,]\d+)?)\s*(kg|gr|g|l|cl|ml)\b', re.IGNORECASE
+)
+# Conversion en grammes (1 L compté comme 1 kg)
+UNITES_EN_GRAMMES = {'kg': 1000, 'g': 1, 'gr': 1, 'l': 1000, 'cl': 10, 'ml': 1}
+
+# Nombre d'articles sans unité de poids ("Oeufs x12", "Jambon 4 tranches",
+# "6 yaourts")
+COUNT_PATTERN = re.compile(
+    r'(?:\b[x×]\s*(\d+)\b|\b(\d+)\s*[x×](?!\w)'
+    r'|\b(\d+)\s*(tranches?|pots?|sachets?|pav[eé]s?|briques?|bouteilles?|canettes?|pi[eè]ces?)\b'
+    r'|^\s*(\d+)\s+(?=[^\W\d]))',
+    re.IGNORECASE
+)
+# Poids moyen d'un article (grammes) : conditionnement, sinon produit
+POIDS_UNITAIRES = {
+    'tranche': 40, 'pot': 125, 'brique': 1000, 'bouteille': 1000, 'canette': 330, 'pave': 125,
+    'oeuf': 60, 'yaourt': 125, 'baguette': 250, 'citron': 100, 'pomme': 150,
+    'banane': 120, 'avocat': 200, 'orange': 200, 'steak': 125, 'croissant': 60,
+}
+
+# Colonnes ajoutées à chaque ligne évaluée
+CHAMPS_RESULTAT = [
+    'code_agb', 'produit_agribalyse', 'co2_par_kg', 'quantite_g', 'co2_ligne',
+    'alternative', 'co2_alternative_par_kg', 'economie_ligne',
+]
+
+
+def parse_quantity(text: str) -> Tuple[str, Optional[float]]:
+    """
+    Sépare le libellé d'une ligne de la quantité qu'il contient.
+
+    Un nombre d'articles sans unité de poids ("Oeufs x12", "Jambon blanc
+    4 tranches") est converti avec POIDS_UNITAIRES ; la quantité reste
+    None si le poids d'un article n'est pas connu.
+
+    Args:
+        text: Libellé brut ("BOEUF HACHE 5% 2X125G")
+
+    Returns:
+        Libellé sans la quantité et quantité en grammes (None si absente)
+    """
+    match = QUANTITY_PATTERN.search(text)
+    if match is not None:
+        count, value, unit = match.groups()
+        grams = float(value.replace(',', '.')) * UNITES_EN_GRAMMES[unit.lower()]
+        if count:
+            grams *= int(count)
+        return _strip(text, match), grams
+
+    match = COUNT_PATTERN.search(text)
+    if match is None:
+        return text.strip(), None
+    times, count, packed, packaging, leading = match.groups()
+    label = _strip(text, match)
+    if packaging:
+        weight = POIDS_UNITAIRES.get(singularize(normalize_text(packaging)))
+    else:
+        weight = next((POIDS_UNITAIRES[word] for word in map(singularize, tokens(normalize_text(label)))
+                       if word in POIDS_UNITAIRES), None)
+    if weight is None:
+        return label, None
+    return label, float(int(times or count or packed or leading) * weight)
+
+
+def _strip(text: str, match: re.Match) -> str:
+    """Libellé sans la partie reconnue"""
+    return ' '.join((text[:match.start()] + ' ' + text[match.end():]).split())
+
+
+def _to_grams(value, unit_factor: float) -> Optional[float]:
+    """Quantité d'une colonne dédiée : nombre (dans l'unité indiquée) ou texte avec unité"""
+    if value is None or value == '':
+        return None
+    try:
+        return float(str(value).replace(',', '.')) * unit_factor
+    except ValueError:
+        return parse_quantity(str(value))[1]
+
+
+class LineScorer:
+    """
+    Associe des libellés libres à des produits AGRIBALYSE et calcule leur
+    impact carbone et la meilleure alternative (voir RecommendationEngine).
+
+    L'association réutilise celle du calculateur de recettes (mots entiers
+    du nom, produit brut d'abord, puis correction des fautes) ; chaque libellé
+    distinct n'est recherché qu'une fois, ce qui compte pour des tickets
+    où les mêmes articles reviennent des milliers de fois.
+    """
+
+    def __init__(self, calculator: Optional[RecipeCalculator] = None):
+        """
+        Args:
+            calculator: Calculateur de recettes. Si None, utilise celui des
+                données partagées (mode étendu, pour le code AGB).
+        """
+        self.calculator = calculator if calculator is not None else get_recipe_calculator()
+        data = self.calculator.data
+        self.engine = get_recommendation_engine(data)
+        self.names = data[NAME_COLUMN].to_numpy()
+        self.impacts = self.engine.impacts
+        self.codes = (data[CODE_COLUMN].astype(str).to_numpy() if CODE_COLUMN in data.columns
+                      else np.full(len(data), None, dtype=object))
+
+    def score(self, text: str, quantity: Optional[float] = None) -> Dict:
+        """
+        Évalue une ligne.
+
+        Args:
+            text: Libellé de la ligne
+            quantity: Quantité en grammes. Si None, lue dans le libellé si
+                elle y figure.
+
+        Returns:
+            Dict avec les champs de CHAMPS_RESULTAT (None si non trouvé ou
+            non calculable)
+        """
+        label, parsed = parse_quantity(str(text or ''))
+        if quantity is None:
+            quantity = parsed
+        result = dict.fromkeys(CHAMPS_RESULTAT)
+        result['quantite_g'] = quantity
+
+        row_id = self.calculator.resolve(label) if label else -1
+        if row_id < 0:
+            return result
+
+        impact = float(self.impacts[row_id])
+        result['code_agb'] = self.codes[row_id]
+        result['produit_agribalyse'] = self.names[row_id]
+        result['co2_par_kg'] = round(impact, 4)
+        if quantity is not None:
+            result['co2_ligne'] = round(impact * quantity / 1000, 4)
+
+        alternative = int(self.engine.best_alternatives([row_id])[0])
+        if alternative >= 0:
+            alternative_impact = float(self.impacts[alternative])
+            result['alternative'] = self.names[alternative]
+            result['co2_alternative_par_kg'] = round(alternative_impact, 4)
+            if quantity is not None:
+                result['economie_ligne'] = round((impact - alternative_impact) * quantity / 1000, 4)
+        return result
+
+    def score_records(self, records: List[Dict], column: str,
+                      quantity_column: Optional[str] = None,
+                      unit_factor: float = 1.0) -> List[Dict]:
+        """
+        Évalue des lignes lues d'un fichier (dicts), en leur ajoutant les
+        champs de CHAMPS_RESULTAT.
+
+        Args:
+            records: Lignes d'entrée
+            column: Champ contenant le libellé
+            quantity_column: Champ contenant la quantité (optionnel)
+            unit_factor: Grammes par unité de la colonne de quantité
+
+        Returns:
+            Lignes complétées, dans le même ordre
+        """
+        scored = []
+        for record in records:
+            quantity = _to_grams(record.get(quantity_column), unit_factor) if quantity_column else None
+            scored.append({**record, **self.score(record.get(column), quantity)})
+        return scored
+
+
+# Évaluateur de chaque processus de travail (voir score_stream)
+_worker_scorer: Optional[LineScorer] = None
+
+
+def _init_worker(file_path: Optional[str]):
+    """Charge les données et construit les index une fois par processus"""
+    global _worker_scorer
+    # Messages du chargeur sur la sortie d'erreur : la sortie standard peut
+    # porter les résultats
+    with redirect_stdout(sys.stderr):
+        data = get_shared_data(file_path, extended=True)
+        _worker_scorer = LineScorer(get_recipe_calculator(data))
+
+
+def _score_chunk(records: List[Dict], column: str, quantity_column: Optional[str],
+                 unit_factor: float) -> List[Dict]:
+    return _worker_scorer.score_records(records, column, quantity_column, unit_factor)
+
+
+def _chunks(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def score_stream(records: Iterable[Dict], column: str,
+                 quantity_column: Optional[str] = None,
+                 unit_factor: float = 1.0,
+                 workers: int = 1,
+                 chunk_size: int = 2000,
+                 file_path: Optional[str] = None) -> Iterator[List[Dict]]:
+    """
+    Évalue un flux de lignes par paquets, en parallèle si workers > 1.
+
+    Les paquets sont répartis sur un pool de processus ; au plus
+    2 x workers paquets sont en cours à la fois, si bien que la mémoire
+    reste bornée quelle que soit la taille de l'entrée. Les résultats sont
+    rendus dans l'ordre de l'entrée.
+
+    Args:
+        records: Lignes d'entrée (dicts), lues au fil de l'eau
+        column: Champ contenant le libellé
+        quantity_column: Champ contenant la quantité (optionnel)
+        unit_factor: Grammes par unité de la colonne de quantité
+        workers: Nombre de processus (1 : dans le processus courant)
+        chunk_size: Nombre de lignes par paquet
+        file_path: Chemin vers le fichier CSV AGRIBALYSE. Si None, utilise
+            le chemin par défaut.
+
+    Returns:
+        Itérateur de paquets de lignes évaluées
+    """
+    chunks = _chunks(records, chunk_size)
+    if workers <= 1:
+        _init_worker(file_path)
+        for chunk in chunks:
+            yield _score_chunk(chunk, column, quantity_column, unit_factor)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(file_path,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_score_chunk, chunk, column, quantity_column, unit_factor))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Test des fonctions si exécuté directement
+if __name__ == "__main__":
+    scorer = LineScorer()
+    for line in ["BOEUF HACHE 5% 2X125G", "Lait demi-écrémé 1,5 L", "tomates 1kg",
+                 "lentilles vertes 500 g", "Oeufs x12", "Jambon blanc 4 tranches",
+                 "article inconnu xyz"]:
+        print(line, "->", scorer.score(line))
@@ -0,0 +1,199 @@
+"""
+Recherche de substituts par similarité des profils d'impact (16 indicateurs EF)
+"""
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence, Tuple
+
+from ecomenu_assistant.data.loader import (
+    COLONNES_INDICATEURS,
+    get_shared_data,
+    get_shared_resource,
+)
+
+NAME_COLUMN = 'Nom du Produit en Français'
+SCORE_COLUMN = 'Score unique EF'
+
+
+def normalize_indicators(values: np.ndarray) -> np.ndarray:
+    """
+    Normalise chaque indicateur pour rendre les profils comparables.
+
+    Les indicateurs ont des unités et des ordres de grandeur très différents
+    et des distributions à longue traîne : chaque colonne est ramenée à son
+    échelle typique (médiane des valeurs absolues), compressée par un
+    logarithme signé puis centrée-réduite.
+
+    Args:
+        values: Matrice (n_produits x n_indicateurs)
+
+    Returns:
+        Matrice normalisée, contiguë, en float32
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+
+    scale = np.median(np.abs(values), axis=0)
+    scale[scale == 0] = 1.0
+    compressed = np.sign(values) * np.log1p(np.abs(values) / scale)
+
+    std = compressed.std(axis=0)
+    std[std == 0] = 1.0
+    normalized = (compressed - compressed.mean(axis=0)) / std
+    return np.ascontiguousarray(normalized, dtype=np.float32)
+
+
+class ImpactProfileIndex:
+    """
+    Index des profils environnementaux des produits.
+
+    Chaque produit est un vecteur des 16 indicateurs EF normalisés, stocké
+    dans une matrice float32 contiguë. Les requêtes sont traitées par lots :
+    les distances d'un lot à tous les produits sont calculées en un produit
+    matriciel, puis les k plus proches sont extraits par argpartition.
+
+    Les produits sont désignés par leur position (iloc) dans le DataFrame.
+    """
+
+    def __init__(self, data: pd.DataFrame, columns: Sequence[str] = COLONNES_INDICATEURS):
+        """
+        Construit l'index.
+
+        Args:
+            data: DataFrame AGRIBALYSE chargé en mode étendu
+            columns: Indicateurs utilisés pour décrire les profils
+        """
+        missing = [col for col in list(columns) + [SCORE_COLUMN] if col not in data.columns]
+        if missing:
+            raise ValueError(
+                f"Colonnes manquantes (charger les données avec extended=True): {missing}"
+            )
+
+        self.data = data
+        self.columns = list(columns)
+        self.matrix = normalize_indicators(data[self.columns].to_numpy())
+        self.squared_norms = (self.matrix ** 2).sum(axis=1)
+        self.scores = data[SCORE_COLUMN].to_numpy(dtype=np.float32)
+
+    def query(self, row_ids: Sequence[int], k: int = 5,
+              lower_score: bool = True,
+              batch_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cherche les k produits au profil le plus proche de chaque produit demandé.
+
+        Args:
+            row_ids: Positions (iloc) des produits de référence
+            k: Nombre de voisins par produit
+            lower_score: Ne garder que les produits de score unique EF
+                strictement inférieur à celui du produit de référence
+            batch_size: Nombre maximal de requêtes traitées par produit
+                matriciel (réduit pour que la matrice des distances d'un lot
+                ne dépasse pas 2**24 éléments)
+
+        Returns:
+            Tuple (voisins, distances) de forme (n_requêtes x k), les plus
+            proches d'abord ; -1 et inf quand il n'y a pas assez de voisins
+        """
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        n_products = len(self.matrix)
+        k_eff = min(k, n_products)
+        batch_size = max(1, min(batch_size, 2**24 // max(n_products, 1)))
+
+        neighbours = np.full((len(row_ids), k), -1, dtype=np.int32)
+        distances = np.full((len(row_ids), k), np.inf, dtype=np.float32)
+
+        for start in range(0, len(row_ids), batch_size):
+            batch = row_ids[start:start + batch_size]
+            queries = self.matrix[batch]
+
+            # |q - x|² = |q|² + |x|² - 2 q.x
+            squared = (
+                self.squared_norms[batch][:, None]
+                + self.squared_norms[None, :]
+                - 2.0 * queries @ self.matrix.T
+            )
+            np.maximum(squared, 0.0, out=squared)
+
+            squared[np.arange(len(batch)), batch] = np.inf
+            if lower_score:
+                squared[self.scores[None, :] >= self.scores[batch][:, None]] = np.inf
+
+            candidates = np.argpartition(squared, k_eff - 1, axis=1)[:, :k_eff]
+            candidate_distances = np.take_along_axis(squared, candidates, axis=1)
+            order = np.argsort(candidate_distances, axis=1)
+            candidates = np.take_along_axis(candidates, order, axis=1)
+            candidate_distances = np.take_along_axis(candidate_distances, order, axis=1)
+
+            valid = np.isfinite(candidate_distances)
+            neighbours[start:start + len(batch), :k_eff] = np.where(valid, candidates, -1)
+            distances[start:start + len(batch), :k_eff] = np.sqrt(candidate_distances)
+
+        return neighbours, distances
+
+    def similar_products(self, row_ids: Sequence[int], k: int = 5) -> pd.DataFrame:
+        """
+        Substituts au profil proche et au score unique EF plus faible.
+
+        Args:
+            row_ids: Positions (iloc) des produits de référence
+            k: Nombre de substituts par produit
+
+        Returns:
+            DataFrame avec une ligne par couple (produit, substitut) :
+            'source', 'rang', 'alternative', 'Produit', 'Alternative',
+            'Distance', 'Score produit', 'Score alternative', 'Économie score'
+        """
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        neighbours, distances = self.query(row_ids, k=k)
+
+        sources = np.repeat(row_ids, k)
+        ranks = np.tile(np.arange(1, k + 1), len(row_ids))
+        alternatives = neighbours.ravel()
+        found = alternatives >= 0
+
+        sources, ranks, alternatives = sources[found], ranks[found], alternatives[found]
+        names = self.data[NAME_COLUMN].to_numpy()
+
+        return pd.DataFrame({
+            'source': sources,
+            'rang': ranks,
+            'alternative': alternatives,
+            'Produit': names[sources],
+            'Alternative': names[alternatives],
+            'Distance': distances.ravel()[found],
+            'Score produit': self.scores[sources],
+            'Score alternative': self.scores[alternatives],
+            'Économie score': self.scores[sources] - self.scores[alternatives],
+        })
+
+
+def get_similarity_index(data: Optional[pd.DataFrame] = None) -> ImpactProfileIndex:
+    """
+    Retourne l'index des profils d'impact, partagé entre les sessions.
+
+    Args:
+        data: DataFrame AGRIBALYSE étendu. Si None, utilise les données
+            partagées chargées en mode étendu.
+
+    Returns:
+        Index des profils d'impact
+    """
+    if data is None:
+        data = get_shared_data(extended=True)
+    return get_shared_resource('similarity_index', ImpactProfileIndex, data)
+
+
+# Test des fonctions si exécuté directement
+if __name__ == "__main__":
+    import time
+
+    data = get_shared_data(extended=True)
+    index = get_similarity_index(data)
+
+    row_ids = np.arange(len(data))
+    start = time.perf_counter()
+    index.query(row_ids, k=5)
+    elapsed = time.perf_counter() - start
+    print(f"{len(row_ids)} requêtes en {elapsed * 1000:.1f} ms "
+          f"({len(row_ids) / elapsed:.0f} requêtes/s)")
+
+    print(index.similar_products(row_ids[:2], k=3)[['Produit', 'Alternative', 'Distance']])
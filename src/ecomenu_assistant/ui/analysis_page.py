@@ -8,17 +8,16 @@ from pathlib import Path
 # Ajouter le chemin pour les imports
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from ecomenu_assistant.data.loader import load_agribalyse_data
-from ecomenu_assistant.data.analyzer import (
-    get_global_stats,
-    analyze_by_group,
-    get_extreme_products
-)
+from ecomenu_assistant.data.loader import get_data_version, get_shared_data
+from ecomenu_assistant.data.analyzer import get_analysis_cube
+from ecomenu_assistant.data.export import analysis_report_sections, iter_frames
 from ecomenu_assistant.visualization.charts import (
     create_group_impact_chart,
-    create_distribution_histogram,
-    create_extreme_products_chart
+    create_binned_histogram,
+    create_extreme_products_chart,
+    get_cached_figure
 )
+from export_panel import show_export_panel
 
 
 def show_analysis_page():
@@ -26,17 +25,15 @@ def show_analysis_page():
     st.title("📊 Analyse des données AGRIBALYSE")
     st.markdown("---")
     
-    # Chargement des données
-    if 'data' not in st.session_state:
-        with st.spinner("Chargement des données..."):
-            st.session_state.data = load_agribalyse_data()
-    
-    data = st.session_state.data
+    # Agrégats calculés une fois par version des données, partagés entre sessions
+    with st.spinner("Chargement des données..."):
+        cube = get_analysis_cube(get_shared_data())
+        version = get_data_version()
     
     # Section 1 : Statistiques globales
     st.header("📈 Statistiques globales")
     
-    stats = get_global_stats(data)
+    stats = cube.global_stats
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -57,7 +54,22 @@ def show_analysis_page():
     # Section 2 : Distribution
     st.header("📊 Distribution des impacts")
     
-    fig_distribution = create_distribution_histogram(data)
+    col1, col2 = st.columns(2)
+    with col1:
+        strategy = st.radio(
+            "Classes",
+            options=["uniform", "quantile"],
+            format_func={"uniform": "Même largeur", "quantile": "Même effectif"}.get,
+            horizontal=True
+        )
+    with col2:
+        log_scale = st.checkbox("Échelle logarithmique", value=False)
+    
+    histogram = cube.get_histogram(50, strategy, log_scale)
+    fig_distribution = get_cached_figure(
+        'distribution', lambda: create_binned_histogram(histogram), version,
+        strategy=strategy, log_scale=log_scale
+    )
     st.plotly_chart(fig_distribution, use_container_width=True)
     
     st.markdown("---")
@@ -65,8 +77,10 @@ def show_analysis_page():
     # Section 3 : Analyse par groupe
     st.header("🍽️ Impact par groupe d'aliments")
     
-    group_stats = analyze_by_group(data)
-    fig_groups = create_group_impact_chart(group_stats)
+    group_stats = cube.group_stats
+    fig_groups = get_cached_figure(
+        'groupes', lambda: create_group_impact_chart(group_stats), version
+    )
     st.plotly_chart(fig_groups, use_container_width=True)
     
     # Afficher le tableau des statistiques
@@ -78,10 +92,12 @@ def show_analysis_page():
     # Section 4 : Produits extrêmes
     st.header("🏆 Produits champions et polluants")
     
-    extremes = get_extreme_products(data, n=10)
-    fig_extremes = create_extreme_products_chart(
-        extremes['champions'],
-        extremes['polluants']
+    extremes = cube.get_extremes(10)
+    fig_extremes = get_cached_figure(
+        'extremes',
+        lambda: create_extreme_products_chart(extremes['champions'], extremes['polluants']),
+        version,
+        n=10
     )
     st.plotly_chart(fig_extremes, use_container_width=True)
     
@@ -102,4 +118,33 @@ def show_analysis_page():
             extremes['polluants'].reset_index(drop=True),
             use_container_width=True,
             hide_index=True
-        )
\ No newline at end of file
+        )
+    
+    st.markdown("---")
+    
+    # Section 5 : Export (préparé en arrière-plan)
+    st.header("📥 Exporter l'analyse")
+    
+    st.subheader("Statistiques par groupe")
+    show_export_panel(
+        'groupes',
+        {fmt: lambda: iter_frames(group_stats.reset_index()) for fmt in ('csv', 'parquet')},
+        file_name="ecomenu_groupes",
+        signature=version
+    )
+    
+    st.subheader("Statistiques par sous-groupe")
+    show_export_panel(
+        'sous_groupes',
+        {fmt: lambda: iter_frames(cube.subgroup_stats) for fmt in ('csv', 'parquet')},
+        file_name="ecomenu_sous_groupes",
+        signature=version
+    )
+    
+    st.subheader("Rapport complet (graphiques et tableaux)")
+    show_export_panel(
+        'rapport',
+        {'pdf': lambda: analysis_report_sections(cube)},
+        file_name="ecomenu_analyse",
+        signature=version
+    )
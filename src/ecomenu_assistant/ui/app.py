@@ -1,6 +1,12 @@
 """
 Application principale EcoMenu Assistant
+
+Seuls la navigation et la page de recherche sont importées au démarrage :
+les autres pages (plotly, SDK OpenAI...) le sont à leur première ouverture.
 """
+import sys
+from pathlib import Path
+
 import streamlit as st
 
 # Configuration de la page (doit être la première commande Streamlit)
@@ -11,28 +17,28 @@ st.set_page_config(
 )
 
 # Imports
-from navigation import create_navigation
-from analysis_page import show_analysis_page
-from chat_page import show_chat_page
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from navigation import create_navigation, show_metrics_panel
+from ecomenu_assistant.utils.metrics import timer
+
+# Nombre maximum de résultats classés par la recherche
+MAX_RESULTATS = 100
 
 
 def show_search_page():
     """Page de recherche de produits (votre code existant)"""
-    import sys
-    from pathlib import Path
-    
-    sys.path.append(str(Path(__file__).parent.parent.parent))
-    from ecomenu_assistant.data.loader import load_agribalyse_data
+    from ecomenu_assistant.data.loader import get_data_version, get_shared_data
+    from ecomenu_assistant.data.search import get_search_index
+    from ecomenu_assistant.recommendations.engine import get_recommendation_engine
+    from export_panel import COLONNES_PDF, search_result_frames, show_export_panel
     
     st.title("🔍 Recherche de produits")
     st.markdown("---")
     
-    # Chargement des données
-    if 'data' not in st.session_state:
-        with st.spinner("Chargement des données AGRIBALYSE..."):
-            st.session_state.data = load_agribalyse_data()
-    
-    data = st.session_state.data
+    # Chargement des données (partagées entre toutes les sessions)
+    with st.spinner("Chargement des données AGRIBALYSE..."):
+        data = get_shared_data()
     
     # Affichage des statistiques
     col1, col2, col3 = st.columns(3)
@@ -64,15 +70,17 @@ def show_search_page():
     )
     
     if produit_recherche:
-        # Filtrer les données selon la recherche
-        resultats = data[
-            data['Nom du Produit en Français'].str.contains(
-                produit_recherche, case=False, na=False
-            )
-        ].sort_values('Changement climatique')
+        # Recherche approchée (accents, fautes de frappe), triée par pertinence
+        row_ids = get_search_index(data).fuzzy_search(
+            produit_recherche, limit=MAX_RESULTATS
+        )
+        resultats = data.iloc[row_ids]
         
         if len(resultats) > 0:
-            st.write(f"Trouvé {len(resultats)} produit(s)")
+            if len(resultats) >= MAX_RESULTATS:
+                st.write(f"Plus de {MAX_RESULTATS} produits trouvés")
+            else:
+                st.write(f"Trouvé {len(resultats)} produit(s)")
             
             # Afficher les 10 premiers résultats
             for i, row in resultats.head(10).iterrows():
@@ -89,23 +97,39 @@ def show_search_page():
                     else:
                         st.error(f"{impact:.2f} kg CO2")
             
-            # Recommandations automatiques
-            if len(resultats) > 1:
+            # Recommandation précalculée pour le produit le plus pertinent
+            alternatives = get_recommendation_engine(data).get_alternatives(
+                row_ids[:1], k=1
+            )
+            
+            if len(alternatives) > 0:
                 st.subheader("💡 Recommandation")
                 
-                produit_polluant = resultats.tail(1).iloc[0]
-                produit_eco = resultats.head(1).iloc[0]
-                
-                if produit_polluant['Changement climatique'] > produit_eco['Changement climatique']:
-                    economie = produit_polluant['Changement climatique'] - produit_eco['Changement climatique']
-                    st.write(f"💚 Privilégiez **{produit_eco['Nom du Produit en Français']}** "
-                            f"({produit_eco['Changement climatique']:.2f} kg CO2) "
-                            f"plutôt que **{produit_polluant['Nom du Produit en Français']}** "
-                            f"({produit_polluant['Changement climatique']:.2f} kg CO2)")
-                    st.write(f"**Économie : {economie:.2f} kg CO2**")
+                alternative = alternatives.iloc[0]
+                st.write(f"💚 Privilégiez **{alternative['Alternative']}** "
+                        f"({alternative['Impact alternative']:.2f} kg CO2) "
+                        f"plutôt que **{alternative['Produit']}** "
+                        f"({alternative['Impact produit']:.2f} kg CO2)")
+                st.write(f"**Économie : {alternative['Économie']:.2f} kg CO2**")
         else:
             st.write("Aucun produit trouvé")
     
+    # Export de tous les résultats (ou du catalogue), préparé en arrière-plan
+    with st.expander("📥 Exporter les résultats" if produit_recherche else "📥 Exporter le catalogue"):
+        complet = st.checkbox("Tous les indicateurs environnementaux (mode étendu)",
+                              key="export_recherche_complet")
+        titre = f"Résultats pour « {produit_recherche} »" if produit_recherche else "Catalogue AGRIBALYSE"
+        show_export_panel(
+            'recherche',
+            {
+                'csv': lambda: search_result_frames(produit_recherche, complet),
+                'parquet': lambda: search_result_frames(produit_recherche, complet),
+                'pdf': lambda: [(titre, search_result_frames(produit_recherche, complet, COLONNES_PDF))],
+            },
+            file_name="ecomenu_recherche" if produit_recherche else "ecomenu_catalogue",
+            signature=(produit_recherche, complet, get_data_version(extended=complet))
+        )
+    
     # Section d'information
     with st.expander("ℹ️ À propos des données"):
         st.write("""
@@ -153,14 +177,20 @@ def main():
     current_page = create_navigation()
     
     # Afficher la page correspondante
-    if current_page == "search":
-        show_search_page()
-    elif current_page == "analysis":
-        show_analysis_page()
-    elif current_page == "about":
-        show_about_page()
-    elif current_page == "chat":
-        show_chat_page()
+    with timer('ui.page', page=current_page):
+        if current_page == "search":
+            show_search_page()
+        elif current_page == "analysis":
+            from analysis_page import show_analysis_page
+            show_analysis_page()
+        elif current_page == "about":
+            show_about_page()
+        elif current_page == "chat":
+            from chat_page import show_chat_page
+            show_chat_page()
+    
+    # Panneau développeur (ECOMENU_METRICS=1)
+    show_metrics_panel()
 
 
 if __name__ == "__main__":
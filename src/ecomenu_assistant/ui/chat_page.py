@@ -8,8 +8,19 @@ from pathlib import Path
 # Ajouter le chemin pour les imports
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from ecomenu_assistant.data.loader import load_agribalyse_data
-from ecomenu_assistant.llm.openai_client import EcoMenuAssistant
+from ecomenu_assistant.data.loader import get_shared_data
+from ecomenu_assistant.llm.context import build_product_context
+
+
+def get_chat_assistant():
+    """
+    Retourne l'assistant de la session, créé au premier message : le SDK
+    OpenAI n'est importé que si l'utilisateur pose une question.
+    """
+    if 'chat_assistant' not in st.session_state:
+        from ecomenu_assistant.llm.openai_client import EcoMenuAssistant
+        st.session_state.chat_assistant = EcoMenuAssistant()
+    return st.session_state.chat_assistant
 
 
 def show_chat_page():
@@ -22,13 +33,9 @@ def show_chat_page():
     L'assistant utilise les données AGRIBALYSE pour vous donner des conseils personnalisés.
     """)
     
-    # Initialisation de l'assistant et des données
-    if 'chat_assistant' not in st.session_state:
-        st.session_state.chat_assistant = EcoMenuAssistant()
-    
-    if 'data' not in st.session_state:
-        with st.spinner("Chargement des données..."):
-            st.session_state.data = load_agribalyse_data()
+    # Données (l'assistant n'est créé qu'au premier message)
+    with st.spinner("Chargement des données..."):
+        get_shared_data()
     
     if 'messages' not in st.session_state:
         st.session_state.messages = []
@@ -37,7 +44,8 @@ def show_chat_page():
     col1, col2 = st.columns([6, 1])
     with col2:
         if st.button("🔄 Nouvelle conversation"):
-            st.session_state.chat_assistant.reset_conversation()
+            if 'chat_assistant' in st.session_state:
+                st.session_state.chat_assistant.reset_conversation()
             st.session_state.messages = []
             st.rerun()
     
@@ -46,6 +54,9 @@ def show_chat_page():
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
     
+    # Question à traiter pendant ce rendu (suggestion ou saisie libre)
+    prompt = None
+    
     # Exemples de questions suggérées
     if len(st.session_state.messages) == 0:
         st.subheader("💡 Questions suggérées :")
@@ -55,28 +66,23 @@ def show_chat_page():
         with col1:
             if st.button("🥩 Alternatives à la viande rouge ?"):
                 prompt = "Quelles sont les meilleures alternatives à la viande rouge pour réduire mon impact carbone ?"
-                process_user_input(prompt)
-                st.rerun()
             
             if st.button("🧀 Impact des produits laitiers ?"):
                 prompt = "Quel est l'impact environnemental des produits laitiers et comment le réduire ?"
-                process_user_input(prompt)
-                st.rerun()
         
         with col2:
             if st.button("🥗 Menu bas carbone ?"):
                 prompt = "Propose-moi un menu d'une journée avec un faible impact carbone"
-                process_user_input(prompt)
-                st.rerun()
             
             if st.button("🌱 Conseils alimentation durable ?"):
                 prompt = "Donne-moi 5 conseils pratiques pour une alimentation plus durable"
-                process_user_input(prompt)
-                st.rerun()
     
     # Input utilisateur
     if user_input := st.chat_input("Posez votre question..."):
-        process_user_input(user_input)
+        prompt = user_input
+    
+    if prompt:
+        process_user_input(prompt)
         st.rerun()
 
 
@@ -93,28 +99,31 @@ def process_user_input(user_input: str):
         "content": user_input
     })
     
-    # Vérifier si l'utilisateur mentionne un produit spécifique
-    # et ajouter le contexte si nécessaire
-    product_context = ""
+    # Contexte sur tous les produits cités dans le message
+    product_context = build_product_context(user_input, get_shared_data())
     
-    # Mots-clés pour détecter une demande sur un produit spécifique
-    product_keywords = ["bœuf", "agneau", "porc", "poulet", "fromage", "lait", 
-                       "tomate", "pomme", "pain", "riz", "pâtes"]
+    with st.chat_message("user"):
+        st.markdown(user_input)
     
-    for keyword in product_keywords:
-        if keyword.lower() in user_input.lower():
-            product_context = st.session_state.chat_assistant.get_product_info(
-                keyword, 
-                st.session_state.data
+    # Afficher la réponse de l'assistant au fil de sa génération
+    with st.chat_message("assistant"):
+        try:
+            response = st.write_stream(
+                get_chat_assistant().chat_stream(
+                    user_input,
+                    product_context
+                )
             )
-            break
+        except Exception as e:
+            # Pas de message utilisateur sans réponse dans la conversation
+            st.session_state.messages.pop()
+            st.error(f"Échec de la réponse de l'assistant : {e}")
+            return
     
-    # Générer la réponse de l'assistant
-    with st.spinner("L'assistant réfléchit..."):
-        response = st.session_state.chat_assistant.chat(
-            user_input,
-            product_context
-        )
+    if not response:
+        st.session_state.messages.pop()
+        st.warning("L'assistant n'a pas renvoyé de réponse, reformulez votre question.")
+        return
     
     # Ajouter la réponse de l'assistant
     st.session_state.messages.append({
@@ -0,0 +1,137 @@
+"""
+Boutons d'export des pages Streamlit
+
+Chaque export est préparé en arrière-plan (voir data.export.start_export) :
+le script rend la page aussitôt, un fragment suit l'avancement puis
+propose le fichier au téléchargement.
+
+Streamlit sert le fichier depuis la mémoire (st.download_button le lit en
+entier à chaque exécution de la page) : au-delà de MAX_DOWNLOAD_MB, le
+bouton n'est pas proposé. Le catalogue complet en mode étendu ne pèse que
+quelques Mo.
+"""
+import os
+import streamlit as st
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+
+import pandas as pd
+
+# Ajouter le chemin pour les imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from ecomenu_assistant.data.export import ExportJob, get_available_formats, iter_frames, start_export
+
+LIBELLES = {'csv': "CSV", 'parquet': "Parquet", 'pdf': "PDF"}
+
+# Intervalle de suivi d'un export en cours (secondes)
+POLL_INTERVAL = 0.5
+
+# Taille maximale d'un fichier proposé au téléchargement (Mo)
+MAX_DOWNLOAD_MB = float(os.getenv('ECOMENU_EXPORT_MAX_DOWNLOAD_MB', 200))
+
+# Colonnes des tableaux de résultats du rapport PDF
+COLONNES_PDF = [
+    'Nom du Produit en Français',
+    "Groupe d'aliment",
+    "Sous-groupe d'aliment",
+    'Changement climatique',
+]
+
+
+def search_result_frames(query: str, extended: bool = False,
+                         columns: Optional[list] = None) -> Iterator[pd.DataFrame]:
+    """
+    Tous les résultats d'une recherche (ou tout le catalogue si la requête
+    est vide), par paquets. La recherche est faite à la première lecture,
+    donc dans le thread de l'export.
+
+    Args:
+        query: Texte recherché
+        extended: Exporter toutes les colonnes du mode étendu
+        columns: Colonnes à exporter. Si None, toutes.
+
+    Yields:
+        Paquets de lignes (voir iter_frames)
+    """
+    from ecomenu_assistant.data.loader import get_shared_data
+    from ecomenu_assistant.data.search import get_search_index
+
+    data = get_shared_data(extended=extended)
+    rows = get_search_index(data).fuzzy_search(query, limit=None) if query else None
+    yield from iter_frames(data, rows, columns)
+
+
+def _format_size(size: int) -> str:
+    return f"{size / 1024:.0f} Ko" if size < 1024 * 1024 else f"{size / 1024 / 1024:.1f} Mo"
+
+
+def _show_result(job: ExportJob):
+    """Bouton de téléchargement d'un export terminé (ou son erreur)"""
+    if job.error is not None:
+        st.error(f"Échec de l'export : {job.error}")
+        return
+
+    details = f"{job.rows:,} lignes, " if job.rows else ""
+    if job.size > MAX_DOWNLOAD_MB * 1024 * 1024:
+        st.warning(f"{job.file_name} ({details}{_format_size(job.size)}) dépasse la taille "
+                   f"maximale de téléchargement ({MAX_DOWNLOAD_MB:.0f} Mo) : "
+                   "affinez la recherche ou choisissez un format plus compact (Parquet).")
+        return
+    with job.open() as f:
+        st.download_button(
+            f"⬇️ Télécharger {job.file_name} ({details}{_format_size(job.size)})",
+            data=f, file_name=job.file_name, mime=job.mime,
+            key=f"telecharger_{id(job)}"
+        )
+
+
+@st.fragment(run_every=POLL_INTERVAL)
+def _follow_job(job: ExportJob):
+    """Avancement d'un export en cours, seul ce fragment est réexécuté"""
+    if job.done:
+        # Réafficher la page : le résultat est montré hors du fragment,
+        # dont le suivi s'arrête
+        st.rerun()
+    progress = f" ({job.rows:,} lignes écrites)" if job.rows else ""
+    st.caption(f"⏳ Préparation de {job.file_name}{progress}...")
+
+
+def show_export_panel(key: str, sources: Dict[str, Callable[[], Any]],
+                      file_name: str, signature: Hashable = None):
+    """
+    Affiche un bouton par format ; un clic lance l'export en arrière-plan.
+
+    Args:
+        key: Identifiant de l'export, unique sur la page
+        sources: Format ('csv', 'parquet', 'pdf') -> fonction renvoyant le
+            contenu à exporter (paquets de lignes ou sections de rapport,
+            voir data.export). Les formats indisponibles sont ignorés.
+        file_name: Nom du fichier proposé, sans extension
+        signature: Valeur décrivant le contenu (requête, version des
+            données...) : un export préparé pour une autre valeur est abandonné
+    """
+    state_key = f'export_{key}'
+    current = st.session_state.get(state_key)
+    if current is not None and current[0] != signature:
+        current[1].discard()
+        del st.session_state[state_key]
+        current = None
+
+    formats = [fmt for fmt in sources if fmt in get_available_formats()]
+    for column, fmt in zip(st.columns(len(formats)), formats):
+        with column:
+            if st.button(f"Préparer {LIBELLES[fmt]}", key=f"{state_key}_{fmt}"):
+                if current is not None:
+                    current[1].discard()
+                current = (signature, start_export(fmt, sources[fmt](), file_name))
+                st.session_state[state_key] = current
+
+    if current is None:
+        return
+    job = current[1]
+    if job.done:
+        _show_result(job)
+    else:
+        _follow_job(job)
@@ -1,8 +1,18 @@
 """
 Configuration de la navigation multipage Streamlit
 """
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
 import streamlit as st
 
+# Ajouter le chemin pour les imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from ecomenu_assistant.utils.metrics import is_enabled, reset, snapshot, to_prometheus
+
 
 def create_navigation():
     """
@@ -43,6 +53,46 @@ def create_navigation():
     return pages[page]
 
 
+def show_metrics_panel():
+    """
+    Panneau développeur de la sidebar : durées, compteurs et caches mesurés
+    par utils.metrics. Affiché seulement si les mesures sont actives
+    (ECOMENU_METRICS=1).
+    """
+    if not is_enabled():
+        return
+
+    with st.sidebar.expander("⏱️ Mesures de performance"):
+        metrics = snapshot()
+        if metrics['durees']:
+            durations = pd.DataFrame(metrics['durees']).sort_values('total_ms', ascending=False)
+            st.dataframe(
+                durations[['mesure', 'etiquettes', 'appels', 'moyenne_ms', 'p95_ms', 'max_ms', 'lignes']],
+                hide_index=True
+            )
+        else:
+            st.caption("Aucune mesure pour l'instant")
+
+        if metrics['compteurs']:
+            st.dataframe(pd.DataFrame(metrics['compteurs']), hide_index=True)
+        if metrics['caches']:
+            st.json(metrics['caches'], expanded=False)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "JSON", json.dumps(metrics, indent=2, ensure_ascii=False),
+                file_name="ecomenu_metrics.json", mime="application/json"
+            )
+        with col2:
+            st.download_button(
+                "Prometheus", to_prometheus(),
+                file_name="ecomenu_metrics.prom", mime="text/plain"
+            )
+        if st.button("Réinitialiser les mesures"):
+            reset()
+
+
 def show_page_header(title: str, subtitle: str = ""):
     """
     Affiche l'en-tête de page standardisé.
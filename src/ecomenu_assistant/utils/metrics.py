@@ -0,0 +1,404 @@
+"""
+Mesures de performance des chemins critiques (durées, lignes, caches, tokens)
+
+Désactivées par défaut : activer avec ECOMENU_METRICS=1 (ou enable()).
+Désactivées, les fonctions décorées par @timed ne coûtent qu'un test de
+booléen par appel et timer() renvoie un contexte vide partagé.
+
+Utilisation :
+    @timed('data.load', rows=True)
+    def load_agribalyse_data(...): ...
+
+    with timer('ui.page', page='search'):
+        show_search_page()
+
+    increment('llm.tokens', 120, sens='envoyes')
+
+Export : snapshot() (dict JSON), to_prometheus() (format texte Prometheus)
+et write_metrics(path). Avec ECOMENU_METRICS_FILE=<fichier .json ou .prom>,
+les mesures sont écrites à la sortie du processus.
+"""
+import atexit
+import bisect
+import functools
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+# Bornes (secondes) des classes d'histogramme exportées vers Prometheus
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Durées récentes conservées par mesure pour les percentiles
+RECENT_SAMPLES = 1024
+PREFIX = 'ecomenu'
+
+_enabled = os.getenv('ECOMENU_METRICS', '0') == '1'
+_lock = threading.Lock()
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class TimerStats:
+    """Statistiques cumulées d'une mesure de durée"""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'rows', 'buckets', 'recent')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, seconds: float, rows: Optional[int] = None):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        if rows is not None:
+            self.rows += rows
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.recent.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        """Percentile des durées récentes (secondes)"""
+        if not self.recent:
+            return 0.0
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+
+_timers: Dict[MetricKey, TimerStats] = {}
+_counters: Dict[MetricKey, float] = {}
+_collectors: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+
+def _key(name: str, labels: Dict) -> MetricKey:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def is_enabled() -> bool:
+    """Indique si les mesures sont actives"""
+    return _enabled
+
+
+def enable(flag: bool = True):
+    """Active (ou désactive) les mesures pour tout le processus"""
+    global _enabled
+    _enabled = flag
+
+
+def reset():
+    """Efface toutes les mesures"""
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def observe(name: str, seconds: float, rows: Optional[int] = None, **labels):
+    """
+    Enregistre une durée.
+
+    Args:
+        name: Nom de la mesure ('search.fuzzy', 'llm.chat'...)
+        seconds: Durée en secondes
+        rows: Nombre de lignes traitées ou renvoyées (optionnel)
+        **labels: Étiquettes (page='search', modele='gpt-3.5-turbo'...)
+    """
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        stats = _timers.get(key)
+        if stats is None:
+            stats = _timers[key] = TimerStats()
+        stats.add(seconds, rows)
+
+
+def increment(name: str, value: float = 1, **labels):
+    """
+    Incrémente un compteur (succès de cache, tokens...).
+
+    Args:
+        name: Nom du compteur
+        value: Valeur ajoutée
+        **labels: Étiquettes
+    """
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def _row_count(result) -> Optional[int]:
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def timed(name: Optional[str] = None, rows: bool = False):
+    """
+    Décorateur mesurant la durée de chaque appel.
+
+    Args:
+        name: Nom de la mesure (module.fonction par défaut)
+        rows: Enregistrer aussi la taille (len) du résultat
+
+    Returns:
+        Décorateur
+    """
+    def decorator(func):
+        metric = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            observe(metric, time.perf_counter() - start,
+                    _row_count(result) if rows else None)
+            return result
+
+        return wrapper
+    return decorator
+
+
+class _Timer:
+    """Contexte de timer() ; `rows` peut être renseigné dans le bloc"""
+
+    __slots__ = ('name', 'labels', 'rows', 'start')
+
+    def __init__(self, name: str, labels: Dict):
+        self.name = name
+        self.labels = labels
+        self.rows = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.name, time.perf_counter() - self.start, self.rows, **self.labels)
+        return False
+
+
+class _NullTimer:
+    """Contexte vide utilisé quand les mesures sont désactivées"""
+
+    __slots__ = ()
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str, **labels):
+    """
+    Contexte mesurant la durée d'un bloc.
+
+    Args:
+        name: Nom de la mesure
+        **labels: Étiquettes
+
+    Returns:
+        Contexte ; affecter `.rows` dans le bloc pour enregistrer un nombre de lignes
+    """
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(name, labels)
+
+
+def register_collector(name: str, collector: Callable[[], Dict[str, float]]):
+    """
+    Enregistre une source de valeurs lues au moment de l'export (compteurs
+    de cache déjà tenus par les modules, par exemple).
+
+    Args:
+        name: Préfixe des valeurs ('data.shared_cache'...)
+        collector: Fonction sans argument renvoyant un dict de nombres
+    """
+    _collectors[name] = collector
+
+
+def _collect() -> Dict[str, float]:
+    gauges = {}
+    for name, collector in list(_collectors.items()):
+        try:
+            values = collector() or {}
+        except Exception:  # une source indisponible ne doit pas bloquer l'export
+            continue
+        for key, value in values.items():
+            if isinstance(value, (int, float)):
+                gauges[f"{name}.{key}"] = value
+    return gauges
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    return ','.join(f"{key}={value}" for key, value in labels)
+
+
+def snapshot() -> Dict:
+    """
+    Retourne toutes les mesures.
+
+    Returns:
+        Dict avec 'actif', 'durees' (par mesure : appels, total, moyenne,
+        p50, p95, max en millisecondes, lignes), 'compteurs' et 'caches'
+    """
+    with _lock:
+        timers = {key: stats for key, stats in _timers.items()}
+        durations = []
+        for (name, labels), stats in sorted(timers.items()):
+            durations.append({
+                'mesure': name,
+                'etiquettes': _label_text(labels),
+                'appels': stats.count,
+                'total_ms': round(stats.total * 1000, 3),
+                'moyenne_ms': round(stats.total / stats.count * 1000, 3),
+                'p50_ms': round(stats.percentile(0.5) * 1000, 3),
+                'p95_ms': round(stats.percentile(0.95) * 1000, 3),
+                'max_ms': round(stats.max * 1000, 3),
+                'lignes': stats.rows,
+            })
+        counters = [
+            {'compteur': name, 'etiquettes': _label_text(labels), 'valeur': value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+    return {
+        'actif': _enabled,
+        'durees': durations,
+        'compteurs': counters,
+        'caches': _collect(),
+    }
+
+
+def _metric_name(name: str, suffix: str = '') -> str:
+    return f"{PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}{suffix}"
+
+
+def _label_value(value) -> str:
+    """Valeur d'étiquette échappée (barre oblique inverse, guillemet, saut de ligne)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _prometheus_labels(labels: Tuple[Tuple[str, str], ...], extra: str = '') -> str:
+    parts = [f'{key}="{_label_value(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def to_prometheus() -> str:
+    """
+    Exporte les mesures au format texte Prometheus.
+
+    Returns:
+        Histogrammes <prefixe>_<mesure>_seconds, compteurs
+        <prefixe>_<compteur>_total et jauges des caches
+    """
+    lines = []
+    with _lock:
+        timers = sorted(_timers.items())
+        counters = sorted(_counters.items())
+
+    declared = set()
+    for (name, labels), stats in timers:
+        metric = _metric_name(name, '_seconds')
+        if metric not in declared:
+            lines.append(f"# TYPE {metric} histogram")
+            declared.add(metric)
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float('inf'),), stats.buckets):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f"{metric}_bucket{_prometheus_labels(labels, f'le=\"{le}\"')} {cumulative}")
+        lines.append(f"{metric}_sum{_prometheus_labels(labels)} {stats.total}")
+        lines.append(f"{metric}_count{_prometheus_labels(labels)} {stats.count}")
+
+    # Lignes traitées : second passage, les échantillons d'une famille
+    # devant se suivre (pas au milieu des histogrammes)
+    for (name, labels), stats in timers:
+        if stats.rows:
+            rows_metric = _metric_name(name, '_rows_total')
+            if rows_metric not in declared:
+                lines.append(f"# TYPE {rows_metric} counter")
+                declared.add(rows_metric)
+            lines.append(f"{rows_metric}{_prometheus_labels(labels)} {stats.rows}")
+
+    for (name, labels), value in counters:
+        metric = _metric_name(name, '_total')
+        if metric not in declared:
+            lines.append(f"# TYPE {metric} counter")
+            declared.add(metric)
+        lines.append(f"{metric}{_prometheus_labels(labels)} {value}")
+
+    for name, value in sorted(_collect().items()):
+        metric = _metric_name(name)
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+def write_metrics(path: str):
+    """
+    Écrit les mesures dans un fichier : texte Prometheus si l'extension est
+    .prom ou .txt, JSON sinon.
+
+    Args:
+        path: Fichier de destination
+    """
+    if path.endswith(('.prom', '.txt')):
+        content = to_prometheus()
+    else:
+        content = json.dumps(snapshot(), indent=2, ensure_ascii=False)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+if os.getenv('ECOMENU_METRICS_FILE'):
+    atexit.register(write_metrics, os.environ['ECOMENU_METRICS_FILE'])
+
+
+# Test des fonctions si exécuté directement
+if __name__ == "__main__":
+    def work(n):
+        return list(range(n))
+
+    plain = work
+    decorated = timed('demo.work', rows=True)(work)
+
+    for flag in (False, True):
+        enable(flag)
+        start = time.perf_counter()
+        for _ in range(100_000):
+            decorated(10)
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(100_000):
+            plain(10)
+        reference = time.perf_counter() - start
+        print(f"Mesures {'actives' if flag else 'désactivées'} : "
+              f"{(elapsed - reference) / 100_000 * 1e9:.0f} ns de surcoût par appel")
+
+    with timer('demo.bloc', page='test') as t:
+        t.rows = 3
+    increment('demo.tokens', 42, sens='envoyes')
+    print(json.dumps(snapshot(), indent=2, ensure_ascii=False))
+    print(to_prometheus())
@@ -2,12 +2,85 @@
 Module de visualisation avec Plotly
 """
 
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-from typing import Optional
 
+from ecomenu_assistant.data.binning import compute_histogram, downsample
+from ecomenu_assistant.utils.metrics import register_collector, timed
+
+# Nombre maximum de figures conservées dans le cache
+FIGURE_CACHE_SIZE = 64
+
+_figure_cache = OrderedDict()
+_figure_cache_lock = threading.Lock()
+_figure_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def get_cached_figure(chart: str, builder: Callable[[], go.Figure],
+                      version: str, **params) -> go.Figure:
+    """
+    Retourne une figure depuis le cache, en la construisant au premier appel.
+
+    Seule la construction de la figure est mise en cache : st.plotly_chart
+    la sérialise de nouveau à chaque exécution du script, et n'accepte pas
+    de JSON déjà prêt.
+
+    La figure est partagée par toutes les sessions : elle ne doit pas être
+    modifiée après coup.
+
+    Args:
+        chart: Nom du graphique
+        builder: Fonction sans argument construisant la figure
+        version: Version des données (voir loader.get_data_version)
+        **params: Paramètres du graphique, inclus dans la clé du cache
+
+    Returns:
+        Figure Plotly
+    """
+    key = (chart, version, tuple(sorted(params.items())))
+    with _figure_cache_lock:
+        figure = _figure_cache.get(key)
+        if figure is not None:
+            _figure_cache.move_to_end(key)
+            _figure_cache_stats['hits'] += 1
+            return figure
+
+    figure = builder()
+    with _figure_cache_lock:
+        _figure_cache_stats['misses'] += 1
+        _figure_cache[key] = figure
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+    return figure
+
+
+def get_figure_cache_stats() -> Dict[str, int]:
+    """
+    Retourne les compteurs du cache de figures.
 
+    Returns:
+        Dict avec 'hits', 'misses' et 'entrees'
+    """
+    with _figure_cache_lock:
+        return {**_figure_cache_stats, 'entrees': len(_figure_cache)}
+
+
+register_collector('charts.figure_cache', get_figure_cache_stats)
+
+
+def clear_figure_cache():
+    """Vide le cache de figures"""
+    with _figure_cache_lock:
+        _figure_cache.clear()
+
+
+@timed('charts.group_impact')
 def create_group_impact_chart(data: pd.DataFrame) -> go.Figure:
     """
     Crée un graphique en barres des impacts moyens par groupe d'aliments.
@@ -36,30 +109,73 @@ def create_group_impact_chart(data: pd.DataFrame) -> go.Figure:
     return fig
 
 
-def create_distribution_histogram(data: pd.DataFrame) -> go.Figure:
+@timed('charts.distribution')
+def create_distribution_histogram(data: pd.DataFrame, bins=50,
+                                  strategy: str = "uniform",
+                                  log_scale: bool = False) -> go.Figure:
     """
     Crée un histogramme de la distribution des impacts CO2.
 
+    Les classes sont calculées côté serveur : seuls leurs effectifs sont
+    envoyés au navigateur, quel que soit le nombre de produits.
+
     Args:
         data: DataFrame AGRIBALYSE complet
+        bins: Nombre de classes ou règle NumPy ('auto', 'fd'...)
+        strategy: 'uniform' (classes de même largeur) ou 'quantile'
+        log_scale: Classes et axe en échelle logarithmique
 
     Returns:
         Figure Plotly
     """
-    fig = px.histogram(
-        data,
-        x="Changement climatique",
-        nbins=50,
-        title="Distribution des impacts carbone",
-        labels={
-            "Changement climatique": "Impact CO2 (kg)",
-            "count": "Nombre de produits",
-        },
-        color_discrete_sequence=["#2ecc71"],
+    histogram = compute_histogram(
+        data["Changement climatique"].to_numpy(), bins, strategy, log_scale
     )
+    return create_binned_histogram(histogram)
+
+
+@timed('charts.binned_histogram')
+def create_binned_histogram(histogram: Dict) -> go.Figure:
+    """
+    Crée l'histogramme des impacts CO2 à partir de comptages précalculés.
+
+    Args:
+        histogram: Dict avec 'counts', 'edges' et 'moyenne'
+            (attribut histogram de AnalysisCube)
+
+    Returns:
+        Figure Plotly
+    """
+    edges = np.asarray(histogram["edges"])
+    counts = np.asarray(histogram["counts"])
+    log_scale = histogram.get("log_scale", False)
+
+    if log_scale:
+        # Histogramme en escalier : les barres Plotly gèrent mal les axes logarithmiques
+        fig = go.Figure(
+            go.Scatter(
+                x=np.repeat(edges, 2)[1:-1],
+                y=np.repeat(counts, 2),
+                mode="lines",
+                fill="tozeroy",
+                line={"color": "#2ecc71", "width": 1},
+                hovertemplate="%{x:.2f} kg : %{y} produits<extra></extra>",
+            )
+        )
+        fig.update_xaxes(type="log")
+    else:
+        fig = go.Figure(
+            go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=counts,
+                width=np.diff(edges),
+                marker_color="#2ecc71",
+                hovertemplate="%{x:.2f} kg : %{y} produits<extra></extra>",
+            )
+        )
 
     # Ajouter une ligne verticale pour la moyenne
-    moyenne = data["Changement climatique"].mean()
+    moyenne = histogram["moyenne"]
     fig.add_vline(
         x=moyenne,
         line_dash="dash",
@@ -68,11 +184,64 @@ def create_distribution_histogram(data: pd.DataFrame) -> go.Figure:
         annotation_position="top",
     )
 
-    fig.update_layout(height=400)
+    if histogram.get("hors_echelle"):
+        fig.add_annotation(
+            text=f"{histogram['hors_echelle']} produit(s) à impact nul ou négatif non affiché(s)",
+            xref="paper", yref="paper", x=1, y=1.08, showarrow=False,
+        )
+
+    fig.update_layout(
+        title="Distribution des impacts carbone",
+        xaxis_title="Impact CO2 (kg)",
+        yaxis_title="Nombre de produits",
+        bargap=0,
+        height=400,
+    )
 
     return fig
 
 
+@timed('charts.impact_scatter')
+def create_impact_scatter(data: pd.DataFrame, x: str, y: str,
+                          max_points: int = 2000, method: str = "lttb") -> go.Figure:
+    """
+    Crée un nuage de points entre deux colonnes, sous-échantillonné côté
+    serveur pour rester léger quel que soit le nombre de produits.
+
+    Args:
+        data: DataFrame AGRIBALYSE
+        x: Colonne en abscisse
+        y: Colonne en ordonnée
+        max_points: Nombre maximum de points envoyés au navigateur
+        method: Méthode de sous-échantillonnage ('lttb' ou 'stride', voir
+            binning.downsample)
+
+    Returns:
+        Figure Plotly
+    """
+    kept = downsample(data[x].to_numpy(), data[y].to_numpy(), max_points, method)
+    sample = data.iloc[kept]
+
+    fig = go.Figure(
+        go.Scattergl(
+            x=sample[x],
+            y=sample[y],
+            mode="markers",
+            text=sample["Nom du Produit en Français"],
+            marker={"color": "#2ecc71", "size": 5, "opacity": 0.7},
+            hovertemplate="%{text}<br>%{x:.2f} ; %{y:.2f}<extra></extra>",
+        )
+    )
+
+    title = f"{y} selon {x}"
+    if len(kept) < len(data):
+        title += f" ({len(kept)} produits affichés sur {len(data)})"
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y, height=500)
+
+    return fig
+
+
+@timed('charts.extremes')
 def create_extreme_products_chart(
     champions: pd.DataFrame, polluants: pd.DataFrame
 ) -> go.Figure:
@@ -114,6 +283,7 @@ def create_extreme_products_chart(
     return fig
 
 
+@timed('charts.sunburst')
 def create_subgroup_sunburst(data: pd.DataFrame) -> go.Figure:
     """
     Crée un graphique sunburst (hierarchique) des groupes et sous-groupes.
@@ -126,7 +296,7 @@ def create_subgroup_sunburst(data: pd.DataFrame) -> go.Figure:
     """
     # Agrégation par groupe et sous-groupe
     agg_data = (
-        data.groupby(["Groupe d'aliment", "Sous-groupe d'aliment"])
+        data.groupby(["Groupe d'aliment", "Sous-groupe d'aliment"], observed=True)
         .agg({"Changement climatique": "mean"})
         .reset_index()
     )
@@ -153,8 +323,48 @@ if __name__ == "__main__":
     # Ajouter le chemin pour les imports
     sys.path.append(str(Path(__file__).parent.parent.parent))
 
-    from ecomenu_assistant.data.loader import load_agribalyse_data
-    from ecomenu_assistant.data.analyzer import analyze_by_group, get_extreme_products
+    from ecomenu_assistant.data.loader import (
+        get_data_version,
+        get_shared_data,
+        load_agribalyse_data,
+    )
+    from ecomenu_assistant.data.analyzer import (
+        analyze_by_group,
+        get_analysis_cube,
+        get_extreme_products,
+    )
+
+    if "--benchmark" in sys.argv:
+        # Construction de chaque graphique comparée à une lecture du cache
+        import time
+
+        data = get_shared_data()
+        cube = get_analysis_cube(data)
+        extremes = cube.get_extremes(10)
+        version = get_data_version()
+        charts = {
+            'groupes': lambda: create_group_impact_chart(cube.group_stats),
+            'distribution': lambda: create_binned_histogram(cube.histogram),
+            'extremes': lambda: create_extreme_products_chart(
+                extremes['champions'], extremes['polluants']
+            ),
+            'sunburst': lambda: create_subgroup_sunburst(data),
+        }
+        repeats = 20
+        for chart, builder in charts.items():
+            builder()
+            start = time.perf_counter()
+            for _ in range(repeats):
+                builder()
+            built = (time.perf_counter() - start) / repeats * 1000
+
+            get_cached_figure(chart, builder, version)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                get_cached_figure(chart, builder, version)
+            cached = (time.perf_counter() - start) / repeats * 1000
+            print(f"{chart:<14} construction: {built:7.2f} ms   cache: {cached:.4f} ms")
+        sys.exit(0)
 
     print("Chargement des données...")
     data = load_agribalyse_data()
@@ -0,0 +1,239 @@
+"""
+Mesures de performance des chemins critiques (chargement, recherche,
+analyse, graphiques, contexte LLM).
+
+Les mesures ne sont lancées qu'avec --bench-run (options déclarées dans
+tests/conftest.py) : sans elle, `pytest` les ignore.
+
+Chaque test reçoit la fixture `bench` : bench(fonction, *args) exécute la
+fonction une première fois (préchauffage), puis la chronomètre jusqu'à
+--bench-min-time secondes. Les résultats sont écrits dans
+.benchmarks/latest.json et comparés à la référence enregistrée
+(tests/benchmarks/baseline.json) dans le rapport de fin de session.
+
+Les jeux de données agrandis (x10, x100) sont générés à partir du fichier
+AGRIBALYSE fourni ; l'API OpenAI est remplacée par un client factice.
+
+Utilisation :
+    pytest tests/benchmarks --bench-run                        # jeu x1, comparaison
+    pytest tests/benchmarks --bench-run --bench-scales=1,10,100
+    pytest tests/benchmarks --bench-run --bench-save           # nouvelle référence
+    pytest tests/benchmarks --bench-run --bench-fail-on-regression
+"""
+import json
+import os
+import platform
+import shutil
+import statistics
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ecomenu_assistant.data.loader import (
+    COLONNES_INDICATEURS,
+    get_default_data_path,
+    get_shared_data,
+)
+
+NAME_COLUMN = 'Nom du Produit en Français'
+
+_results = {}
+
+
+def pytest_generate_tests(metafunc):
+    if "scale" in metafunc.fixturenames:
+        scales = [int(s) for s in metafunc.config.getoption("bench_scales").split(",")]
+        metafunc.parametrize("scale", scales, ids=[f"x{s}" for s in scales], scope="session")
+
+
+class Bench:
+    """Chronomètre une fonction et enregistre ses temps d'exécution"""
+
+    def __init__(self, name: str, min_time: float, max_rounds: int):
+        self.name = name
+        self.min_time = min_time
+        self.max_rounds = max_rounds
+        # Désactiver pour les fonctions trop coûteuses pour être exécutées deux fois
+        self.warmup = True
+
+    def __call__(self, func, *args, **kwargs):
+        result = func(*args, **kwargs) if self.warmup else None
+
+        times = []
+        started = time.perf_counter()
+        while not times or (
+            len(times) < self.max_rounds and time.perf_counter() - started < self.min_time
+        ):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            times.append(time.perf_counter() - start)
+
+        _results[self.name] = {
+            'median': statistics.median(times),
+            'min': min(times),
+            'mean': statistics.fmean(times),
+            'rounds': len(times),
+        }
+        return result
+
+
+@pytest.fixture
+def bench(request):
+    config = request.config
+    return Bench(
+        request.node.nodeid.split("::", 1)[-1],
+        config.getoption("bench_min_time"),
+        config.getoption("bench_max_rounds"),
+    )
+
+
+def make_scaled_csv(source: Path, target: Path, scale: int, seed: int = 0):
+    """
+    Écrit un fichier AGRIBALYSE agrandi : chaque produit est répété `scale`
+    fois, avec un nom distinct et des impacts légèrement différents.
+    """
+    raw = pd.read_csv(source)
+    products = raw[raw[NAME_COLUMN].notna()]
+    indicators = [col for col in COLONNES_INDICATEURS + ['Score unique EF'] if col in raw.columns]
+    rng = np.random.default_rng(seed)
+
+    parts = [raw]
+    for copy in range(1, scale):
+        part = products.copy()
+        part[NAME_COLUMN] = part[NAME_COLUMN] + f" (variante {copy})"
+        part[indicators] = part[indicators] * rng.uniform(0.8, 1.2, size=(len(part), 1))
+        parts.append(part)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    pd.concat(parts, ignore_index=True).to_csv(target, index=False)
+
+
+@pytest.fixture(scope="session")
+def dataset_path(scale, tmp_path_factory) -> Path:
+    """Fichier CSV agrandi `scale` fois (dans data/raw/ d'un dossier temporaire)"""
+    root = tmp_path_factory.mktemp(f"agribalyse_x{scale}")
+    target = root / "raw" / "Agribalyse_Synthese.csv"
+    if scale == 1:
+        target.parent.mkdir(parents=True)
+        shutil.copy(get_default_data_path(), target)
+    else:
+        make_scaled_csv(get_default_data_path(), target, scale)
+    return target
+
+
+@pytest.fixture(scope="session")
+def dataset(dataset_path) -> pd.DataFrame:
+    """Données partagées du fichier : index et tables dérivées sont mis en cache comme dans l'application"""
+    return get_shared_data(str(dataset_path))
+
+
+class StubPool:
+    """Client LLM factice : réponses immédiates, sans accès réseau"""
+
+    reply = "Réponse de test : privilégiez les légumineuses 🌱"
+
+    def complete(self, **kwargs):
+        message = SimpleNamespace(content=self.reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def stream(self, **kwargs):
+        yield from self.reply.split(" ")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def offline_llm():
+    """Aucun appel réel à l'API OpenAI pendant les mesures"""
+    saved = {key: os.environ.get(key) for key in ('OPENAI_API_KEY', 'OPENAI_BASE_URL', 'ECOMENU_LLM_CACHE')}
+    os.environ['OPENAI_API_KEY'] = 'sk-test'
+    os.environ['OPENAI_BASE_URL'] = 'http://127.0.0.1:9/v1'
+    os.environ['ECOMENU_LLM_CACHE'] = '0'
+    yield StubPool()
+    for key, value in saved.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+
+
+def _load_baseline(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def _write_results(path: Path, results: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processeurs': os.cpu_count(),
+        },
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, sort_keys=True, ensure_ascii=False)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    config = session.config
+    _write_results(Path(config.rootpath) / ".benchmarks" / "latest.json", _results)
+
+    baseline_path = Path(config.getoption("bench_baseline"))
+    if config.getoption("bench_save"):
+        results = {**_load_baseline(baseline_path), **_results}
+        _write_results(baseline_path, results)
+        return
+
+    max_ratio = config.getoption("bench_max_regression")
+    baseline = _load_baseline(baseline_path)
+    regressions = [
+        name for name, result in _results.items()
+        if name in baseline and result['median'] > baseline[name]['median'] * max_ratio
+    ]
+    config._bench_regressions = regressions
+    if regressions and config.getoption("bench_fail_on_regression"):
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _results:
+        return
+    baseline_path = Path(config.getoption("bench_baseline"))
+    if config.getoption("bench_save"):
+        terminalreporter.write_sep("=", f"référence enregistrée dans {baseline_path}")
+
+    baseline = {} if config.getoption("bench_save") else _load_baseline(baseline_path)
+    regressions = set(getattr(config, "_bench_regressions", []))
+
+    terminalreporter.write_sep("=", "mesures de performance (médiane)")
+    width = max(len(name) for name in _results)
+    terminalreporter.write_line(
+        f"{'test':<{width}}  {'référence':>12}  {'actuel':>12}  {'ratio':>7}  mesures"
+    )
+    for name in sorted(_results):
+        result = _results[name]
+        current = f"{result['median'] * 1000:10.3f} ms"
+        if name in baseline:
+            reference = baseline[name]['median']
+            ratio = result['median'] / reference if reference else float('inf')
+            line = f"{name:<{width}}  {reference * 1000:10.3f} ms  {current}  {ratio:6.2f}x"
+        else:
+            line = f"{name:<{width}}  {'-':>12}  {current}  {'-':>7}"
+        line += f"  {result['rounds']}"
+        if name in regressions:
+            line += "  RÉGRESSION"
+        terminalreporter.write_line(line, red=name in regressions)
+
+    if regressions:
+        terminalreporter.write_sep(
+            "-", f"{len(regressions)} régression(s) au-delà de "
+                 f"{config.getoption('bench_max_regression')}x la référence"
+        )
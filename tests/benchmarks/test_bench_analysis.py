@@ -0,0 +1,55 @@
+"""
+Mesures des fonctions d'analyse statistique
+"""
+from ecomenu_assistant.data.analyzer import (
+    AnalysisCube,
+    analyze_by_group,
+    analyze_by_subgroup,
+    get_analysis_cube,
+    get_extreme_products,
+    get_global_stats,
+)
+from ecomenu_assistant.data.incremental import IncrementalAnalyzer
+
+
+def test_analyze_by_group(bench, dataset):
+    assert len(bench(analyze_by_group, dataset)) > 0
+
+
+def test_analyze_by_subgroup(bench, dataset):
+    assert len(bench(analyze_by_subgroup, dataset)) > 0
+
+
+def test_get_extreme_products(bench, dataset):
+    extremes = bench(get_extreme_products, dataset, n=10)
+    assert len(extremes['champions']) == 10
+
+
+def test_get_global_stats(bench, dataset):
+    assert 'mediane' in bench(get_global_stats, dataset)
+
+
+def test_build_analysis_cube(bench, dataset):
+    assert bench(AnalysisCube, dataset).global_stats
+
+
+def test_analysis_page_from_cube(bench, dataset):
+    """Lectures faites par la page d'analyse une fois les agrégats construits"""
+    def read():
+        cube = get_analysis_cube(dataset)
+        return cube.global_stats, cube.get_histogram(), cube.group_stats, cube.get_extremes(10)
+
+    bench(read)
+
+
+def test_incremental_update(bench, dataset):
+    analyzer = IncrementalAnalyzer.from_dataframe(dataset)
+    keys = list(analyzer.rows)[:100]
+
+    def update():
+        for key in keys:
+            group, subgroup, impact = analyzer.rows[key]
+            analyzer.upsert(key, group, subgroup, impact)
+        return analyzer.get_global_stats()
+
+    bench(update)
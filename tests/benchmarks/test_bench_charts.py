@@ -0,0 +1,51 @@
+"""
+Mesures de la construction des graphiques
+"""
+from ecomenu_assistant.data.analyzer import analyze_by_group, get_analysis_cube
+from ecomenu_assistant.visualization.charts import (
+    create_binned_histogram,
+    create_distribution_histogram,
+    create_extreme_products_chart,
+    create_group_impact_chart,
+    create_impact_scatter,
+    create_subgroup_sunburst,
+    get_cached_figure,
+)
+
+
+def test_group_impact_chart(bench, dataset):
+    group_stats = analyze_by_group(dataset)
+    bench(create_group_impact_chart, group_stats)
+
+
+def test_distribution_histogram(bench, dataset):
+    bench(create_distribution_histogram, dataset)
+
+
+def test_distribution_histogram_log(bench, dataset):
+    bench(create_distribution_histogram, dataset, log_scale=True)
+
+
+def test_binned_histogram(bench, dataset):
+    bench(create_binned_histogram, get_analysis_cube(dataset).histogram)
+
+
+def test_extreme_products_chart(bench, dataset):
+    extremes = get_analysis_cube(dataset).get_extremes(10)
+    bench(create_extreme_products_chart, extremes['champions'], extremes['polluants'])
+
+
+def test_subgroup_sunburst(bench, dataset):
+    bench(create_subgroup_sunburst, dataset)
+
+
+def test_impact_scatter(bench, dataset):
+    bench(create_impact_scatter, dataset, 'DQR', 'Changement climatique')
+
+
+def test_cached_figure(bench, dataset, scale):
+    group_stats = analyze_by_group(dataset)
+    bench(
+        get_cached_figure, 'groupes', lambda: create_group_impact_chart(group_stats),
+        f"benchmark-x{scale}"
+    )
@@ -0,0 +1,28 @@
+"""
+Mesures des exports en flux (CSV, Parquet, rapport PDF)
+"""
+import io
+
+from ecomenu_assistant.data.analyzer import get_analysis_cube
+from ecomenu_assistant.data.export import analysis_report_sections, iter_frames, write_csv, write_parquet, write_pdf
+
+
+def test_export_csv(bench, dataset):
+    def export():
+        target = io.BytesIO()
+        write_csv(iter_frames(dataset), target)
+        return target.tell()
+
+    assert bench(export) > 0
+
+
+def test_export_parquet(bench, dataset):
+    def export():
+        return write_parquet(iter_frames(dataset), io.BytesIO())
+
+    assert bench(export) == len(dataset)
+
+
+def test_export_analysis_report(bench, dataset):
+    cube = get_analysis_cube(dataset)
+    assert bench(lambda: write_pdf(analysis_report_sections(cube), io.BytesIO())) > 0
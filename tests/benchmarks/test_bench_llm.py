@@ -0,0 +1,31 @@
+"""
+Mesures de la préparation des requêtes LLM (API OpenAI remplacée par un client factice)
+"""
+import pytest
+
+from ecomenu_assistant.llm.context import build_product_context
+from ecomenu_assistant.llm.openai_client import EcoMenuAssistant
+
+
+@pytest.fixture
+def assistant(offline_llm):
+    return EcoMenuAssistant(pool=offline_llm)
+
+
+def test_get_product_info(bench, dataset, assistant):
+    info = bench(assistant.get_product_info, "boeuf", dataset)
+    assert "boeuf" in info.lower()
+
+
+def test_build_product_context(bench, dataset):
+    message = "Par quoi remplacer le bœuf haché et les tomates dans mes lasagnes ?"
+    assert bench(build_product_context, message, dataset)
+
+
+def test_chat_round_trip(bench, dataset, assistant):
+    message = "Quel est l'impact du poulet comparé aux lentilles ?"
+
+    def chat():
+        return assistant.chat(message, build_product_context(message, dataset))
+
+    assert bench(chat) == assistant.client.reply
@@ -0,0 +1,40 @@
+"""
+Mesures du chargement des données
+"""
+from ecomenu_assistant.data.incremental import IncrementalAnalyzer
+from ecomenu_assistant.data.loader import (
+    build_agribalyse_snapshot,
+    get_shared_data,
+    iter_agribalyse_chunks,
+    load_agribalyse_data,
+)
+
+
+def test_load_csv(bench, dataset_path):
+    bench.warmup = False
+    data = bench(load_agribalyse_data, str(dataset_path), use_snapshot=False)
+    assert len(data) > 0
+
+
+def test_load_csv_extended(bench, dataset_path):
+    bench.warmup = False
+    data = bench(load_agribalyse_data, str(dataset_path), use_snapshot=False, extended=True)
+    assert 'Score unique EF' in data.columns
+
+
+def test_load_snapshot(bench, dataset_path):
+    build_agribalyse_snapshot(str(dataset_path))
+    data = bench(load_agribalyse_data, str(dataset_path))
+    assert len(data) > 0
+
+
+def test_stream_to_incremental_analyzer(bench, dataset_path):
+    bench.warmup = False
+    analyzer = bench(
+        lambda: IncrementalAnalyzer.from_chunks(iter_agribalyse_chunks(str(dataset_path)))
+    )
+    assert analyzer.get_global_stats()['max'] > 0
+
+
+def test_shared_data_cache_hit(bench, dataset, dataset_path):
+    assert bench(get_shared_data, str(dataset_path)) is dataset
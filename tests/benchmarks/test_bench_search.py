@@ -0,0 +1,28 @@
+"""
+Mesures de la recherche de produits
+"""
+import pytest
+
+from ecomenu_assistant.data.search import build_search_index, get_search_index
+
+# Nombre de résultats affichés par la page de recherche (MAX_RESULTATS dans ui/app.py)
+MAX_RESULTATS = 100
+
+
+def test_build_search_index(bench, dataset):
+    bench.warmup = False
+    index = bench(build_search_index, dataset)
+    assert len(index) == len(dataset)
+
+
+@pytest.mark.parametrize("query", ["boeuf", "pomme de terre", "beuf bourguigon", "fromage de chevre"])
+def test_search_page_query(bench, dataset, query):
+    """Recherche telle que faite par show_search_page"""
+    index = get_search_index(dataset)
+
+    def search():
+        row_ids = index.fuzzy_search(query, limit=MAX_RESULTATS)
+        return dataset.iloc[row_ids]
+
+    results = bench(search)
+    assert len(results) > 0
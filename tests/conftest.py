@@ -0,0 +1,48 @@
+"""
+Configuration commune des tests.
+
+Les mesures de performance (tests/benchmarks, marqueur `bench`) sont
+longues et dépendent de la machine : elles ne tournent qu'avec --bench-run.
+Leurs options sont déclarées ici pour être reconnues quel que soit le
+dossier passé à pytest.
+"""
+from pathlib import Path
+
+import pytest
+
+BENCH_DIR = Path(__file__).parent / "benchmarks"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "Mesures de performance")
+    group.addoption("--bench-run", action="store_true",
+                    help="Lancer les mesures de performance (ignorées sinon)")
+    group.addoption("--bench-scales", default="1",
+                    help="Facteurs d'agrandissement des données, séparés par des virgules (ex: 1,10,100)")
+    group.addoption("--bench-min-time", type=float, default=0.2,
+                    help="Durée minimale de mesure par test, en secondes")
+    group.addoption("--bench-max-rounds", type=int, default=200,
+                    help="Nombre maximum de mesures par test")
+    group.addoption("--bench-baseline", default=str(DEFAULT_BASELINE),
+                    help="Fichier JSON des mesures de référence")
+    group.addoption("--bench-save", action="store_true",
+                    help="Enregistrer les mesures comme nouvelle référence")
+    group.addoption("--bench-max-regression", type=float, default=1.5,
+                    help="Ratio actuel/référence au-delà duquel une mesure est une régression")
+    group.addoption("--bench-fail-on-regression", action="store_true",
+                    help="Faire échouer la session en cas de régression")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "bench: mesure de performance (lancée avec --bench-run)")
+
+
+def pytest_collection_modifyitems(config, items):
+    run = config.getoption("bench_run")
+    skip = pytest.mark.skip(reason="mesure de performance : relancer avec --bench-run")
+    for item in items:
+        if BENCH_DIR in item.path.parents:
+            item.add_marker(pytest.mark.bench)
+            if not run:
+                item.add_marker(skip)
@@ -0,0 +1,62 @@
+"""
+Agrégats de la page d'analyse (AnalysisCube) : mêmes résultats que les
+fonctions d'analyse, histogrammes calculés une fois, accès concurrents
+"""
+import threading
+
+import pandas as pd
+import pytest
+
+from ecomenu_assistant.data.analyzer import (
+    IMPACT_COLUMN,
+    AnalysisCube,
+    analyze_by_group,
+    analyze_by_subgroup,
+    get_extreme_products,
+    get_global_stats,
+)
+from ecomenu_assistant.data.loader import load_agribalyse_data
+
+
+@pytest.fixture(scope="module")
+def data():
+    return load_agribalyse_data()
+
+
+@pytest.fixture(scope="module")
+def cube(data):
+    return AnalysisCube(data, max_extremes=20)
+
+
+def test_stats_match_analysis_functions(data, cube):
+    assert cube.global_stats == get_global_stats(data)
+    pd.testing.assert_frame_equal(cube.group_stats, analyze_by_group(data))
+    pd.testing.assert_frame_equal(cube.subgroup_stats, analyze_by_subgroup(data))
+    for q, value in cube.quantiles.items():
+        assert value == pytest.approx(data[IMPACT_COLUMN].quantile(q))
+
+
+@pytest.mark.parametrize("n", [1, 10, 20])
+def test_extremes_match_analysis_functions(data, cube, n):
+    extremes = cube.get_extremes(n)
+    for key, frame in get_extreme_products(data, n=n).items():
+        pd.testing.assert_frame_equal(extremes[key], frame)
+
+
+def test_extremes_limit(cube):
+    with pytest.raises(ValueError):
+        cube.get_extremes(21)
+
+
+def test_histogram_computed_once_under_concurrency(cube):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cube.get_histogram(30, 'quantile')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(histogram is results[0] for histogram in results)
+    assert cube.get_histogram(50) is cube.histogram
+    assert sum(cube.histogram['counts']) == len(cube._values)
@@ -0,0 +1,109 @@
+"""
+API HTTP (tornado) : ETag et 304, HEAD, appels groupés bornés, erreurs
+JSON 400/404 et forme des alternatives
+"""
+import json
+
+from tornado.testing import AsyncHTTPTestCase
+
+from ecomenu_assistant.api import server
+from ecomenu_assistant.api.server import make_app
+
+CODE = '11172'
+
+
+class APITestCase(AsyncHTTPTestCase):
+
+    def get_app(self):
+        return make_app()
+
+    def get_json(self, path: str, **kwargs):
+        response = self.fetch(path, **kwargs)
+        return response, json.loads(response.body) if response.body else None
+
+    def post_json(self, path: str, body):
+        response = self.fetch(path, method='POST', body=json.dumps(body))
+        return response, json.loads(response.body)
+
+    def test_etag_and_not_modified(self):
+        response, info = self.get_json('/v1/info')
+        etag = response.headers['ETag']
+        self.assertEqual(etag, f'"{info["version"]}"')
+
+        for path in ('/v1/info', f'/v1/products/{CODE}'):
+            response = self.fetch(path, headers={'If-None-Match': etag})
+            self.assertEqual(response.code, 304)
+            self.assertEqual(response.body, b'')
+
+    def test_unknown_product_is_404_even_with_etag(self):
+        etag = self.fetch('/v1/info').headers['ETag']
+        response, body = self.get_json('/v1/products/inconnu', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.code, 404)
+        self.assertIn('inconnu', body['erreur'])
+        self.assertNotIn('ETag', response.headers)
+        self.assertEqual(response.headers['Cache-Control'], 'no-store')
+
+    def test_head(self):
+        response = self.fetch(f'/v1/products/{CODE}', method='HEAD')
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response.body, b'')
+        self.assertIn('ETag', response.headers)
+        self.assertEqual(self.fetch('/v1/products/inconnu', method='HEAD').code, 404)
+
+    def test_product_details(self):
+        response, product = self.get_json(f'/v1/products/{CODE}')
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(product['code'], CODE)
+        self.assertIn('indicateurs', product)
+
+    def test_alternatives_shape(self):
+        response, item = self.get_json(f'/v1/products/{CODE}/alternatives?k=3')
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(item['code'], CODE)
+        self.assertLessEqual(len(item['alternatives']), 3)
+        for rank, alternative in enumerate(item['alternatives'], start=1):
+            self.assertEqual(set(alternative), {'rang', 'economie', 'produit'})
+            self.assertEqual(alternative['rang'], rank)
+            self.assertGreaterEqual(alternative['economie'], 0)
+            self.assertNotEqual(alternative['produit']['code'], CODE)
+
+        response, body = self.post_json('/v1/alternatives/batch', {'codes': [CODE, 'inconnu'], 'k': 3})
+        self.assertEqual(body['resultats'], [item])
+        self.assertEqual(body['inconnus'], ['inconnu'])
+
+    def test_batch_limit(self):
+        original = server.MAX_BATCH
+        server.MAX_BATCH = 2
+        try:
+            response, body = self.post_json('/v1/products/batch', {'codes': [CODE] * 3})
+        finally:
+            server.MAX_BATCH = original
+        self.assertEqual(response.code, 400)
+        self.assertIn('2', body['erreur'])
+
+    def test_search_batch(self):
+        response, body = self.post_json('/v1/search/batch', {'requetes': ['boeuf', 'pomme'], 'limit': 2, 'fuzzy': False})
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual([item['requete'] for item in body['resultats']], ['boeuf', 'pomme'])
+        self.assertTrue(all(0 < len(item['produits']) <= 2 for item in body['resultats']))
+
+    def test_bad_requests_are_json_400(self):
+        for path, payload in [
+            ('/v1/search/batch', {'requetes': [12]}),
+            ('/v1/search/batch', {'requetes': ['boeuf'], 'fuzzy': 'false'}),
+            ('/v1/search/batch', {'requetes': 'boeuf'}),
+            ('/v1/products/batch', {'codes': [CODE], 'details': 'true'}),
+            ('/v1/products/batch', ['pas', 'un', 'objet']),
+        ]:
+            response, body = self.post_json(path, payload)
+            self.assertEqual(response.code, 400, payload)
+            self.assertIn('erreur', body)
+
+        response, body = self.get_json('/v1/search?q=boeuf&limit=abc')
+        self.assertEqual(response.code, 400)
+        self.assertIn('limit', body['erreur'])
@@ -0,0 +1,229 @@
+"""
+Client OpenAI asynchrone (AsyncLLMPool) face à un serveur HTTP local qui
+imite l'API : reprises après 429, backoff, limite de concurrence, réponses
+complètes et en streaming.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from openai import RateLimitError
+
+from ecomenu_assistant.llm import async_client
+from ecomenu_assistant.llm.async_client import AsyncLLMPool, parse_retry_after
+
+
+class StubAPI:
+    """État du serveur : réponses à renvoyer et requêtes observées"""
+
+    def __init__(self):
+        self.failures = 0          # 429 renvoyées avant de répondre
+        self.retry_after_ms = None  # en-tête retry-after-ms des 429
+        self.hold = 0.0            # durée pendant laquelle chaque requête est retenue
+        self.chunks = ["Bon", "jour"]
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(api: StubAPI):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _json(self, status: int, body: dict, headers: dict = None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            with api.lock:
+                api.requests += 1
+                rate_limited = api.failures > 0
+                if rate_limited:
+                    api.failures -= 1
+                api.in_flight += 1
+                api.max_in_flight = max(api.max_in_flight, api.in_flight)
+            try:
+                time.sleep(api.hold)
+                if rate_limited:
+                    headers = {}
+                    if api.retry_after_ms is not None:
+                        headers['retry-after-ms'] = str(api.retry_after_ms)
+                    self._json(429, {'error': {'message': "Rate limit", 'type': 'requests'}}, headers)
+                elif body.get('stream'):
+                    self._stream(body['model'])
+                else:
+                    self._json(200, completion(body['model'], ''.join(api.chunks)))
+            finally:
+                with api.lock:
+                    api.in_flight -= 1
+
+        def _stream(self, model: str):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.end_headers()
+            for text in api.chunks:
+                chunk = {
+                    'id': 'stub', 'object': 'chat.completion.chunk', 'created': 0, 'model': model,
+                    'choices': [{'index': 0, 'delta': {'content': text}, 'finish_reason': None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+
+    return Handler
+
+
+def completion(model: str, content: str) -> dict:
+    return {
+        'id': 'stub', 'object': 'chat.completion', 'created': 0, 'model': model,
+        'choices': [{'index': 0, 'finish_reason': 'stop',
+                     'message': {'role': 'assistant', 'content': content}}],
+    }
+
+
+@pytest.fixture
+def api():
+    state = StubAPI()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_pool(api):
+    pools = []
+
+    def make(**options):
+        pool = AsyncLLMPool(api_key='test', base_url=api.base_url, timeout=5.0, **options)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+MESSAGES = [{'role': 'user', 'content': "Bonjour"}]
+
+
+def test_complete(api, make_pool):
+    response = make_pool().complete(model='stub', messages=MESSAGES)
+
+    assert response.choices[0].message.content == "Bonjour"
+    assert api.requests == 1
+
+
+def test_retry_after_429_honours_retry_after(api, make_pool):
+    api.failures, api.retry_after_ms = 2, 100
+    pool = make_pool(base_delay=0.001)
+
+    start = time.perf_counter()
+    response = pool.complete(model='stub', messages=MESSAGES)
+    elapsed = time.perf_counter() - start
+
+    assert response.choices[0].message.content == "Bonjour"
+    assert api.requests == 3
+    assert pool.retries == 2
+    assert elapsed >= 0.2
+
+
+def test_retry_exponential_backoff(api, make_pool, monkeypatch):
+    # Gigue désactivée : chaque délai vaut sa borne haute
+    delays = []
+    monkeypatch.setattr(async_client.random, 'uniform', lambda low, high: delays.append(high) or high)
+    api.failures = 3
+    pool = make_pool(base_delay=0.02, max_delay=0.05)
+
+    pool.complete(model='stub', messages=MESSAGES)
+
+    assert delays == [0.02, 0.04, 0.05]
+    assert pool.retries == 3
+
+
+def test_retries_exhausted(api, make_pool):
+    api.failures, api.retry_after_ms = 10, 1
+    pool = make_pool(max_retries=2)
+
+    with pytest.raises(RateLimitError):
+        pool.complete(model='stub', messages=MESSAGES)
+    assert api.requests == 3
+
+
+def test_concurrency_capped_by_semaphore(api, make_pool):
+    api.hold = 0.2
+    pool = make_pool(max_concurrency=2)
+
+    with ThreadPoolExecutor(6) as executor:
+        responses = list(executor.map(
+            lambda _: pool.complete(model='stub', messages=MESSAGES), range(6)
+        ))
+
+    assert len(responses) == 6
+    assert api.requests == 6
+    assert api.max_in_flight == 2
+
+
+def test_stream(api, make_pool):
+    api.chunks = ["Une ", "réponse ", "en flux"]
+
+    assert list(make_pool().stream(model='stub', messages=MESSAGES)) == api.chunks
+
+
+def test_stream_retries_before_first_chunk(api, make_pool):
+    api.failures, api.retry_after_ms = 1, 10
+    pool = make_pool()
+
+    assert ''.join(pool.stream(model='stub', messages=MESSAGES)) == "Bonjour"
+    assert pool.retries == 1
+    assert api.requests == 2
+
+
+def test_stream_holds_semaphore(api, make_pool):
+    api.hold = 0.2
+    pool = make_pool(max_concurrency=1)
+
+    with ThreadPoolExecutor(3) as executor:
+        texts = list(executor.map(
+            lambda _: ''.join(pool.stream(model='stub', messages=MESSAGES)), range(3)
+        ))
+
+    assert texts == ["Bonjour"] * 3
+    assert api.max_in_flight == 1
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({'retry-after-ms': '250'}, 0.25),
+    ({'retry-after': '2'}, 2.0),
+    ({'x-ratelimit-reset-requests': '1s', 'x-ratelimit-reset-tokens': '6m0s'}, 360.0),
+    ({'x-ratelimit-reset-tokens': '20ms'}, 0.02),
+    ({}, None),
+])
+def test_parse_retry_after(headers, expected):
+    if expected is None:
+        assert parse_retry_after(headers) is None
+    else:
+        assert parse_retry_after(headers) == pytest.approx(expected)
+
+
+def test_close_stops_loop_thread(api):
+    pool = AsyncLLMPool(api_key='test', base_url=api.base_url, timeout=5.0)
+    pool.close()
+
+    assert not pool._thread.is_alive()
+    assert pool._loop.is_closed()
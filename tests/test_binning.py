@@ -0,0 +1,92 @@
+"""
+Histogrammes précalculés (compute_histogram) et sous-échantillonnage des
+nuages de points (downsample)
+"""
+import numpy as np
+import pytest
+
+from ecomenu_assistant.data.binning import compute_histogram, downsample
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(0).lognormal(mean=1.0, sigma=1.2, size=10_000)
+
+
+@pytest.mark.parametrize("options", [{}, {'strategy': 'quantile'}, {'log_scale': True}])
+def test_empty_input(options):
+    histogram = compute_histogram([np.nan], **options)
+
+    assert len(histogram['counts']) == 0
+    assert len(histogram['edges']) == 1
+    assert histogram['moyenne'] == 0.0
+
+
+@pytest.mark.parametrize("strategy", ['uniform', 'quantile'])
+@pytest.mark.parametrize("log_scale", [False, True])
+def test_constant_input(strategy, log_scale):
+    histogram = compute_histogram(np.full(100, 3.0), 10, strategy, log_scale)
+
+    assert histogram['counts'].sum() == 100
+    assert histogram['edges'][0] <= 3.0 <= histogram['edges'][-1]
+    assert histogram['moyenne'] == 3.0
+
+
+def test_log_scale_excludes_non_positive():
+    histogram = compute_histogram([-2.0, 0.0, 0.5, 1.0, 10.0, np.nan], 4, log_scale=True)
+
+    assert histogram['hors_echelle'] == 2
+    assert histogram['counts'].sum() == 3
+    assert histogram['edges'][0] == pytest.approx(0.5)
+    assert histogram['edges'][-1] == pytest.approx(10.0)
+    # La moyenne porte sur toutes les valeurs finies
+    assert histogram['moyenne'] == pytest.approx(9.5 / 5)
+
+
+def test_quantile_log_scale_has_equal_counts(values):
+    quantile = compute_histogram(values, 10, 'quantile', log_scale=True)
+    uniform = compute_histogram(values, 10, 'uniform', log_scale=True)
+
+    assert quantile['counts'].tolist() == [1000] * 10
+    np.testing.assert_allclose(quantile['edges'], np.quantile(values, np.linspace(0, 1, 11)))
+    # Échelle logarithmique uniforme : rapport constant entre bornes successives
+    ratios = uniform['edges'][1:] / uniform['edges'][:-1]
+    np.testing.assert_allclose(ratios, ratios[0])
+    assert not np.allclose(quantile['edges'], uniform['edges'])
+
+
+def test_unknown_strategy(values):
+    with pytest.raises(ValueError):
+        compute_histogram(values, strategy='égal')
+    with pytest.raises(ValueError):
+        compute_histogram(values, bins='inconnue')
+
+
+@pytest.mark.parametrize("method", ['lttb', 'stride'])
+def test_downsample_keeps_endpoints(method):
+    rng = np.random.default_rng(1)
+    x = rng.uniform(0, 100, 5000)
+    y = np.sin(x)
+    x[10], y[10] = np.nan, np.nan
+
+    kept = downsample(x, y, max_points=100, method=method)
+
+    assert len(kept) == 100
+    assert 10 not in kept
+    assert np.all(np.diff(x[kept]) >= 0)
+    assert kept[0] == np.nanargmin(x)
+    assert kept[-1] == np.nanargmax(x)
+
+
+def test_lttb_keeps_peak():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[537] = 50.0
+
+    assert 537 in downsample(x, y, max_points=20)
+
+
+def test_downsample_small_input_is_unchanged():
+    x = np.array([3.0, 1.0, 2.0])
+
+    assert downsample(x, x, max_points=10).tolist() == [1, 2, 0]
@@ -0,0 +1,66 @@
+"""
+Repérage des produits cités dans un message (ProductMentionIndex)
+"""
+import pytest
+
+from ecomenu_assistant.data.loader import load_agribalyse_data
+from ecomenu_assistant.llm.context import NAME_COLUMN, ProductMentionIndex, build_product_context
+
+
+@pytest.fixture(scope="module")
+def data():
+    return load_agribalyse_data()
+
+
+@pytest.fixture(scope="module")
+def index(data):
+    return ProductMentionIndex(data)
+
+
+def mentioned(index, data, message):
+    """{désignation: noms des produits par pertinence}"""
+    names = data[NAME_COLUMN].to_numpy()
+    return {phrase: list(names[row_ids]) for phrase, row_ids in index.find_mentions(message)}
+
+
+def test_pates_not_merged_with_pate(index, data):
+    mentions = mentioned(index, data, "Une recette de pâtes au pesto ?")
+
+    assert list(mentions) == ["pâte"]
+    assert mentions["pâte"][0].startswith("Pâtes sèches")
+    assert not any(name.startswith("Pâté") for name in mentions["pâte"])
+
+    pate = mentioned(index, data, "Du pâté sur du pain")["pâté"]
+    assert all(name.startswith("Pâté") for name in pate)
+
+
+def test_message_without_accents(index, data):
+    assert mentioned(index, data, "des pates")["pâte"][0].startswith("Pâtes sèches")
+    assert "steak haché" in mentioned(index, data, "steak hache")
+
+
+def test_steak_hache(index, data):
+    mentions = mentioned(index, data, "Par quoi remplacer le steak haché ?")
+
+    assert list(mentions) == ["steak haché"]
+    assert all("steak haché" in name for name in mentions["steak haché"])
+
+
+@pytest.mark.parametrize("message", ["pomme de terre", "des pommes de terre ou du riz"])
+def test_pomme_de_terre(index, data, message):
+    mentions = mentioned(index, data, message)
+
+    assert "pomme" not in mentions
+    products = mentions["pomme de terre"]
+    assert products[0] == "Pomme de terre, sans peau, crue"
+    # Désignation au début du nom d'abord ("Pomme de terre, ..." avant "Purée, ...")
+    heads = [name.startswith("Pomme de terre") for name in products]
+    assert heads == sorted(heads, reverse=True)
+
+
+def test_build_product_context(data):
+    context = build_product_context("Des pâtes ou du riz ?", data)
+
+    assert "« pâte »" in context and "« riz »" in context
+    assert "Pâté" not in context
+    assert build_product_context("Bonjour !", data) == ""
@@ -0,0 +1,68 @@
+"""
+Table des alternatives bas carbone (RecommendationEngine)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from ecomenu_assistant.data.loader import load_agribalyse_data
+from ecomenu_assistant.recommendations.engine import (
+    GROUP_COLUMN,
+    IMPACT_COLUMN,
+    NAME_COLUMN,
+    SUBGROUP_COLUMN,
+    RecommendationEngine,
+)
+
+
+@pytest.fixture
+def small():
+    return pd.DataFrame({
+        NAME_COLUMN: ["Bœuf", "Porc", "Poulet", "Lentille", "Pois chiche", "Tofu"],
+        GROUP_COLUMN: ["viandes", "viandes", "viandes", "légumineuses", "légumineuses", "légumineuses"],
+        SUBGROUP_COLUMN: ["rouge", "rouge", "volaille", "sèches", "sèches", "soja"],
+        IMPACT_COLUMN: [30.0, 7.0, 5.0, 1.0, 1.5, 2.0],
+    })
+
+
+def test_same_subgroup_first_then_group(small):
+    engine = RecommendationEngine(small, k=2)
+
+    # Bœuf : Porc (même sous-groupe) puis Poulet (même groupe)
+    assert engine.alternatives[0].tolist() == [1, 2]
+    assert engine.alternatives[1].tolist() == [2, -1]
+    # Produit le plus sobre de son groupe : aucune alternative
+    assert engine.alternatives[3].tolist() == [-1, -1]
+    assert engine.alternatives[5].tolist() == [3, 4]
+    assert engine.best_alternatives([0, 3, 4]).tolist() == [1, -1, 3]
+
+
+def test_get_alternatives_frame(small):
+    engine = RecommendationEngine(small, k=2)
+    table = engine.get_alternatives([0, 3], k=2)
+
+    assert table['source'].tolist() == [0, 0]
+    assert table['Alternative'].tolist() == ["Porc", "Poulet"]
+    assert table['Économie'].tolist() == [23.0, 25.0]
+    assert table['Même sous-groupe'].tolist() == [True, False]
+
+
+def test_alternatives_are_lower_and_in_group():
+    data = load_agribalyse_data()
+    engine = RecommendationEngine(data)
+    impacts = data[IMPACT_COLUMN].to_numpy()
+    groups = data[GROUP_COLUMN].to_numpy()
+
+    sources, ranks = np.nonzero(engine.alternatives >= 0)
+    alternatives = engine.alternatives[sources, ranks]
+    assert (impacts[alternatives] < impacts[sources]).all()
+    assert (groups[alternatives] == groups[sources]).all()
+    # Alternatives distinctes : celles du sous-groupe d'abord, chaque partie
+    # de la plus sobre à la moins sobre
+    for source, row in enumerate(engine.alternatives):
+        found = row[row >= 0]
+        assert len(set(found.tolist())) == len(found)
+        same = engine.subgroup_codes[found] == engine.subgroup_codes[source]
+        assert same.tolist() == sorted(same.tolist(), reverse=True)
+        for part in (found[same], found[~same]):
+            assert (np.diff(impacts[part]) >= 0).all()
@@ -0,0 +1,108 @@
+"""
+Exports en flux (CSV, Parquet, PDF) et exports en arrière-plan
+"""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ecomenu_assistant.data.export import (
+    ExportJob,
+    iter_csv,
+    iter_frames,
+    start_export,
+    write_csv,
+    write_parquet,
+    write_pdf,
+)
+
+
+@pytest.fixture
+def table():
+    return pd.DataFrame({
+        'Nom': [f"Produit {i}" for i in range(25)],
+        'Groupe': ["fruits", "légumes"] * 12 + ["viandes"],
+        'Impact': np.linspace(0.5, 30, 25),
+    })
+
+
+def test_iter_frames_chunks_and_selection(table):
+    chunks = list(iter_frames(table, chunk_size=10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    pd.testing.assert_frame_equal(pd.concat(chunks), table)
+
+    selected = pd.concat(iter_frames(table, rows=[24, 3, 7], columns=['Nom', 'Absente'], chunk_size=2))
+    assert selected['Nom'].tolist() == ["Produit 24", "Produit 3", "Produit 7"]
+    assert list(selected.columns) == ['Nom']
+
+    # Aucune ligne : un paquet vide qui porte les colonnes
+    (empty,) = iter_frames(table, rows=[])
+    assert empty.empty and list(empty.columns) == list(table.columns)
+
+
+def test_csv_matches_pandas(table):
+    target = io.BytesIO()
+    written = write_csv(iter_frames(table, chunk_size=7), target, sep=';')
+
+    assert written == len(target.getvalue())
+    assert target.getvalue().decode() == table.to_csv(sep=';', index=False)
+
+
+def test_csv_bom_written_once(table):
+    data = b''.join(iter_csv(iter_frames(table, chunk_size=10), encoding='utf-8-sig'))
+    assert data.startswith(b'\xef\xbb\xbf')
+    assert data.count(b'\xef\xbb\xbf') == 1
+
+
+def test_parquet_round_trip(table):
+    pytest.importorskip('pyarrow')
+    target = io.BytesIO()
+
+    assert write_parquet(iter_frames(table, chunk_size=10), target) == 25
+    target.seek(0)
+    pd.testing.assert_frame_equal(pd.read_parquet(target), table)
+
+
+def test_pdf_report(table):
+    target = io.BytesIO()
+    sections = [
+        ("Graphique", lambda ax: ax.bar(table['Nom'], table['Impact'])),
+        ("Tableau", iter_frames(table, chunk_size=10)),
+    ]
+    pages = write_pdf(sections, target)
+
+    assert pages >= 2
+    assert target.getvalue().startswith(b'%PDF')
+
+
+def test_background_export(table):
+    job = start_export('csv', iter_frames(table, chunk_size=10), "produits").wait(30)
+
+    assert job.ok and job.rows == 25
+    assert job.file_name == "produits.csv"
+    with job.open() as f:
+        assert f.read().decode() == table.to_csv(index=False)
+    assert job.size == os.path.getsize(job.path)
+
+    job.discard()
+    assert not os.path.exists(job.path)
+
+
+def test_background_export_error():
+    def failing():
+        yield pd.DataFrame({'a': [1]})
+        raise RuntimeError("lecture impossible")
+
+    job = start_export('csv', failing())
+    with pytest.raises(RuntimeError):
+        job.wait(30)
+    assert job.done and not job.ok
+    assert isinstance(job.error, RuntimeError)
+    job.discard()
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        ExportJob('xlsx')
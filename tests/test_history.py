@@ -0,0 +1,42 @@
+"""
+Historique de conversation sous budget de tokens (ConversationHistory)
+"""
+from ecomenu_assistant.llm.history import ConversationHistory, count_tokens
+
+
+def test_history_stays_within_budget():
+    history = ConversationHistory(max_tokens=400, summary_max_tokens=120)
+    for i in range(30):
+        history.add_exchange(f"Question {i} : que penser du produit numéro {i} ?",
+                             f"Réponse {i}. " + "Détail de la réponse. " * 10)
+        assert history.total_tokens <= history.max_tokens
+
+    stats = history.stats()
+    assert stats['echanges_resumes'] + stats['echanges_conserves'] == 30
+    assert stats['tokens_resume'] <= history.summary_max_tokens
+
+    messages = history.as_messages()
+    assert messages[0]['role'] == 'system' and "Question" in messages[0]['content']
+    # Le dernier échange est conservé en entier
+    assert messages[-2] == {'role': 'user', 'content': "Question 29 : que penser du produit numéro 29 ?"}
+    assert messages[-1]['content'].startswith("Réponse 29.")
+
+
+def test_history_keeps_last_exchange_over_budget():
+    history = ConversationHistory(max_tokens=100, summary_max_tokens=40)
+    history.add_exchange("Court", "Long " * 200)
+    history.add_exchange("Encore", "Très long " * 200)
+
+    assert [m['content'] for m in history.turns][0] == "Encore"
+    assert history.summarized_turns == 1
+    assert count_tokens("Long " * 200) > 100
+
+
+def test_history_reset():
+    history = ConversationHistory(max_tokens=100, summary_max_tokens=40)
+    history.add_exchange("a" * 500, "b" * 500)
+    history.add_exchange("c", "d")
+    history.reset()
+
+    assert history.as_messages() == []
+    assert history.total_tokens == 0
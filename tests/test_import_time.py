@@ -0,0 +1,126 @@
+"""
+Budget de temps d'import au démarrage de l'application Streamlit.
+
+Le démarrage (app.py et la page de recherche affichée par défaut) ne doit
+importer ni les autres pages, ni plotly.express, ni le SDK OpenAI : ils
+sont chargés à la première ouverture de leur page, et le client OpenAI au
+premier message du chat.
+
+Les temps sont mesurés avec `python -X importtime` dans un processus neuf,
+après `import streamlit` (déjà payé par `streamlit run`, donc hors budget).
+Budget ajustable : ECOMENU_IMPORT_BUDGET_MS (défaut 1000 ms).
+"""
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+SRC_DIR = ROOT / "src"
+UI_DIR = SRC_DIR / "ecomenu_assistant" / "ui"
+
+IMPORT_BUDGET_MS = float(os.getenv('ECOMENU_IMPORT_BUDGET_MS', 1000))
+
+# Modules qui ne doivent pas être chargés au démarrage
+IMPORTS_DIFFERES = [
+    'analysis_page',
+    'chat_page',
+    'ecomenu_assistant.visualization.charts',
+    'ecomenu_assistant.llm.openai_client',
+    'ecomenu_assistant.llm.async_client',
+    'plotly.express',
+    'openai',
+    'dotenv',
+]
+
+STARTUP_SCRIPT = """
+import json, sys
+import streamlit
+import app
+# Imports de la page de recherche (faits dans show_search_page)
+import ecomenu_assistant.data.loader
+import ecomenu_assistant.data.search
+import ecomenu_assistant.recommendations.engine
+print(json.dumps([name for name in {modules} if name in sys.modules]))
+"""
+
+FIRST_USE_SCRIPT = """
+import json, sys
+from streamlit.testing.v1 import AppTest
+
+deferred = {modules}
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+loaded = {{'demarrage': [name for name in deferred if name in sys.modules]}}
+at.sidebar.radio[0].set_value("💬 Chat IA").run()
+loaded['chat'] = [name for name in deferred if name in sys.modules]
+loaded['erreurs'] = [str(e.value) for e in at.exception]
+print(json.dumps(loaded))
+"""
+
+
+def _run(script: str, *flags: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join([str(UI_DIR), str(SRC_DIR)])}
+    env.pop('ECOMENU_METRICS', None)
+    result = subprocess.run(
+        [sys.executable, *flags, '-c', textwrap.dedent(script)],
+        capture_output=True, text=True, env=env, cwd=ROOT, timeout=300,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return result
+
+
+def parse_importtime(stderr: str, after: str = 'streamlit') -> dict:
+    """
+    Temps cumulés (µs) des imports de premier niveau de la sortie de
+    `python -X importtime`, à partir du module `after` (exclu).
+
+    Args:
+        stderr: Sortie d'erreur du processus
+        after: Module de premier niveau dont les imports précédents sont ignorés
+
+    Returns:
+        Dict {module: temps cumulé en microsecondes}
+    """
+    times = {}
+    started = False
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|', 2)
+        if name.startswith('  ') or not cumulative.strip().isdigit():
+            continue  # import imbriqué ou ligne d'en-tête
+        name = name.strip()
+        if started:
+            times[name] = int(cumulative)
+        elif name == after:
+            started = True
+    return times
+
+
+def test_startup_import_budget():
+    script = STARTUP_SCRIPT.format(modules=IMPORTS_DIFFERES)
+    result = _run(script, '-X', 'importtime')
+
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+    times = parse_importtime(result.stderr)
+    total_ms = sum(times.values()) / 1000
+    detail = ', '.join(f"{name} {us / 1000:.0f} ms"
+                       for name, us in sorted(times.items(), key=lambda item: -item[1]))
+    assert total_ms <= IMPORT_BUDGET_MS, (
+        f"Imports du démarrage : {total_ms:.0f} ms > budget {IMPORT_BUDGET_MS:.0f} ms ({detail})"
+    )
+
+
+def test_pages_loaded_on_first_use():
+    script = FIRST_USE_SCRIPT.format(modules=IMPORTS_DIFFERES, app=str(UI_DIR / "app.py"))
+    loaded = json.loads(_run(script).stdout.strip().splitlines()[-1])
+
+    assert loaded['erreurs'] == []
+    assert loaded['demarrage'] == []
+    # Page de chat ouverte, aucun message envoyé : pas de client OpenAI
+    assert 'chat_page' in loaded['chat']
+    assert 'openai' not in loaded['chat']
+    assert 'ecomenu_assistant.llm.async_client' not in loaded['chat']
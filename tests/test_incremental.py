@@ -0,0 +1,93 @@
+"""
+Statistiques incrémentales (IncrementalAnalyzer, QuantileSketch)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from ecomenu_assistant.data.analyzer import analyze_by_group, get_global_stats
+from ecomenu_assistant.data.incremental import IMPACT_COLUMN, IncrementalAnalyzer, QuantileSketch
+from ecomenu_assistant.data.loader import load_agribalyse_data
+
+
+@pytest.fixture(scope="module")
+def data():
+    return load_agribalyse_data()
+
+
+def assert_same_groups(analyzer: IncrementalAnalyzer, data: pd.DataFrame):
+    expected = analyze_by_group(data)
+    actual = analyzer.analyze_by_group().loc[expected.index]
+    assert actual['Nombre'].tolist() == expected['Nombre'].tolist()
+    for column in ('Moyenne', 'Min', 'Max'):
+        np.testing.assert_allclose(actual[column], expected[column], rtol=1e-9)
+
+
+def assert_same_global(analyzer: IncrementalAnalyzer, data: pd.DataFrame):
+    expected = get_global_stats(data)
+    actual = analyzer.get_global_stats()
+    for key in ('moyenne', 'ecart_type', 'min', 'max'):
+        assert actual[key] == pytest.approx(expected[key], abs=0.011)
+    # Quantiles estimés : erreur relative de 1 %, plus l'arrondi
+    for key in ('mediane', 'q25', 'q75'):
+        assert actual[key] == pytest.approx(expected[key], rel=0.02, abs=0.011)
+
+
+def test_matches_pandas(data):
+    analyzer = IncrementalAnalyzer.from_dataframe(data)
+
+    assert_same_groups(analyzer, data)
+    assert_same_global(analyzer, data)
+
+
+def test_updates_and_deletes_match_recomputation(data):
+    analyzer = IncrementalAnalyzer.from_dataframe(data)
+    updated = data.copy()
+
+    # Produit le plus émetteur modifié, 300 supprimés, un ajouté
+    top = updated[IMPACT_COLUMN].idxmax()
+    updated.loc[top, IMPACT_COLUMN] = 1.0
+    row = analyzer.rows[top]
+    analyzer.upsert(top, row[0], row[1], 1.0)
+    removed = updated.index[:300]
+    assert analyzer.delete_many(removed) == 300
+    updated = updated.drop(removed)
+    new = updated.iloc[[0]].copy()
+    new.index = [-1]
+    analyzer.upsert_dataframe(new)
+    updated = pd.concat([updated, new])
+
+    assert_same_groups(analyzer, updated)
+    assert_same_global(analyzer, updated)
+    assert analyzer.delete(removed[0]) is False
+
+
+def test_chunks_and_merge(data):
+    chunks = [data.iloc[start:start + 500] for start in range(0, len(data), 500)]
+    streamed = IncrementalAnalyzer.from_chunks(iter(chunks))
+    assert_same_groups(streamed, data)
+    assert_same_global(streamed, data)
+    with pytest.raises(ValueError):
+        streamed.delete(data.index[0])
+
+    merged = IncrementalAnalyzer.from_dataframe(chunks[0])
+    for chunk in chunks[1:]:
+        merged.merge(IncrementalAnalyzer.from_dataframe(chunk))
+    assert_same_groups(merged, data)
+    with pytest.raises(ValueError):
+        merged.merge(IncrementalAnalyzer.from_dataframe(chunks[0]))
+
+
+def test_quantile_sketch_relative_error():
+    values = np.random.default_rng(0).lognormal(0, 2, 10_000)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.add_array(values)
+    for q in (0.1, 0.5, 0.9, 0.99):
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q, method='lower'), rel=0.011)
+
+    # Suppressions : le résumé revient à celui des valeurs restantes
+    for value in values[:5000]:
+        sketch.remove(value)
+    assert sketch.count == 5000
+    assert sketch.quantile(0.5) == pytest.approx(np.quantile(values[5000:], 0.5, method='lower'), rel=0.011)
+    assert np.isnan(QuantileSketch().quantile(0.5))
@@ -0,0 +1,51 @@
+"""
+Cache des réponses du LLM (clés normalisées, LRU, expiration, SQLite)
+"""
+from ecomenu_assistant.llm import cache as cache_module
+from ecomenu_assistant.llm.cache import ResponseCache, SQLiteResponseCache, make_cache_key
+
+SYSTEM = {'role': 'system', 'content': "Tu es un assistant."}
+
+
+def test_cache_key_normalizes_case_and_spaces():
+    key = make_cache_key('gpt', [SYSTEM, {'role': 'user', 'content': "Que manger ?"}])
+
+    assert key == make_cache_key('gpt', [SYSTEM, {'role': 'user', 'content': "  que   MANGER ?"}])
+    assert key != make_cache_key('gpt-4', [SYSTEM, {'role': 'user', 'content': "Que manger ?"}])
+    assert key != make_cache_key('gpt', [SYSTEM, {'role': 'user', 'content': "Que manger ?"}], "« riz »")
+    assert key != make_cache_key('gpt', [SYSTEM, {'role': 'assistant', 'content': "Que manger ?"}])
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.set('a', "A")
+    cache.set('b', "B")
+    assert cache.get('a') == "A"  # 'a' devient la plus récente
+    cache.set('c', "C")
+
+    assert cache.get('b') is None
+    assert cache.get('a') == "A" and cache.get('c') == "C"
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'entrees': 2}
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'time', lambda: now[0])
+    cache = ResponseCache(ttl=60)
+    cache.set('a', "A")
+
+    now[0] += 59
+    assert cache.get('a') == "A"
+    now[0] += 2
+    assert cache.get('a') is None
+    assert cache.stats()['entrees'] == 0
+
+
+def test_sqlite_cache_persists(tmp_path):
+    path = str(tmp_path / "reponses.db")
+    SQLiteResponseCache(path).set('a', "Réponse persistée")
+
+    reopened = SQLiteResponseCache(path)
+    assert reopened.get('a') == "Réponse persistée"
+    reopened.clear()
+    assert SQLiteResponseCache(path).get('a') is None
@@ -0,0 +1,56 @@
+"""
+Chargement des données AGRIBALYSE et cache partagé par le processus
+"""
+import threading
+
+import pandas as pd
+import pytest
+
+from ecomenu_assistant.data.loader import (
+    get_cache_stats, get_shared_data, iter_agribalyse_chunks, load_agribalyse_data
+)
+
+
+@pytest.mark.parametrize("extended", [False, True])
+def test_chunks_match_full_load(extended):
+    # Mêmes types, mêmes lignes et même index que le chargement complet
+    chunks = pd.concat(iter_agribalyse_chunks(extended=extended, chunksize=1000))
+
+    pd.testing.assert_frame_equal(chunks, load_agribalyse_data(use_snapshot=False, extended=extended))
+
+
+def test_shared_data_is_read_only():
+    data = get_shared_data()
+
+    with pytest.raises(ValueError):
+        data.loc[data.index[0], 'Changement climatique'] = 0.0
+    with pytest.raises(ValueError):
+        data['Nom du Produit en Français'].to_numpy()[0] = "modifié"
+    # Le conteneur aussi : ni remplacement, ni ajout, ni suppression de colonne
+    with pytest.raises(ValueError):
+        data['Changement climatique'] = 0.0
+    with pytest.raises(ValueError):
+        data['x'] = 1
+    with pytest.raises(ValueError):
+        data.drop(columns=['Changement climatique'], inplace=True)
+    assert 'x' not in data.columns
+    assert data['Changement climatique'].iat[0] != 0.0
+    # Une copie reste modifiable
+    impact = data['Changement climatique'].iat[0]
+    copy = data.copy()
+    copy.loc[copy.index[0], 'Changement climatique'] = impact + 1
+    assert data['Changement climatique'].iat[0] == impact
+
+
+def test_cache_stats_count_every_hit():
+    get_shared_data()
+    before = get_cache_stats()['chargements_evites']
+
+    threads = [threading.Thread(target=lambda: [get_shared_data() for _ in range(200)])
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert get_cache_stats()['chargements_evites'] - before == 800
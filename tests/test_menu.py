@@ -0,0 +1,62 @@
+"""
+Menu hebdomadaire (MenuOptimizer.plan) : produits prêts à manger, variété
+d'un jour à l'autre, menu végétarien
+"""
+import pytest
+
+from ecomenu_assistant.data.loader import load_agribalyse_data
+from ecomenu_assistant.recommendations.menu import (
+    COMPOSANTES, JOURS, SOUS_GROUPES_CARNES, MenuOptimizer
+)
+
+
+@pytest.fixture(scope="module")
+def optimizer():
+    return MenuOptimizer(load_agribalyse_data())
+
+
+@pytest.fixture(scope="module")
+def menu(optimizer):
+    return optimizer.plan()
+
+
+def test_one_portion_per_component_and_meal(menu):
+    assert len(menu) == len(JOURS) * 2 * len(COMPOSANTES)
+    assert (menu.groupby(['Jour', 'Repas', 'Composante']).size() == 1).all()
+    for composante, rows in menu.groupby('Composante'):
+        assert set(rows['Sous-groupe']) <= set(COMPOSANTES[composante]['sous_groupes'])
+
+
+@pytest.mark.parametrize("name", [
+    "Haricot blanc, sec", "Lentille, sèche", "Sorgho entier, cru", "Échalote, crue",
+    "Milk-shake, provenant de fast food", "Crème pâtissière", "Citron, zeste, cru",
+])
+def test_ingredients_are_not_served(optimizer, menu, name):
+    # Les produits bruts ou d'assemblage ne sont jamais des portions
+    assert not any(product.startswith(name) for product in menu['Produit'])
+    assert not any(str(optimizer.names[row_id]).startswith(name)
+                   for candidates in optimizer.candidates.values() for row_id in candidates)
+
+
+@pytest.mark.parametrize("options", [{}, {'vegetarian': True}, {'max_repeats': 7}, {'days': 3}])
+def test_no_product_on_consecutive_days(optimizer, options):
+    menu = optimizer.plan(**options)
+    days = menu['Jour'].map(JOURS.index)
+    for product, served in days.groupby(menu['Produit']):
+        served = sorted(served)
+        assert all(later - earlier > 1 for earlier, later in zip(served, served[1:])), product
+
+
+def test_vegetarian_changes_protein_pool(optimizer, menu):
+    vegetarian = optimizer.plan(vegetarian=True)
+
+    assert not vegetarian['Sous-groupe'].isin(SOUS_GROUPES_CARNES).any()
+    # Poisson deux fois par semaine hors menu végétarien
+    assert (menu['Sous-groupe'] == 'poissons cuits').sum() >= 2
+    proteins = lambda plan: set(plan.loc[plan['Composante'] == 'Protéines', 'Produit'])
+    assert proteins(vegetarian) != proteins(menu)
+
+
+def test_days_out_of_range(optimizer):
+    with pytest.raises(ValueError):
+        optimizer.plan(days=8)
@@ -0,0 +1,57 @@
+"""
+Export Prometheus des mesures (to_prometheus) : familles contiguës et
+étiquettes échappées
+"""
+import pytest
+
+from ecomenu_assistant.utils import metrics
+
+
+@pytest.fixture
+def recorded():
+    was_enabled = metrics.is_enabled()
+    metrics.enable()
+    metrics.reset()
+    yield
+    metrics.reset()
+    metrics.enable(was_enabled)
+
+
+def family(line: str) -> str:
+    """Famille d'un échantillon (histogramme : sans _bucket/_sum/_count)"""
+    name = line.split('{')[0].split(' ')[0]
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith('_seconds' + suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def test_families_are_contiguous(recorded):
+    metrics.observe('load', 0.01, rows=10, page='a')
+    metrics.observe('load', 0.02, rows=5, page='b')
+    metrics.observe('search', 0.003, rows=3)
+    metrics.increment('cache.hit', 2)
+
+    lines = metrics.to_prometheus().splitlines()
+    # Chaque échantillon suit la déclaration de sa famille, déclarée une fois
+    declared, current = [], None
+    for line in lines:
+        if line.startswith('# TYPE'):
+            current = line.split()[2]
+            assert current not in declared
+            declared.append(current)
+        else:
+            assert family(line) == current, line
+    samples = [line for line in lines if not line.startswith('#')]
+    families = [family(line) for line in samples]
+    assert 'ecomenu_load_rows_total{page="a"} 10' in samples
+    assert 'ecomenu_search_rows_total 3' in samples
+    assert families.index('ecomenu_load_rows_total') > families.index('ecomenu_search_seconds')
+
+
+def test_label_values_are_escaped(recorded):
+    metrics.observe('llm.chat', 0.1, modele='a"b\\c\nd')
+
+    samples = [line for line in metrics.to_prometheus().splitlines()
+               if line.startswith('ecomenu_llm_chat_seconds_count')]
+    assert samples == ['ecomenu_llm_chat_seconds_count{modele="a\\"b\\\\c\\nd"} 1']
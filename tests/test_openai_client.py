@@ -0,0 +1,53 @@
+"""
+Assistant EcoMenu : une réponse vide n'est ni mise en cache ni gardée dans
+l'historique (API OpenAI remplacée par un client factice)
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from ecomenu_assistant.llm.cache import ResponseCache
+from ecomenu_assistant.llm.openai_client import EcoMenuAssistant
+
+
+class StubPool:
+    """Client factice : renvoie toujours la même réponse"""
+
+    def __init__(self, reply: str):
+        self.reply = reply
+
+    def complete(self, **kwargs):
+        message = SimpleNamespace(content=self.reply or None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    def stream(self, **kwargs):
+        yield from ([self.reply[:3], self.reply[3:]] if self.reply else [])
+
+
+@pytest.fixture
+def make_assistant():
+    def make(reply: str) -> EcoMenuAssistant:
+        return EcoMenuAssistant(cache=ResponseCache(), pool=StubPool(reply))
+    return make
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_empty_answer_is_not_kept(make_assistant, streamed):
+    assistant = make_assistant("")
+
+    answer = "".join(assistant.chat_stream("Bonjour")) if streamed else assistant.chat("Bonjour")
+
+    assert answer == ""
+    assert assistant.cache.stats()['entrees'] == 0
+    assert assistant.conversation_history == []
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_answer_is_cached_and_saved(make_assistant, streamed):
+    assistant = make_assistant("Privilégiez les lentilles.")
+
+    answer = "".join(assistant.chat_stream("Bonjour")) if streamed else assistant.chat("Bonjour")
+
+    assert answer == "Privilégiez les lentilles."
+    assert assistant.cache.stats()['entrees'] == 1
+    assert [message['content'] for message in assistant.conversation_history] == ["Bonjour", answer]
@@ -0,0 +1,61 @@
+"""
+Association des ingrédients aux produits AGRIBALYSE (RecipeCalculator.resolve)
+"""
+import pytest
+
+from ecomenu_assistant.data.loader import load_agribalyse_data
+from ecomenu_assistant.recommendations import recipes
+from ecomenu_assistant.recommendations.recipes import NAME_COLUMN, RecipeCalculator
+
+
+@pytest.fixture(scope="module")
+def calculator():
+    return RecipeCalculator(load_agribalyse_data())
+
+
+def resolved_name(calculator: RecipeCalculator, ingredient: str) -> str:
+    row_id = calculator.resolve(ingredient)
+    return None if row_id < 0 else calculator.data[NAME_COLUMN].iat[row_id]
+
+
+@pytest.mark.parametrize("ingredient, prefix", [
+    # Un mot entier, pas le début d'un mot ("Laitue", "Sel au céleri"...)
+    ("lait", "Lait demi-écrémé"),
+    ("sel", "Sel blanc alimentaire"),
+    ("farine", "Farine de blé tendre"),
+    # Le produit lui-même plutôt qu'un composé ou un plat
+    ("beurre", "Beurre à 82% MG"),
+    ("poulet", "Poulet, pilon, cru"),
+    ("saumon", "Saumon, cru"),
+    ("pomme de terre", "Pomme de terre"),
+    ("pommes de terre", "Pomme de terre"),
+    ("oeufs", "Oeuf, cru"),
+    ("boeuf haché", "Bœuf, steak haché"),
+    ("tomates", "Tomate, crue"),
+    # Les accents départagent
+    ("pâtes", "Pâtes sèches"),
+    ("pâté", "Pâté"),
+    # Libellés de tickets et fautes de frappe
+    ("sel fin", "Sel blanc alimentaire"),
+    ("farine T55", "Farine de blé tendre ou froment T55"),
+    ("BOEUF HACHE 5%", "Bœuf, steak haché 5% MG"),
+    ("tomatte", "Tomate, crue"),
+    ("brocolli", "Brocoli"),
+])
+def test_resolve_staples(calculator, ingredient, prefix):
+    assert resolved_name(calculator, ingredient).startswith(prefix)
+
+
+def test_resolve_unknown(calculator):
+    assert calculator.resolve("xyzzy") == -1
+
+
+def test_resolved_memo_is_bounded(calculator, monkeypatch):
+    monkeypatch.setattr(recipes, 'RESOLVED_CACHE_SIZE', 3)
+    calculator = RecipeCalculator(calculator.data)
+    for ingredient in ["lait", "sel", "riz", "sucre", "beurre"]:
+        calculator.resolve(ingredient)
+
+    assert len(calculator._resolved) == 3
+    assert "lait" not in calculator._resolved
+    assert "beurre" in calculator._resolved
@@ -0,0 +1,66 @@
+"""
+Évaluation des lignes d'un ticket de caisse (LineScorer, parse_quantity)
+"""
+import csv
+from pathlib import Path
+
+import pytest
+
+from ecomenu_assistant.data.loader import load_agribalyse_data
+from ecomenu_assistant.recommendations.recipes import RecipeCalculator
+from ecomenu_assistant.recommendations.scoring import LineScorer, parse_quantity
+
+TICKET = Path(__file__).parent / "fixtures" / "ticket_caisse.csv"
+
+# Libellé du ticket -> (début du produit attendu, quantité en grammes)
+ATTENDUS = {
+    "lait": ("Lait demi-écrémé", None),
+    "sel fin 1kg": ("Sel blanc alimentaire", 1000),
+    "farine T55 1kg": ("Farine de blé tendre ou froment T55", 1000),
+    "oeufs x12": ("Oeuf, cru", 720),
+    "Jambon blanc 4 tranches": ("Jambon cuit", 160),
+    "BOEUF HACHE 5% 2X125G": ("Bœuf, steak haché 5% MG", 250),
+    "Lait demi-écrémé 1,5 L": ("Lait demi-écrémé", 1500),
+    "Pâtes 500g": ("Pâtes sèches", 500),
+    "Pommes de terre 2.5kg": ("Pomme de terre", 2500),
+    "BEURRE DOUX 250G": ("Beurre à 82% MG, doux", 250),
+    "Yaourt nature x4": ("Yaourt, lait fermenté ou spécialité laitière, nature", 500),
+    "Tomates 1kg": ("Tomate, crue", 1000),
+    "Saumon 2 pavés": ("Saumon, cru", 250),
+    "Emmental râpé 200g": ("Emmental ou emmenthal râpé", 200),
+}
+
+
+@pytest.fixture(scope="module")
+def scored_ticket():
+    scorer = LineScorer(RecipeCalculator(load_agribalyse_data(extended=True)))
+    with open(TICKET, encoding="utf-8") as f:
+        records = list(csv.DictReader(f, delimiter=";"))
+    return {record["libelle"]: record for record in scorer.score_records(records, "libelle")}
+
+
+@pytest.mark.parametrize("label", list(ATTENDUS))
+def test_ticket_products(scored_ticket, label):
+    product, grams = ATTENDUS[label]
+    line = scored_ticket[label]
+
+    assert line["produit_agribalyse"].startswith(product)
+    assert line["quantite_g"] == grams
+    assert line["co2_par_kg"] > 0
+    if grams is not None:
+        assert line["co2_ligne"] == pytest.approx(line["co2_par_kg"] * grams / 1000, abs=1e-3)
+
+
+@pytest.mark.parametrize("text, label, grams", [
+    ("BOEUF HACHE 5% 2X125G", "BOEUF HACHE 5%", 250),
+    ("Lait 1,5 L", "Lait", 1500),
+    ("Oeufs x12", "Oeufs", 720),
+    ("12X OEUFS", "OEUFS", 720),
+    ("6 yaourts nature", "yaourts nature", 750),
+    ("Jambon blanc 4 tranches", "Jambon blanc", 160),
+    # Nombre d'articles de poids inconnu : retiré du libellé, quantité absente
+    ("Fromage 3 pièces", "Fromage", None),
+    ("Steak haché 5%", "Steak haché 5%", None),
+])
+def test_parse_quantity(text, label, grams):
+    assert parse_quantity(text) == (label, grams)
@@ -0,0 +1,70 @@
+"""
+Recherche de produits (ProductSearchIndex : recherche exacte et approchée)
+"""
+import pytest
+
+from ecomenu_assistant.data.search import ProductSearchIndex, edit_distance, normalize_text, singularize
+
+NOMS = [
+    "Tomate, crue",                    # 0
+    "Sauce tomate, préemballée",       # 1
+    "Pomme de terre, sans peau, crue",  # 2
+    "Bœuf, steak haché 5% MG, cru",    # 3
+    "Haricot vert, cuit",              # 4
+    "Pâté de campagne",                # 5
+    "Coulis de tomates",               # 6
+    "Pomme, pulpe, crue",              # 7
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return ProductSearchIndex(NOMS)
+
+
+def test_normalize_text():
+    assert normalize_text("  Bœuf   HACHÉ ") == "boeuf hache"
+    assert singularize("tomates") == "tomate"
+    assert singularize("riz") == "riz"
+
+
+def test_edit_distance():
+    assert edit_distance("tomate", "tomatte", 2) == 1
+    assert edit_distance("brocoli", "brocolli", 2) == 1
+    assert edit_distance("abc", "xyz", 1) > 1
+
+
+def test_search_ranks_name_start_then_word_start(index):
+    assert index.search("tomate").tolist() == [0, 1, 6]
+    assert index.search("pomme").tolist() == [7, 2]
+
+
+def test_search_ignores_case_and_accents(index):
+    assert index.search("PATE").tolist() == [5]
+    assert index.search("boeuf hache").tolist() == []
+    assert index.search("steak hache").tolist() == [3]
+
+
+def test_search_substring_and_limit(index):
+    # Sous-chaîne au milieu d'un mot, après les débuts de mots
+    assert set(index.search("mate").tolist()) == {0, 1, 6}
+    assert len(index.search("e", limit=3)) == 3
+    assert index.search("").tolist() == []
+    assert index.search("xyz").tolist() == []
+
+
+def test_fuzzy_search_typos_and_word_order(index):
+    assert index.fuzzy_search("tomatte")[0] in (0, 6)
+    assert index.fuzzy_search("hache boeuf")[0] == 3
+    assert index.fuzzy_search("haricots verts")[0] == 4
+    assert index.fuzzy_search("pome de tere")[0] == 2
+
+
+def test_fuzzy_search_keeps_exact_matches_first(index):
+    results = index.fuzzy_search("tomate", limit=None).tolist()
+    assert results[:3] == [0, 1, 6]
+
+
+def test_word_rows_whole_words_only(index):
+    assert index.word_rows("tomate").tolist() == [0, 1, 6]
+    assert index.word_rows("pom").tolist() == []
@@ -0,0 +1,63 @@
+"""
+Substituts par similarité des profils d'impact (ImpactProfileIndex) :
+plus proches voisins exacts, score plus faible, produit exclu, complément
+-1/inf
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from ecomenu_assistant.recommendations.similarity import (
+    NAME_COLUMN,
+    SCORE_COLUMN,
+    ImpactProfileIndex,
+)
+
+COLUMNS = ['a', 'b', 'c']
+
+
+@pytest.fixture
+def index():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.lognormal(size=(40, len(COLUMNS))), columns=COLUMNS)
+    data[NAME_COLUMN] = [f"produit {i}" for i in range(len(data))]
+    data[SCORE_COLUMN] = rng.permutation(len(data)).astype(float)
+    return ImpactProfileIndex(data, columns=COLUMNS)
+
+
+def brute_force(index, row_id, k):
+    """k plus proches voisins de score strictement inférieur, par force brute"""
+    distances = np.linalg.norm(index.matrix.astype(np.float64) - index.matrix[row_id], axis=1)
+    candidates = [i for i in np.argsort(distances, kind='stable')
+                  if i != row_id and index.scores[i] < index.scores[row_id]]
+    return candidates[:k], distances[candidates[:k]]
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 1024])
+def test_neighbours_are_exact(index, batch_size):
+    row_ids = np.arange(len(index.matrix))
+    neighbours, distances = index.query(row_ids, k=4, batch_size=batch_size)
+
+    for row_id in row_ids:
+        expected, expected_distances = brute_force(index, row_id, k=4)
+        found = neighbours[row_id][neighbours[row_id] >= 0]
+        assert found.tolist() == expected
+        np.testing.assert_allclose(distances[row_id, :len(found)], expected_distances, rtol=1e-4, atol=1e-4)
+        assert row_id not in found
+        assert (index.scores[found] < index.scores[row_id]).all()
+
+
+def test_padding_when_too_few_candidates(index):
+    lowest = int(np.argmin(index.scores))
+    second = int(np.argsort(index.scores)[1])
+    neighbours, distances = index.query([lowest, second], k=3)
+
+    # Produit le plus sobre : aucun substitut ; le suivant : un seul
+    assert neighbours[0].tolist() == [-1, -1, -1]
+    assert np.isinf(distances[0]).all()
+    assert neighbours[1].tolist() == [lowest, -1, -1]
+    assert np.isfinite(distances[1, 0]) and np.isinf(distances[1, 1:]).all()
+
+    alternatives = index.similar_products([lowest, second], k=3)
+    assert alternatives['source'].tolist() == [second]
+    assert (alternatives['Économie score'] > 0).all()